@@ -12,9 +12,24 @@ pip install -r requirements.txt
 echo "Collecting static files..."
 python manage.py collectstatic --no-input --settings=config.settings_production
 
+echo "Pre-compressing 3D models..."
+python manage.py compress_models --settings=config.settings_production
+
 echo "Running migrations..."
 python manage.py migrate --settings=config.settings_production
 
+echo "Rebuilding farm summaries..."
+python manage.py rebuild_farm_summaries --settings=config.settings_production
+
+echo "Indexing model metadata..."
+python manage.py refresh_model_info --settings=config.settings_production
+
+echo "Indexing layout text..."
+python manage.py index_layouts --settings=config.settings_production
+
+echo "Creating cache table..."
+python manage.py createcachetable --settings=config.settings_production
+
 echo "Creating superuser..."
 python manage.py createsuperuser --noinput --settings=config.settings_production || true
 
@@ -245,20 +245,31 @@ LOGGING = {
         },
     },
 }
-# Cache Configuration - Use dummy cache for free hosting
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+# Cache Configuration - Redis when available, otherwise the database cache.
+# The farm payload cache relies on a cache shared by all workers so that a
+# version bump in one worker invalidates the payload everywhere.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
     }
-}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache_table',
+        }
+    }
+
+# Seconds a serialized farm payload may live in the cache (see core/cache.py)
+FARM_ASSETS_CACHE_TIMEOUT = int(os.environ.get('FARM_ASSETS_CACHE_TIMEOUT', '3600'))
 
-# Alternative: Use database cache for better performance without Redis
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
-#         'LOCATION': 'cache_table',
-#     }
-# }
+# How often (seconds) each worker checks whether another one changed a
+# reference table it holds in memory (core.reference_cache)
+REFERENCE_CACHE_CHECK_SECONDS = int(os.environ.get('REFERENCE_CACHE_CHECK_SECONDS', '1'))
 
 # Session Configuration - Use database sessions for free hosting
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
@@ -297,6 +308,27 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 10000
 
+# Let the front web server send model files instead of the Python worker
+# (see core/file_serving.py): '' (disabled), 'nginx' (X-Accel-Redirect to
+# FILE_OFFLOAD_PREFIX + path relative to BASE_DIR, which must map to an
+# `internal` location) or 'sendfile' (X-Sendfile with the absolute path).
+FILE_OFFLOAD = os.environ.get('FILE_OFFLOAD', '')
+FILE_OFFLOAD_PREFIX = os.environ.get('FILE_OFFLOAD_PREFIX', '/protected/')
+
+# How often (seconds) core.model_registry rescans the model directories for
+# added or changed .glb files
+MODEL_REGISTRY_REFRESH_SECONDS = int(os.environ.get('MODEL_REGISTRY_REFRESH_SECONDS', '10'))
+
+# How often (seconds) core.file_index checks the farm layout directory for
+# new or removed PDFs (one stat of the directory; it is re-listed on change)
+FILE_INDEX_REFRESH_SECONDS = int(os.environ.get('FILE_INDEX_REFRESH_SECONDS', '2'))
+
+# Per-worker memory budget (bytes) for keeping small, hot model files in
+# memory (core.byte_cache); 0 disables it. Only files up to
+# MODEL_FILE_CACHE_MAX_FILE_BYTES are cached.
+MODEL_FILE_CACHE_BYTES = int(os.environ.get('MODEL_FILE_CACHE_BYTES', '0'))
+MODEL_FILE_CACHE_MAX_FILE_BYTES = int(os.environ.get('MODEL_FILE_CACHE_MAX_FILE_BYTES', str(4 * 1024 * 1024)))
+
 # Custom Settings
 API_VERSION = '1.0.0'
 MAX_ASSETS_PER_FARM = 1000
@@ -9,7 +9,7 @@ import zipfile
 import os
 import tempfile
 
-from .models import Asset, AssetType, Content, Farm, Location, Material, AssetEvents, Company, EventType
+from .models import Asset, AssetType, Content, Farm, Location, Material, AssetEvents, Company, EventType, ModelInfo, StoredFile
 
 
 class CsvImportForm(forms.Form):
@@ -45,7 +45,7 @@ class AssetAdmin(admin.ModelAdmin):
     search_fields = ['asset_id', 'name', 'description']
     list_per_page = 50
     
-    fields = ['asset_id', 'company_id', 'location', 'farm', 'name', 'asset_type', 'description',
+    fields = ['asset_id', 'company', 'location', 'farm', 'name', 'asset_type', 'description',
               'installation_date', 'manufactured_date', 'commission_date', 'decommission_date', 
               'status', 'latitude', 'longitude', 'health',
               'capacity', 'model_id', 'current_volume', 'diameter', 'height',
@@ -241,10 +241,10 @@ class AssetAdmin(admin.ModelAdmin):
 
 class FarmAdmin(admin.ModelAdmin):
     list_display = ['farm_id', 'name', 'company_id', 'status', 'location']
-    list_filter = ['status', 'company_id']
+    list_filter = ['status', 'company']
     search_fields = ['farm_id', 'name', 'description']
     
-    fields = ['farm_id', 'company_id', 'location', 'name', 'description', 'status', 'operational_since']
+    fields = ['farm_id', 'company', 'location', 'name', 'description', 'status', 'operational_since']
     readonly_fields = ['farm_id']
 
 
@@ -286,6 +286,20 @@ class EventTypeAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
 
 
+class ModelInfoAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'name', 'lod', 'file_size', 'triangle_count', 'updated_at']
+    list_filter = ['kind', 'lod']
+    search_fields = ['name']
+    readonly_fields = [field.name for field in ModelInfo._meta.fields]
+
+
+class StoredFileAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'name', 'sha256', 'size', 'updated_at']
+    list_filter = ['kind']
+    search_fields = ['name', 'sha256']
+    readonly_fields = ['sha256', 'size', 'created_at', 'updated_at']
+
+
 
 
 # Register models with custom admin
@@ -298,6 +312,8 @@ admin.site.register(Content, ContentAdmin)
 admin.site.register(AssetEvents, AssetEventsAdmin)
 admin.site.register(Company, CompanyAdmin)
 admin.site.register(EventType, EventTypeAdmin)
+admin.site.register(ModelInfo, ModelInfoAdmin)
+admin.site.register(StoredFile, StoredFileAdmin)
 
 # Customize admin site
 admin.site.site_header = "Tank Asset Management"
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .file_index import layout_index
+        from .model_registry import registry as model_registry
+
+        # One directory listing, so the first requests do not pay for it
+        layout_index.refresh()
+        # Hashes every model once, instead of on the first model request
+        model_registry.refresh()
@@ -0,0 +1,164 @@
+"""
+Content-addressed store for model files and layout PDFs.
+
+Every distinct file content is written once, to
+``BLOB_STORE_ROOT/<sha256[:2]>/<sha256>`` (BLOB_STORE_ROOT defaults to
+MEDIA_ROOT/blobs), and logical names are mapped to it by ``StoredFile`` rows.
+Storing a file whose content is already present only adds or updates a row,
+and so do copies and renames; ``collect_garbage`` removes blobs no name
+refers to any more.
+"""
+
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import StoredFile
+
+
+COPY_BLOCK_SIZE = 1024 * 1024
+CONTENT_TYPES = {'.glb': 'model/gltf-binary', '.pdf': 'application/pdf'}
+# Unreferenced blobs younger than this are not garbage collected
+GC_GRACE_SECONDS = 60 * 60
+
+
+def store_root():
+    return str(getattr(settings, 'BLOB_STORE_ROOT', None)
+               or os.path.join(settings.MEDIA_ROOT, 'blobs'))
+
+
+def blob_path(sha256):
+    return os.path.join(store_root(), sha256[:2], sha256)
+
+
+def has_blob(sha256):
+    return os.path.isfile(blob_path(sha256))
+
+
+def file_sha256(path):
+    """``(sha256, size)`` of the file at ``path``."""
+    sha = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        while block := f.read(COPY_BLOCK_SIZE):
+            sha.update(block)
+            size += len(block)
+    return sha.hexdigest(), size
+
+
+def put_file(path):
+    """
+    Add the content of ``path`` to the store. Returns ``(sha256, size,
+    created)``; ``created`` is False when the content was already stored, in
+    which case the file is only read to hash it.
+    """
+    sha256, size = file_sha256(path)
+    target = blob_path(sha256)
+    if os.path.exists(target):
+        # Fresh again, so garbage collection running meanwhile keeps it
+        os.utime(target)
+        return sha256, size, False
+    directory = os.path.dirname(target)
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'rb') as src, tempfile.NamedTemporaryFile(
+            dir=store_root(), prefix='.incoming-', delete=False) as tmp:
+        shutil.copyfileobj(src, tmp, COPY_BLOCK_SIZE)
+    os.chmod(tmp.name, 0o444)
+    # Another process storing the same content meanwhile writes identical bytes
+    os.replace(tmp.name, target)
+    return sha256, size, True
+
+
+def content_type_for(name):
+    extension = os.path.splitext(name)[1].lower()
+    return CONTENT_TYPES.get(extension) or mimetypes.guess_type(name)[0] or ''
+
+
+def store_file(kind, name, path, content_type=None):
+    """
+    Store ``path`` under the logical name ``kind/name``, replacing what the
+    name pointed to. Returns ``(StoredFile, created)`` where ``created`` says
+    whether a new blob was written.
+    """
+    sha256, size, created = put_file(path)
+    stored, _ = StoredFile.objects.update_or_create(
+        kind=kind, name=name, defaults={
+            'sha256': sha256, 'size': size,
+            'content_type': content_type or content_type_for(path),
+        },
+    )
+    return stored, created
+
+
+def copy_stored_file(kind, name, new_kind, new_name):
+    """Point ``new_kind/new_name`` at the blob of ``kind/name``; no data is copied."""
+    source = StoredFile.objects.get(kind=kind, name=name)
+    stored, _ = StoredFile.objects.update_or_create(
+        kind=new_kind, name=new_name, defaults={
+            'sha256': source.sha256, 'size': source.size, 'content_type': source.content_type,
+        },
+    )
+    return stored
+
+
+def rename_stored_file(kind, name, new_kind, new_name):
+    """Move a logical name; the blob is untouched. Replaces ``new_kind/new_name``."""
+    with transaction.atomic():
+        StoredFile.objects.filter(kind=new_kind, name=new_name).delete()
+        stored = StoredFile.objects.get(kind=kind, name=name)
+        stored.kind, stored.name = new_kind, new_name
+        stored.save(update_fields=['kind', 'name', 'updated_at'])
+    return stored
+
+
+def open_stored_file(kind, name):
+    stored = StoredFile.objects.get(kind=kind, name=name)
+    return open(blob_path(stored.sha256), 'rb')
+
+
+def _blobs():
+    """``(name, path)`` of every blob, and of incoming files left by a crash."""
+    root = store_root()
+    if not os.path.isdir(root):
+        return
+    for prefix in os.listdir(root):
+        directory = os.path.join(root, prefix)
+        if prefix.startswith('.incoming-'):
+            yield prefix, directory
+            continue
+        if len(prefix) != 2 or not os.path.isdir(directory):
+            continue
+        for sha256 in os.listdir(directory):
+            yield sha256, os.path.join(directory, sha256)
+
+
+def collect_garbage(dry_run=False, min_age=GC_GRACE_SECONDS):
+    """
+    Remove blobs that no StoredFile refers to, and abandoned incoming files.
+    Anything younger than ``min_age`` seconds is kept, as it may belong to a
+    store_file() that has not saved its row yet. Returns ``(count, bytes)``
+    of what was removed (or would be, with ``dry_run``).
+    """
+    referenced = set(StoredFile.objects.values_list('sha256', flat=True).distinct())
+    cutoff = time.time() - min_age
+    count = freed = 0
+    for sha256, path in list(_blobs()):
+        stat = os.stat(path)
+        if sha256 in referenced or stat.st_mtime > cutoff:
+            continue
+        count += 1
+        freed += stat.st_size
+        if not dry_run:
+            os.remove(path)
+            if not sha256.startswith('.'):
+                try:
+                    os.rmdir(os.path.dirname(path))
+                except OSError:
+                    pass
+    return count, freed
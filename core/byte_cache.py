@@ -0,0 +1,112 @@
+"""
+Per-process, byte-budgeted LRU of small file contents.
+
+The category models are small and requested constantly; with
+MODEL_FILE_CACHE_BYTES set, ``serve_file`` keeps recently served files of at
+most MODEL_FILE_CACHE_MAX_FILE_BYTES in memory and answers from there without
+opening the file again. Entries are keyed by ``(path, mtime_ns, size)`` -- the
+stat the caller already has from the model registry -- so a replaced file is
+simply a different key and its old content ages out.
+
+The budget is per worker process: N workers may hold up to N times
+MODEL_FILE_CACHE_BYTES. The cache is off (0 bytes) by default.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+DEFAULT_MAX_FILE_BYTES = 4 * 1024 * 1024
+
+
+class ByteLRU:
+    """LRU of immutable ``bytes`` values whose total size stays within ``max_bytes``."""
+
+    def __init__(self, max_bytes, max_item_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_bytes if max_item_bytes is None else min(max_item_bytes, max_bytes)
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def accepts(self, size):
+        return 0 < size <= self.max_item_bytes
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        value = bytes(value)
+        if not self.accepts(len(value)):
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'items': len(self._items), 'bytes': self.size, 'max_bytes': self.max_bytes,
+            }
+
+
+_file_cache = None
+_file_cache_lock = threading.Lock()
+
+
+def file_cache():
+    """The process-wide ByteLRU for served files, None when it is disabled."""
+    global _file_cache
+    max_bytes = getattr(settings, 'MODEL_FILE_CACHE_BYTES', 0)
+    max_item_bytes = getattr(settings, 'MODEL_FILE_CACHE_MAX_FILE_BYTES', DEFAULT_MAX_FILE_BYTES)
+    if max_bytes <= 0:
+        return None
+    with _file_cache_lock:
+        # Rebuilt when the settings change (tests, or a reload)
+        if (_file_cache is None or _file_cache.max_bytes != max_bytes
+                or _file_cache.max_item_bytes != min(max_item_bytes, max_bytes)):
+            _file_cache = ByteLRU(max_bytes, max_item_bytes)
+        return _file_cache
+
+
+def read_cached(path, stat):
+    """
+    The content of ``path`` (whose current stat is ``stat``) from the file
+    cache, reading and caching it on a miss. ``(None, None)`` if the cache is
+    disabled or the file is too large for it; otherwise ``(bytes, hit)``.
+    """
+    cache = file_cache()
+    if cache is None or not cache.accepts(stat.st_size):
+        return None, None
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    data = cache.get(key)
+    if data is not None:
+        return data, True
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) == stat.st_size:
+        cache.put(key, data)
+    return data, False
@@ -0,0 +1,134 @@
+"""
+Versioned response caching for the farm and asset endpoints.
+
+Every farm and asset has a version number stored in the Django cache. Cached
+payloads are keyed by ``(farm_id, version)``, so invalidating a farm is a
+single version bump: stale payloads are simply never looked up again and
+expire on their own timeout. Signal handlers in ``core.signals`` bump the
+version of the affected farms/assets whenever an Asset, AssetEvents, Farm or
+Location changes.
+
+Versions are millisecond timestamps of the last change, which makes them
+double as the "last changed" value behind the ETag/Last-Modified validators.
+When a version key is missing it is seeded from the ``updated_at`` column;
+IDs without a row get a throwaway version that is not stored.
+"""
+
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Asset, Farm
+from .reference_cache import reference_generation
+
+
+VERSION_KEY = 'core:{kind}:{ident}:version'
+FARM_ASSETS_KEY = 'core:farm:{farm_id}:assets:v{version}:{variant}'
+
+# Payloads are also given a timeout so that changes which bypass model
+# signals (queryset.update(), raw SQL) cannot be served forever.
+DEFAULT_FARM_ASSETS_TIMEOUT = 60 * 60
+
+
+def _to_version(value):
+    return int(value.timestamp() * 1000)
+
+
+def _new_version(previous=None):
+    """A version can never move backwards, so an evicted and re-created
+    version key cannot collide with an older cached payload."""
+    version = int(time.time() * 1000)
+    if previous is not None and version <= previous:
+        version = previous + 1
+    return version
+
+
+def version_to_datetime(version):
+    return datetime.fromtimestamp(version / 1000, tz=dt_timezone.utc)
+
+
+def _seed_farm(farm_id):
+    return list(Farm.objects.filter(pk=farm_id).values_list('updated_at', flat=True))
+
+
+def _seed_asset(asset_id):
+    return list(Asset.objects.filter(pk=asset_id).values_list('updated_at', flat=True))
+
+
+def _get_version(kind, ident, seed):
+    key = VERSION_KEY.format(kind=kind, ident=ident)
+    version = cache.get(key)
+    if version is None:
+        rows = seed(ident)
+        if not rows:
+            # No such row: the request is a 404, and storing a version for
+            # any ID a client makes up would grow the cache without bound
+            return _new_version()
+        updated_at = rows[0]
+        version = _to_version(updated_at) if updated_at else _new_version()
+        # add() so concurrent first readers agree on a single version
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump_version(kind, idents):
+    for ident in {ident for ident in idents if ident}:
+        key = VERSION_KEY.format(kind=kind, ident=ident)
+        cache.set(key, _new_version(cache.get(key)), timeout=None)
+
+
+def get_farm_version(farm_id):
+    return _get_version('farm', farm_id, _seed_farm)
+
+
+def get_asset_version(asset_id):
+    return _get_version('asset', asset_id, _seed_asset)
+
+
+def bump_farm_version(*farm_ids):
+    """Invalidate the cached payloads and validators of the given farms."""
+    _bump_version('farm', farm_ids)
+
+
+def bump_asset_version(*asset_ids):
+    """Invalidate the validators of the given assets."""
+    _bump_version('asset', asset_ids)
+
+
+def farm_last_modified(farm_id):
+    """Cheap "last changed" value of a farm payload: only a cache read."""
+    return version_to_datetime(get_farm_version(farm_id))
+
+
+def asset_last_modified(asset_id):
+    return version_to_datetime(get_asset_version(asset_id))
+
+
+def farm_assets_timeout():
+    return getattr(settings, 'FARM_ASSETS_CACHE_TIMEOUT', DEFAULT_FARM_ASSETS_TIMEOUT)
+
+
+def get_cached_farm_assets(farm_id, variant='all'):
+    """Return ``(payload, version)``; payload is None on a cache miss.
+
+    ``variant`` identifies the sparse fieldset the payload was built for. The
+    version also covers the reference tables whose names the payload embeds,
+    so an explicit ``ReferenceTable.invalidate()`` (after raw SQL) drops the
+    payloads of every worker too.
+    """
+    version = f'{get_farm_version(farm_id)}.{reference_generation()}'
+    payload = cache.get(
+        FARM_ASSETS_KEY.format(farm_id=farm_id, version=version, variant=variant)
+    )
+    return payload, version
+
+
+def set_cached_farm_assets(farm_id, version, payload, variant='all'):
+    cache.set(
+        FARM_ASSETS_KEY.format(farm_id=farm_id, version=version, variant=variant),
+        payload,
+        timeout=farm_assets_timeout(),
+    )
@@ -0,0 +1,112 @@
+"""
+Event costs as numbers.
+
+``AssetEvents.cost`` is free text from the Flask era ("$1,200.00", "GHS 950",
+"1.200,50", ""). ``parse_cost`` turns it into a Decimal, which a pre_save
+handler (core.signals) stores in ``cost_amount`` so spend can be summed in
+SQL. ``spend_rollup`` groups that spend by farm, company, asset type, event
+type and/or month in a single query.
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncMonth
+
+from .models import AssetEvents
+
+
+COST_QUANTUM = Decimal('0.01')
+# AssetEvents.cost_amount has 14 digits, 2 of them decimals
+MAX_COST = Decimal(10) ** 12
+NUMBER_RE = re.compile(r'\d[\d.,\s\']*')
+
+# group_by name -> values() path of the event; "month" is annotated
+SPEND_GROUPS = {
+    'farm': 'asset__farm_id',
+    'company': 'asset__company_id',
+    'asset_type': 'asset__asset_type__name',
+    'event_type': 'event_type__name',
+    'month': 'month',
+}
+
+
+def _normalize_separators(number):
+    """``number`` with "," / "." / spaces resolved to a plain ``1234.5`` form."""
+    number = re.sub(r"[\s']", '', number).rstrip('.,')
+    if ',' in number and '.' in number:
+        # Whichever comes last is the decimal separator
+        if number.rfind(',') > number.rfind('.'):
+            number = number.replace('.', '').replace(',', '.')
+        else:
+            number = number.replace(',', '')
+    elif ',' in number:
+        # "1,200" and "1,200,000" group thousands; "12,5" is a decimal comma
+        groups = number.split(',')
+        if len(groups) == 2 and len(groups[1]) != 3:
+            number = '.'.join(groups)
+        else:
+            number = ''.join(groups)
+    elif number.count('.') > 1:
+        number = number.replace('.', '')
+    return number
+
+
+def parse_cost(value):
+    """
+    The amount of a free-text cost as a Decimal with two places, None when
+    there is no usable number in it. Currency symbols and codes are ignored; a
+    leading "-" or surrounding parentheses make it negative.
+    """
+    if value is None:
+        return None
+    text = str(value).strip()
+    match = NUMBER_RE.search(text)
+    if match is None:
+        return None
+    try:
+        amount = Decimal(_normalize_separators(match.group()))
+    except InvalidOperation:
+        return None
+    before = text[:match.start()]
+    if '-' in before or (text.startswith('(') and text.endswith(')')):
+        amount = -amount
+    if abs(amount) >= MAX_COST:
+        return None
+    return amount.quantize(COST_QUANTUM)
+
+
+def spend_rollup(group_by, events=None, since=None, until=None):
+    """
+    Total ``cost_amount`` and event count of ``events`` (all events by
+    default) for each combination of the ``group_by`` keys of SPEND_GROUPS,
+    as dicts keyed by those names plus ``total`` (a Decimal with two places)
+    and ``events``. Events
+    without a parsed cost are left out. An event's date -- its month, and
+    what ``since``/``until`` compare -- is its start date, or its creation
+    date if it has none.
+    """
+    if events is None:
+        events = AssetEvents.objects.all()
+    paths = [SPEND_GROUPS[name] for name in group_by]
+    rows = events.filter(cost_amount__isnull=False).alias(
+        event_date=Coalesce('start_date', 'created_at')
+    )
+    if since is not None:
+        rows = rows.filter(event_date__date__gte=since)
+    if until is not None:
+        rows = rows.filter(event_date__date__lte=until)
+    if 'month' in group_by:
+        rows = rows.annotate(month=TruncMonth('event_date'))
+    rows = (
+        rows.values(*paths)
+        .annotate(total=Sum('cost_amount'), events=Count('pk'))
+        .order_by(*paths)
+    )
+    return [
+        # SQLite sums decimals as floats: 1100.5, not 1100.50
+        dict(zip(group_by, (row[path] for path in paths)),
+             total=row['total'].quantize(COST_QUANTUM), events=row['events'])
+        for row in rows
+    ]
@@ -0,0 +1,277 @@
+"""
+Farm scenes composed from the asset type (category) models.
+
+``farm_scene_path`` builds one GLB per farm in which every asset whose type has
+a category model is an instance of that model (EXT_mesh_gpu_instancing): each
+category model's geometry, materials and textures are stored once, whatever
+the number of assets using it. Assets are placed by latitude/longitude in a
+local east-north-up frame around the farm (glTF +X east, +Y up, -Z north) and
+scaled to their ``diameter``/``height``.
+
+Scenes are written to MEDIA_ROOT/farm_scenes under a hash of everything that
+goes into them -- the placed asset rows and the SHA-256 of the models used --
+so a scene is only rebuilt when the farm's assets or the models change, and
+the previous file of the farm at the same level of detail is removed when it
+is.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+from array import array
+
+from django.conf import settings
+
+from .glb import (
+    FLOAT, GLB, append_document, decompose, scene_bounds, world_matrices,
+)
+from .model_registry import registry as model_registry
+
+
+EARTH_RADIUS = 6378137.0
+SCENE_DIRECTORY = 'farm_scenes'
+# Assets sharing a coordinate are laid out on a grid this many footprints apart
+COLOCATED_SPACING = 1.5
+# Footprint (metres) assumed for the grid when a model has no extent
+MIN_FOOTPRINT = 1.0
+# Rotations with a larger X/Z quaternion component are not upright
+UPRIGHT_TOLERANCE = 1e-6
+
+ASSET_FIELDS = ('asset_id', 'asset_type__name', 'latitude', 'longitude', 'diameter', 'height')
+
+
+def category_model_name(asset_type_name):
+    """'Fixed Roof Tank' -> 'FixedRoofTank', the name of its category model."""
+    words = re.split(r'[^0-9A-Za-z]+', asset_type_name or '')
+    return ''.join(word[:1].upper() + word[1:] for word in words)
+
+
+def local_position(latitude, longitude, origin):
+    """``(east, north)`` in metres of a coordinate relative to ``origin``."""
+    origin_latitude, origin_longitude = origin
+    east = (math.radians(longitude - origin_longitude)
+            * EARTH_RADIUS * math.cos(math.radians(origin_latitude)))
+    north = math.radians(latitude - origin_latitude) * EARTH_RADIUS
+    return east, north
+
+
+def scene_directory():
+    return os.path.join(settings.MEDIA_ROOT, SCENE_DIRECTORY)
+
+
+def _scene_models(lod=None):
+    """``{name: ModelFile}`` of the category models, at ``lod`` where built."""
+    return {
+        model.name: model.lods.get(lod, model)
+        for model in model_registry.models() if model.kind == 'category'
+    }
+
+
+def models_digest(lod=None):
+    """Short hash of the category models a scene at ``lod`` would use."""
+    sha = hashlib.sha256()
+    for name, model in sorted(_scene_models(lod).items()):
+        sha.update(f'{name}:{model.sha256}\n'.encode())
+    return sha.hexdigest()[:16]
+
+
+class CategoryModel:
+    """A category model prepared for instancing."""
+
+    def __init__(self, glb):
+        self.glb = glb
+        gltf = glb.gltf
+        nodes = gltf.get('nodes', [])
+        # (mesh, name, translation, rotation, scale) of every node drawing a mesh
+        self.parts = []
+        for index, matrix in sorted(world_matrices(gltf).items()):
+            node = nodes[index]
+            if 'mesh' not in node or 'skin' in node:
+                continue
+            translation, rotation, scale = decompose(matrix)
+            self.parts.append((node['mesh'], node.get('name'), translation, rotation, scale))
+        # Only parts rotated about the vertical axis can take a different
+        # horizontal and vertical scale without being sheared
+        self.upright = all(
+            abs(rotation[0]) < UPRIGHT_TOLERANCE and abs(rotation[2]) < UPRIGHT_TOLERANCE
+            for _, _, _, rotation, _ in self.parts
+        )
+
+        lo, hi = scene_bounds(gltf)
+        if lo[0] > hi[0]:
+            lo = hi = [0.0, 0.0, 0.0]
+        # Instances stand on the centre of the model's footprint
+        self.base = [(lo[0] + hi[0]) / 2, lo[1], (lo[2] + hi[2]) / 2]
+        self.diameter = max(hi[0] - lo[0], hi[2] - lo[2])
+        self.height = hi[1] - lo[1]
+
+    def instance_scale(self, diameter, height):
+        """``(horizontal, vertical)`` scale of an asset of the given size."""
+        by_diameter = diameter / self.diameter if diameter and self.diameter > 0 else None
+        by_height = height / self.height if height and self.height > 0 else None
+        if by_diameter is None and by_height is None:
+            return 1.0, 1.0
+        if by_diameter is None:
+            return by_height, by_height
+        if by_height is None:
+            return by_diameter, by_diameter
+        if self.upright:
+            return by_diameter, by_height
+        uniform = math.sqrt(by_diameter * by_height)
+        return uniform, uniform
+
+
+def _origin(farm, assets):
+    location = farm.location
+    if location and location.latitude is not None and location.longitude is not None:
+        return location.latitude, location.longitude
+    placed = [a for a in assets if a['latitude'] is not None and a['longitude'] is not None]
+    if not placed:
+        return 0.0, 0.0
+    return (sum(a['latitude'] for a in placed) / len(placed),
+            sum(a['longitude'] for a in placed) / len(placed))
+
+
+def _spread(positions, footprints):
+    """
+    Lay out assets that share a position (the farm's own coordinate, or none
+    at all) on a square grid centred on it, in asset ID order, so they are not
+    drawn inside each other. ``positions`` is ``{asset_id: [east, north]}``.
+    """
+    groups = {}
+    for asset_id, (east, north) in positions.items():
+        groups.setdefault((round(east, 2), round(north, 2)), []).append(asset_id)
+    for asset_ids in groups.values():
+        if len(asset_ids) < 2:
+            continue
+        asset_ids.sort()
+        columns = math.ceil(math.sqrt(len(asset_ids)))
+        rows = math.ceil(len(asset_ids) / columns)
+        spacing = COLOCATED_SPACING * max(
+            max(footprints[asset_id] for asset_id in asset_ids), MIN_FOOTPRINT
+        )
+        for i, asset_id in enumerate(asset_ids):
+            row, column = divmod(i, columns)
+            positions[asset_id][0] += (column - (columns - 1) / 2) * spacing
+            positions[asset_id][1] -= (row - (rows - 1) / 2) * spacing
+
+
+def build_farm_scene(farm, assets, models):
+    """
+    Compose the scene of ``farm`` from ``assets`` (dicts with ASSET_FIELDS)
+    and ``models`` (``{category model name: ModelFile}``). Returns the GLB, or
+    None if no asset has a model.
+    """
+    by_model = {}
+    for asset in sorted(assets, key=lambda a: a['asset_id']):
+        name = category_model_name(asset['asset_type__name'])
+        if name in models:
+            by_model.setdefault(name, []).append(asset)
+    if not by_model:
+        return None
+
+    categories = {name: CategoryModel(GLB.load(models[name].path)) for name in sorted(by_model)}
+    origin = _origin(farm, assets)
+    positions = {}
+    scales = {}
+    footprints = {}
+    for name, members in by_model.items():
+        category = categories[name]
+        for asset in members:
+            if asset['latitude'] is not None and asset['longitude'] is not None:
+                position = local_position(asset['latitude'], asset['longitude'], origin)
+            else:
+                position = (0.0, 0.0)
+            positions[asset['asset_id']] = list(position)
+            scales[asset['asset_id']] = category.instance_scale(asset['diameter'], asset['height'])
+            footprints[asset['asset_id']] = category.diameter * scales[asset['asset_id']][0]
+    _spread(positions, footprints)
+
+    scene = GLB({
+        'asset': {'version': '2.0', 'generator': 'server-tank-asset farm scene'},
+        'scene': 0,
+        'scenes': [{'name': farm.name, 'nodes': [0]}],
+        'nodes': [{'name': farm.name, 'children': [], 'extras': {
+            'farm_id': farm.farm_id, 'origin': {'latitude': origin[0], 'longitude': origin[1]},
+        }}],
+    }, [])
+    scene.use_extension('EXT_mesh_gpu_instancing', required=True)
+    nodes = scene.gltf['nodes']
+
+    for name, members in by_model.items():
+        category = categories[name]
+        offsets = append_document(scene, category.glb)
+        group = {'name': name, 'children': [], 'extras': {
+            'asset_ids': [asset['asset_id'] for asset in members],
+        }}
+        nodes[0]['children'].append(len(nodes))
+        nodes.append(group)
+
+        for mesh, part_name, translation, rotation, scale in category.parts:
+            translations = array('f')
+            rotations = array('f')
+            scale_values = array('f')
+            for asset in members:
+                east, north = positions[asset['asset_id']]
+                horizontal, vertical = scales[asset['asset_id']]
+                translations.extend((
+                    east + horizontal * (translation[0] - category.base[0]),
+                    vertical * (translation[1] - category.base[1]),
+                    -north + horizontal * (translation[2] - category.base[2]),
+                ))
+                rotations.extend(rotation)
+                scale_values.extend((horizontal * scale[0], vertical * scale[1], horizontal * scale[2]))
+            attributes = {
+                'TRANSLATION': scene.add_accessor(translations, FLOAT, 'VEC3', target=None),
+                'ROTATION': scene.add_accessor(rotations, FLOAT, 'VEC4', target=None),
+                'SCALE': scene.add_accessor(scale_values, FLOAT, 'VEC3', target=None),
+            }
+            group['children'].append(len(nodes))
+            node = {'mesh': offsets['meshes'] + mesh, 'extensions': {
+                'EXT_mesh_gpu_instancing': {'attributes': attributes},
+            }}
+            if part_name:
+                node['name'] = part_name
+            nodes.append(node)
+    return scene
+
+
+def farm_scene_path(farm, lod=None):
+    """
+    Path of the up-to-date scene of ``farm`` with the category models at
+    ``lod`` (where built), composing it if needed. None if no asset has a model.
+    """
+    models = _scene_models(lod)
+    assets = list(farm.assets.order_by('asset_id').values(*ASSET_FIELDS))
+    key = json.dumps({
+        'farm': [farm.name, farm.location.latitude, farm.location.longitude]
+        if farm.location else [farm.name],
+        'assets': [[asset[field] for field in ASSET_FIELDS] for asset in assets],
+        'models': {name: model.sha256 for name, model in sorted(models.items())},
+    }, sort_keys=True, default=str)
+    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+
+    directory = scene_directory()
+    prefix = f'{farm.farm_id}.{lod or "original"}.'
+    path = os.path.join(directory, f'{prefix}{digest}.glb')
+    if os.path.exists(path):
+        return path
+
+    scene = build_farm_scene(farm, assets, models)
+    if scene is None:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    scene.save(tmp)
+    os.replace(tmp, path)
+
+    for filename in os.listdir(directory):
+        if (filename.startswith(prefix) and filename.endswith('.glb')
+                and filename != os.path.basename(path)):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+    return path
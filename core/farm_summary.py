@@ -0,0 +1,132 @@
+"""
+Materialized per-farm dashboard figures.
+
+``FarmSummary`` holds, for every farm, its asset counts by status and type,
+health average and minimum, capacity and volume totals and the number of
+open events, so /api/farms/summary reads one row per farm instead of
+aggregating every asset and event. core.signals passes the farms an Asset
+or AssetEvents change touches to ``schedule_farm_summaries``, which
+recomputes each of them once when the transaction commits -- an import or a
+cascading delete of N rows costs two grouped queries (through the farm
+indexes) and one upsert, not N of them. Farms deleted by then are skipped.
+``manage.py rebuild_farm_summaries`` recomputes them all, e.g. after bulk
+imports or raw SQL, which bypass the signals, or after an asset type is
+renamed.
+"""
+
+import threading
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import Lower
+
+from .models import Asset, AssetEvents, Farm, FarmSummary
+
+
+CLOSED_EVENT_STATUSES = ('completed',)
+UNTYPED = 'Untyped'
+SUMMARY_FIELDS = (
+    'asset_count', 'assets_by_status', 'assets_by_type', 'health_avg', 'health_min',
+    'total_capacity', 'total_current_volume', 'open_event_count', 'updated_at',
+)
+
+# Farms waiting for the current transaction to commit, per thread
+_pending = threading.local()
+
+
+def compute_farm_summaries(farm_ids=None):
+    """Unsaved FarmSummary rows of ``farm_ids`` (of every farm when None)."""
+    farms = Farm.objects.all()
+    assets = Asset.objects.filter(farm__isnull=False)
+    events = AssetEvents.objects.filter(asset__farm__isnull=False)
+    if farm_ids is not None:
+        farms = farms.filter(pk__in=farm_ids)
+        assets = assets.filter(farm_id__in=farm_ids)
+        events = events.filter(asset__farm_id__in=farm_ids)
+
+    summaries = {farm_id: FarmSummary(farm_id=farm_id) for farm_id in farms.values_list('pk', flat=True)}
+    statuses = {farm_id: Counter() for farm_id in summaries}
+    types = {farm_id: Counter() for farm_id in summaries}
+    health = {farm_id: [0, 0] for farm_id in summaries}
+
+    rows = assets.values(
+        'farm_id', status_key=Lower('status'), type_name=F('asset_type__name'),
+    ).annotate(
+        count=Count('pk'), health_sum=Sum('health'), health_count=Count('health'),
+        health_min=Min('health'), capacity=Sum('capacity'), current_volume=Sum('current_volume'),
+    ).order_by()
+    for row in rows:
+        summary = summaries.get(row['farm_id'])
+        if summary is None:
+            continue
+        summary.asset_count += row['count']
+        statuses[row['farm_id']][row['status_key']] += row['count']
+        types[row['farm_id']][row['type_name'] or UNTYPED] += row['count']
+        if row['health_count']:
+            health[row['farm_id']][0] += row['health_sum']
+            health[row['farm_id']][1] += row['health_count']
+            if summary.health_min is None or row['health_min'] < summary.health_min:
+                summary.health_min = row['health_min']
+        summary.total_capacity += row['capacity'] or 0
+        summary.total_current_volume += row['current_volume'] or 0
+
+    open_events = events.alias(status_key=Lower('event_status')).exclude(
+        status_key__in=CLOSED_EVENT_STATUSES
+    ).values('asset__farm_id').annotate(count=Count('pk')).order_by()
+    for row in open_events:
+        if row['asset__farm_id'] in summaries:
+            summaries[row['asset__farm_id']].open_event_count = row['count']
+
+    for farm_id, summary in summaries.items():
+        summary.assets_by_status = dict(sorted(statuses[farm_id].items()))
+        summary.assets_by_type = dict(sorted(types[farm_id].items()))
+        total, count = health[farm_id]
+        summary.health_avg = round(total / count, 2) if count else None
+    return list(summaries.values())
+
+
+def save_farm_summaries(summaries):
+    FarmSummary.objects.bulk_create(
+        summaries, batch_size=500, update_conflicts=True,
+        unique_fields=['farm'], update_fields=SUMMARY_FIELDS,
+    )
+
+
+def refresh_farm_summaries(*farm_ids):
+    """Recompute and store the summaries of the given farms that still exist."""
+    farm_ids = {farm_id for farm_id in farm_ids if farm_id}
+    if farm_ids:
+        save_farm_summaries(compute_farm_summaries(farm_ids))
+
+
+def _refresh_pending():
+    farm_ids = getattr(_pending, 'farm_ids', None)
+    _pending.farm_ids = set()
+    if farm_ids:
+        refresh_farm_summaries(*farm_ids)
+
+
+def schedule_farm_summaries(*farm_ids):
+    """
+    Refresh the summaries of the given farms when the current transaction
+    commits (at once outside of one), each farm once however often it is
+    scheduled. Every call registers a callback, so the farms are still
+    refreshed if a savepoint that registered an earlier one is rolled back;
+    the first callback to run refreshes all of them and the others find
+    nothing left.
+    """
+    farm_ids = {farm_id for farm_id in farm_ids if farm_id}
+    if not farm_ids:
+        return
+    if getattr(_pending, 'farm_ids', None) is None:
+        _pending.farm_ids = set()
+    _pending.farm_ids.update(farm_ids)
+    transaction.on_commit(_refresh_pending)
+
+
+def rebuild_farm_summaries():
+    """Recompute the summary of every farm; returns how many were written."""
+    summaries = compute_farm_summaries()
+    save_farm_summaries(summaries)
+    return len(summaries)
@@ -0,0 +1,99 @@
+"""
+In-memory index of the farm layout PDFs.
+
+Views used to ``os.path.exists`` the layout of every farm they serialized,
+which is a visible share of latency on network file systems. ``FileIndex``
+keeps the directory listing (with each file's stat) in memory and, at most
+every FILE_INDEX_REFRESH_SECONDS, stats the directory itself: the listing is
+only re-read when the directory's mtime moved, i.e. when a file was added,
+removed or replaced. A new upload therefore shows up within seconds, and a
+request costs no file system access at all.
+
+Files rewritten in place (which does not touch the directory) are picked up
+on the next listing change; uploads and deploys replace files instead.
+The 3D models have their own index with content hashes, core.model_registry.
+"""
+
+import os
+import threading
+import time
+
+from django.conf import settings
+
+
+FARM_LAYOUTS_DIR = os.path.join(settings.BASE_DIR, 'static', 'uploads', 'farm_layouts')
+# Served by the farm_layout view, with Range support
+FARM_LAYOUT_URL = '/api/farm/{farm_id}/layout'
+
+DEFAULT_REFRESH_SECONDS = 2
+# A directory changed this recently may change again within the same mtime
+# tick (coarse on some network file systems), so it is re-listed next time
+MTIME_SETTLE_NS = 2 * 10**9
+
+
+class FileIndex:
+    """The files ending in ``suffix`` in ``directory``, keyed by name without it."""
+
+    def __init__(self, directory, suffix, refresh_interval=None):
+        self.directory = directory
+        self.suffix = suffix
+        self.refresh_interval = refresh_interval
+        self._files = {}
+        self._directory_mtime = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _interval(self):
+        if self.refresh_interval is not None:
+            return self.refresh_interval
+        return getattr(settings, 'FILE_INDEX_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS)
+
+    def _scan(self):
+        files = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(self.suffix) and entry.is_file():
+                        files[entry.name[:-len(self.suffix)]] = entry.stat()
+        except FileNotFoundError:
+            pass
+        self._files = files
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if (not force and self._checked_at is not None
+                    and now - self._checked_at < self._interval()):
+                return
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.directory).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if force or mtime is None or mtime != self._directory_mtime:
+                self._scan()
+                settled = mtime is not None and time.time_ns() - mtime > MTIME_SETTLE_NS
+                self._directory_mtime = mtime if settled else None
+
+    def stat(self, name):
+        """The indexed ``os.stat_result`` of ``name``, None if there is no such file."""
+        self.refresh()
+        return self._files.get(name)
+
+    def path(self, name):
+        return os.path.join(self.directory, name + self.suffix) if self.stat(name) else None
+
+    def __contains__(self, name):
+        return self.stat(name) is not None
+
+    def names(self):
+        self.refresh()
+        return sorted(self._files)
+
+
+layout_index = FileIndex(FARM_LAYOUTS_DIR, '.pdf')
+
+
+def farm_layout_url(farm_id):
+    """URL of the farm's layout PDF, None if it has none."""
+    return FARM_LAYOUT_URL.format(farm_id=farm_id) if farm_id in layout_index else None
@@ -0,0 +1,230 @@
+"""
+File responses for the model endpoints: byte ranges and front-server offload.
+
+``serve_file`` answers ``Range`` requests with ``206 Partial Content`` so
+viewers can resume interrupted downloads, and picks a pre-compressed sibling
+(written by ``manage.py compress_models``) from ``Accept-Encoding``. With
+``settings.FILE_OFFLOAD`` set,
+the worker only emits an ``X-Accel-Redirect`` (nginx) or ``X-Sendfile``
+(Apache/lighttpd) header and the front web server ships the bytes -- and
+handles ranges -- itself, which frees the worker immediately. Otherwise small
+files can be answered from memory by the per-process LRU in core.byte_cache.
+"""
+
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+from .byte_cache import read_cached
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+# Pre-compressed sibling suffix per content-coding, in order of preference
+ENCODING_SUFFIXES = {
+    'br': '.br',
+    'gzip': '.gz',
+}
+
+
+def file_etag(stat):
+    return f'{stat.st_mtime_ns:x}-{stat.st_size:x}'
+
+
+def file_last_modified(stat):
+    return datetime.fromtimestamp(stat.st_mtime, tz=dt_timezone.utc)
+
+
+def _accepted_encodings(header):
+    """``{coding: q}`` from an Accept-Encoding header."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def negotiate_encoding(request, available):
+    """
+    The content-coding from ``available`` the client accepts with the highest
+    q-value (ties go to ENCODING_SUFFIXES order), or None for identity.
+    """
+    if not available:
+        return None
+    accepted = _accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    best, best_q = None, 0.0
+    for encoding in ENCODING_SUFFIXES:
+        if encoding not in available:
+            continue
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def encoded_etag(etag, encoding):
+    """Each encoded representation needs its own strong ETag."""
+    return f'{etag}-{encoding}' if encoding else etag
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single-range ``Range`` header,
+    ``None`` when the header should be ignored (absent, malformed or several
+    ranges, which we answer with the full file as RFC 9110 allows), or
+    ``False`` when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        return False
+    if start > end:
+        return None
+    return start, end
+
+
+def _if_range_matches(request, etag, last_modified):
+    """A Range is only honoured when If-Range (if sent) still matches."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        # Strong comparison only: weak validators never match If-Range
+        return etag is not None and if_range == quote_etag(etag)
+    parsed = parse_http_date_safe(if_range)
+    return parsed is not None and last_modified is not None \
+        and parsed == int(last_modified.timestamp())
+
+
+def _read_range(f, start, length):
+    with f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(BLOCK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def _offload_response(path, content_type):
+    mode = getattr(settings, 'FILE_OFFLOAD', '')
+    if mode == 'nginx':
+        prefix = getattr(settings, 'FILE_OFFLOAD_PREFIX', '/protected/')
+        relative = os.path.relpath(path, settings.BASE_DIR).replace(os.sep, '/')
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative
+        return response
+    if mode == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = os.fspath(path)
+        return response
+    return None
+
+
+def serve_file(request, path, content_type, filename, stat=None, etag=None,
+               cache_control=None, encodings=None):
+    """
+    Serve ``path`` inline, honouring Range/If-Range or offloading it.
+
+    ``etag`` defaults to one derived from mtime and size; pass a content hash
+    to make it stable across deploys. ``encodings`` maps content-codings to
+    ``(path, stat)`` of pre-compressed copies of the file; ranges then apply
+    to the encoded bytes. Raises Http404 if the file is gone, e.g. replaced
+    by a newer build between looking it up and serving it.
+    """
+    try:
+        return _serve_file(request, path, content_type, filename, stat, etag,
+                           cache_control, encodings)
+    except FileNotFoundError:
+        raise Http404('File not found')
+
+
+def _serve_file(request, path, content_type, filename, stat, etag, cache_control, encodings):
+    stat = stat or os.stat(path)
+    etag = etag or file_etag(stat)
+    # Last-Modified and If-Range dates refer to the source file
+    last_modified = file_last_modified(stat)
+    mtime = stat.st_mtime
+
+    encoding = negotiate_encoding(request, encodings)
+    if encoding:
+        path, stat = encodings[encoding]
+        etag = encoded_etag(etag, encoding)
+    size = stat.st_size
+
+    response = _offload_response(path, content_type)
+    cached = None
+    if response is None:
+        data, cached = read_cached(path, stat)
+        byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+        if byte_range is not None and not _if_range_matches(request, etag, last_modified):
+            byte_range = None
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            if encodings:
+                patch_vary_headers(response, ['Accept-Encoding'])
+            return response
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            if data is not None:
+                response = HttpResponse(
+                    memoryview(data)[start:end + 1], status=206, content_type=content_type
+                )
+            else:
+                # Opened here, so a file removed later is still read in full
+                response = StreamingHttpResponse(
+                    _read_range(open(path, 'rb'), start, length), status=206,
+                    content_type=content_type
+                )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(length)
+        elif data is not None:
+            response = HttpResponse(data, content_type=content_type)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = f'inline; filename="{filename}"'
+    response['Last-Modified'] = http_date(mtime)
+    response['ETag'] = quote_etag(etag)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if encodings:
+        patch_vary_headers(response, ['Accept-Encoding'])
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    if cached is not None:
+        response['X-File-Cache'] = 'hit' if cached else 'miss'
+    return response
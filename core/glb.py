@@ -0,0 +1,879 @@
+"""
+Binary glTF 2.0 (GLB) reader/writer and the mesh optimizations behind
+``manage.py optimize_models``.
+
+Pure Python (struct + array), so it runs anywhere the API does:
+
+- ``dedupe`` merges byte-identical bufferViews and identical accessors;
+- ``simplify`` decimates meshes by vertex clustering for reduced levels of
+  detail;
+- ``quantize`` applies KHR_mesh_quantization: 16-bit positions whose
+  dequantization is folded into a node transform, and 8-bit normals.
+
+``read_metadata`` summarizes a file from its header, JSON chunk and image
+headers without loading the geometry.
+
+Only what the uploaded models use is supported: a single embedded buffer,
+no sparse accessors and no Draco/meshopt compression (``GLBError``).
+"""
+
+import copy
+import json
+import math
+import struct
+import sys
+from array import array
+
+GLB_MAGIC = b'glTF'
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+BYTE = 5120
+UNSIGNED_BYTE = 5121
+SHORT = 5122
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+FLOAT = 5126
+
+TYPECODES = {
+    BYTE: 'b',
+    UNSIGNED_BYTE: 'B',
+    SHORT: 'h',
+    UNSIGNED_SHORT: 'H',
+    UNSIGNED_INT: 'I',
+    FLOAT: 'f',
+}
+COMPONENTS = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+TRIANGLES = 4
+
+# Extensions whose data we can neither decode nor remap
+UNSUPPORTED_EXTENSIONS = {'KHR_draco_mesh_compression', 'EXT_meshopt_compression'}
+
+# Grid cells along the longest side of the model for each level of detail;
+# None keeps every vertex
+LOD_RESOLUTIONS = {
+    'high': None,
+    'medium': 512,
+    'low': 128,
+}
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# JPEG start-of-frame markers (0xC4, 0xC8 and 0xCC are not frames)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Bytes of an embedded image read to find its dimensions
+IMAGE_HEADER_BYTES = 64 * 1024
+
+IDENTITY = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
+
+class GLBError(ValueError):
+    pass
+
+
+class GLB:
+    """A glTF document plus the bytes of each of its bufferViews."""
+
+    def __init__(self, gltf, views):
+        self.gltf = gltf
+        self.views = views
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = memoryview(data)
+        if len(data) < 20:
+            raise GLBError('file is too short to be a GLB')
+        magic, version, length = struct.unpack_from('<4sII', data, 0)
+        if magic != GLB_MAGIC or version != 2:
+            raise GLBError('not a glTF 2.0 binary file')
+
+        gltf, binary = None, b''
+        offset = 12
+        while offset + 8 <= min(length, len(data)):
+            chunk_length, chunk_type = struct.unpack_from('<II', data, offset)
+            chunk = data[offset + 8:offset + 8 + chunk_length]
+            if chunk_type == CHUNK_JSON:
+                gltf = json.loads(bytes(chunk))
+            elif chunk_type == CHUNK_BIN:
+                binary = chunk
+            offset += 8 + chunk_length
+        if gltf is None:
+            raise GLBError('GLB has no JSON chunk')
+
+        unsupported = UNSUPPORTED_EXTENSIONS.intersection(gltf.get('extensionsUsed', []))
+        if unsupported:
+            raise GLBError(f'unsupported extensions: {", ".join(sorted(unsupported))}')
+        buffers = gltf.get('buffers', [])
+        if len(buffers) > 1 or any('uri' in buffer for buffer in buffers):
+            raise GLBError('only a single embedded buffer is supported')
+
+        views = []
+        for view in gltf.get('bufferViews', []):
+            start = view.get('byteOffset', 0)
+            views.append(bytes(binary[start:start + view['byteLength']]))
+        return cls(gltf, views)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def to_bytes(self):
+        gltf = dict(self.gltf)
+        binary = bytearray()
+        views = []
+        for view, data in zip(gltf.get('bufferViews', []), self.views):
+            binary.extend(b'\0' * (-len(binary) % 4))
+            views.append(dict(view, buffer=0, byteOffset=len(binary), byteLength=len(data)))
+            binary.extend(data)
+        binary.extend(b'\0' * (-len(binary) % 4))
+        gltf.pop('bufferViews', None)
+        gltf.pop('buffers', None)
+        if views:
+            gltf['bufferViews'] = views
+            gltf['buffers'] = [{'byteLength': len(binary)}]
+
+        document = json.dumps(gltf, separators=(',', ':')).encode()
+        document += b' ' * (-len(document) % 4)
+        length = 12 + 8 + len(document) + (8 + len(binary) if binary else 0)
+        out = bytearray(struct.pack('<4sII', GLB_MAGIC, 2, length))
+        out += struct.pack('<II', len(document), CHUNK_JSON) + document
+        if binary:
+            out += struct.pack('<II', len(binary), CHUNK_BIN) + binary
+        return bytes(out)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    def read_accessor(self, index):
+        """``(values, components)``: the accessor's values as one flat array."""
+        accessor = self.gltf['accessors'][index]
+        if 'sparse' in accessor:
+            raise GLBError('sparse accessors are not supported')
+        typecode = TYPECODES[accessor['componentType']]
+        components = COMPONENTS[accessor['type']]
+        count = accessor['count']
+        element_size = array(typecode).itemsize * components
+        if 'bufferView' not in accessor:
+            return array(typecode, bytes(count * element_size)), components
+
+        data = self.views[accessor['bufferView']]
+        offset = accessor.get('byteOffset', 0)
+        stride = self.gltf['bufferViews'][accessor['bufferView']].get('byteStride') or element_size
+        if stride == element_size:
+            values = array(typecode, data[offset:offset + count * element_size])
+        else:
+            values = array(typecode)
+            for start in range(offset, offset + count * stride, stride):
+                values.frombytes(data[start:start + element_size])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values, components
+
+    def add_accessor(self, values, component_type, type, normalized=False,
+                     target=ARRAY_BUFFER, stride=None, bounds=False):
+        """
+        Append ``values`` (a flat sequence) in a bufferView of its own and
+        return the new accessor index. ``stride`` pads each element, as vertex
+        attributes must start on 4-byte boundaries.
+        """
+        typecode = TYPECODES[component_type]
+        components = COMPONENTS[type]
+        count = len(values) // components
+        itemsize = array(typecode).itemsize
+        packed = array(typecode, values)
+        if stride and stride != itemsize * components:
+            padded = stride // itemsize
+            out = array(typecode, bytes(count * stride))
+            for c in range(components):
+                out[c::padded] = packed[c::components]
+            packed = out
+        if sys.byteorder == 'big':
+            packed.byteswap()
+
+        view = {'buffer': 0, 'byteLength': len(packed) * itemsize}
+        if stride:
+            view['byteStride'] = stride
+        if target:
+            view['target'] = target
+        self.gltf.setdefault('bufferViews', []).append(view)
+        self.views.append(packed.tobytes())
+
+        accessor = {
+            'bufferView': len(self.views) - 1,
+            'componentType': component_type,
+            'count': count,
+            'type': type,
+        }
+        if normalized:
+            accessor['normalized'] = True
+        if bounds and count:
+            accessor['min'] = [min(values[c::components]) for c in range(components)]
+            accessor['max'] = [max(values[c::components]) for c in range(components)]
+        accessors = self.gltf.setdefault('accessors', [])
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    def use_extension(self, name, required=False):
+        keys = ['extensionsUsed', 'extensionsRequired'] if required else ['extensionsUsed']
+        for key in keys:
+            extensions = self.gltf.setdefault(key, [])
+            if name not in extensions:
+                extensions.append(name)
+
+
+# Reference walking -------------------------------------------------------------
+
+def _accessor_refs(gltf):
+    """``(holder, key)`` for every place the document stores an accessor index."""
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh['primitives']:
+            attributes = primitive['attributes']
+            yield from ((attributes, name) for name in attributes)
+            if 'indices' in primitive:
+                yield primitive, 'indices'
+            for target in primitive.get('targets', []):
+                yield from ((target, name) for name in target)
+    for skin in gltf.get('skins', []):
+        if 'inverseBindMatrices' in skin:
+            yield skin, 'inverseBindMatrices'
+    for animation in gltf.get('animations', []):
+        for sampler in animation['samplers']:
+            yield sampler, 'input'
+            yield sampler, 'output'
+    for node in gltf.get('nodes', []):
+        instancing = node.get('extensions', {}).get('EXT_mesh_gpu_instancing')
+        if instancing:
+            attributes = instancing['attributes']
+            yield from ((attributes, name) for name in attributes)
+
+
+def _view_refs(gltf):
+    """``(holder, key)`` for every place the document stores a bufferView index."""
+    for accessor in gltf.get('accessors', []):
+        if 'bufferView' in accessor:
+            yield accessor, 'bufferView'
+        sparse = accessor.get('sparse')
+        if sparse:
+            yield sparse['indices'], 'bufferView'
+            yield sparse['values'], 'bufferView'
+    for image in gltf.get('images', []):
+        if 'bufferView' in image:
+            yield image, 'bufferView'
+
+
+def _remap(refs, mapping):
+    for holder, key in refs:
+        holder[key] = mapping[holder[key]]
+
+
+def compact(glb):
+    """Drop accessors and bufferViews nothing refers to any more."""
+    gltf = glb.gltf
+    used = sorted({holder[key] for holder, key in _accessor_refs(gltf)})
+    _remap(_accessor_refs(gltf), {old: new for new, old in enumerate(used)})
+    gltf['accessors'] = [gltf['accessors'][i] for i in used]
+
+    used = sorted({holder[key] for holder, key in _view_refs(gltf)})
+    _remap(_view_refs(gltf), {old: new for new, old in enumerate(used)})
+    gltf['bufferViews'] = [gltf['bufferViews'][i] for i in used]
+    glb.views = [glb.views[i] for i in used]
+
+    for key in ('accessors', 'bufferViews'):
+        if not gltf[key]:
+            del gltf[key]
+
+
+def dedupe(glb):
+    """Point duplicate bufferViews and accessors at a single copy."""
+    gltf = glb.gltf
+    seen = {}
+    mapping = {}
+    for i, (view, data) in enumerate(zip(gltf.get('bufferViews', []), glb.views)):
+        mapping[i] = seen.setdefault((data, view.get('byteStride'), view.get('target')), i)
+    _remap(_view_refs(gltf), mapping)
+
+    seen = {}
+    mapping = {}
+    for i, accessor in enumerate(gltf.get('accessors', [])):
+        key = json.dumps({k: v for k, v in accessor.items() if k != 'name'}, sort_keys=True)
+        mapping[i] = seen.setdefault(key, i)
+    _remap(_accessor_refs(gltf), mapping)
+    compact(glb)
+
+
+# Scene graph -------------------------------------------------------------------
+
+def trs_matrix(translation=(0, 0, 0), rotation=(0, 0, 0, 1), scale=(1, 1, 1)):
+    """Column-major 4x4 matrix for a glTF translation/rotation/scale."""
+    x, y, z, w = rotation
+    sx, sy, sz = scale
+    tx, ty, tz = translation
+    return (
+        (1 - 2 * (y * y + z * z)) * sx, 2 * (x * y + z * w) * sx, 2 * (x * z - y * w) * sx, 0.0,
+        2 * (x * y - z * w) * sy, (1 - 2 * (x * x + z * z)) * sy, 2 * (y * z + x * w) * sy, 0.0,
+        2 * (x * z + y * w) * sz, 2 * (y * z - x * w) * sz, (1 - 2 * (x * x + y * y)) * sz, 0.0,
+        tx, ty, tz, 1.0,
+    )
+
+
+def node_matrix(node):
+    if 'matrix' in node:
+        return tuple(node['matrix'])
+    return trs_matrix(
+        node.get('translation', (0, 0, 0)), node.get('rotation', (0, 0, 0, 1)),
+        node.get('scale', (1, 1, 1)),
+    )
+
+
+def multiply(a, b):
+    return tuple(
+        sum(a[k * 4 + row] * b[col * 4 + k] for k in range(4))
+        for col in range(4) for row in range(4)
+    )
+
+
+def transform_point(m, point):
+    x, y, z = point
+    return (
+        m[0] * x + m[4] * y + m[8] * z + m[12],
+        m[1] * x + m[5] * y + m[9] * z + m[13],
+        m[2] * x + m[6] * y + m[10] * z + m[14],
+    )
+
+
+def decompose(m):
+    """``(translation, rotation quaternion, scale)`` of a matrix without shear."""
+    translation = [m[12], m[13], m[14]]
+    scale = [math.sqrt(m[c] ** 2 + m[c + 1] ** 2 + m[c + 2] ** 2) for c in (0, 4, 8)]
+    determinant = (
+        m[0] * (m[5] * m[10] - m[9] * m[6])
+        - m[4] * (m[1] * m[10] - m[9] * m[2])
+        + m[8] * (m[1] * m[6] - m[5] * m[2])
+    )
+    if determinant < 0:
+        scale[0] = -scale[0]
+    # r[row][col] of the rotation part
+    r = [[m[col * 4 + row] / scale[col] if scale[col] else 0.0 for col in range(3)]
+         for row in range(3)]
+    trace = r[0][0] + r[1][1] + r[2][2]
+    if trace > 0:
+        k = 0.5 / math.sqrt(trace + 1.0)
+        rotation = [(r[2][1] - r[1][2]) * k, (r[0][2] - r[2][0]) * k,
+                    (r[1][0] - r[0][1]) * k, 0.25 / k]
+    elif r[0][0] > r[1][1] and r[0][0] > r[2][2]:
+        k = 2.0 * math.sqrt(1.0 + r[0][0] - r[1][1] - r[2][2])
+        rotation = [0.25 * k, (r[0][1] + r[1][0]) / k,
+                    (r[0][2] + r[2][0]) / k, (r[2][1] - r[1][2]) / k]
+    elif r[1][1] > r[2][2]:
+        k = 2.0 * math.sqrt(1.0 + r[1][1] - r[0][0] - r[2][2])
+        rotation = [(r[0][1] + r[1][0]) / k, 0.25 * k,
+                    (r[1][2] + r[2][1]) / k, (r[0][2] - r[2][0]) / k]
+    else:
+        k = 2.0 * math.sqrt(1.0 + r[2][2] - r[0][0] - r[1][1])
+        rotation = [(r[0][2] + r[2][0]) / k, (r[1][2] + r[2][1]) / k,
+                    0.25 * k, (r[1][0] - r[0][1]) / k]
+    return translation, rotation, scale
+
+
+def max_scale(m):
+    """Largest factor by which ``m`` stretches any direction (column norm bound)."""
+    return max(math.sqrt(m[c] ** 2 + m[c + 1] ** 2 + m[c + 2] ** 2) for c in (0, 4, 8))
+
+
+def world_matrices(gltf):
+    """World matrix of every node, following the parent chain."""
+    nodes = gltf.get('nodes', [])
+    parents = {}
+    for index, node in enumerate(nodes):
+        for child in node.get('children', []):
+            parents[child] = index
+    world = {}
+
+    def resolve(index):
+        if index not in world:
+            local = node_matrix(nodes[index])
+            parent = parents.get(index)
+            world[index] = local if parent is None else multiply(resolve(parent), local)
+        return world[index]
+
+    for index in range(len(nodes)):
+        resolve(index)
+    return world
+
+
+def mesh_instances(gltf):
+    """``{mesh: [world matrix, ...]}`` for every mesh referenced by a node."""
+    instances = {}
+    for index, matrix in world_matrices(gltf).items():
+        node = gltf['nodes'][index]
+        if 'mesh' in node:
+            instances.setdefault(node['mesh'], []).append(matrix)
+    return instances
+
+
+def _bounds(values, components=3):
+    lo = [min(values[c::components]) for c in range(components)]
+    hi = [max(values[c::components]) for c in range(components)]
+    return lo, hi
+
+
+def _position_bounds(glb, index):
+    accessor = glb.gltf['accessors'][index]
+    if 'min' in accessor and 'max' in accessor:
+        return accessor['min'], accessor['max']
+    return _bounds(glb.read_accessor(index)[0])
+
+
+def _corners(lo, hi):
+    return [(x, y, z) for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])]
+
+
+def scene_bounds(gltf):
+    """World-space ``(min, max)`` of every mesh instance, from accessor bounds."""
+    accessors = gltf.get('accessors', [])
+    meshes = gltf.get('meshes', [])
+    lo = [math.inf] * 3
+    hi = [-math.inf] * 3
+    for mesh_index, matrices in mesh_instances(gltf).items():
+        for primitive in meshes[mesh_index]['primitives']:
+            position = primitive['attributes'].get('POSITION')
+            if position is None or 'min' not in accessors[position]:
+                continue
+            for matrix in matrices:
+                for corner in _corners(accessors[position]['min'], accessors[position]['max']):
+                    point = transform_point(matrix, corner)
+                    lo = [min(a, b) for a, b in zip(lo, point)]
+                    hi = [max(a, b) for a, b in zip(hi, point)]
+    return lo, hi
+
+
+# Composition -------------------------------------------------------------------
+
+def _offset_texture_refs(value, offset):
+    """Shift every textureInfo ``index`` below a material by ``offset``."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == 'index' and isinstance(item, int):
+                value[key] = item + offset
+            else:
+                _offset_texture_refs(item, offset)
+    elif isinstance(value, list):
+        for item in value:
+            _offset_texture_refs(item, offset)
+
+
+def append_document(target, source):
+    """
+    Copy the meshes of ``source`` -- with their accessors, materials,
+    textures, images and samplers -- into ``target``. Returns the index
+    offsets of the copied arrays (``offsets['meshes']`` is source mesh 0).
+    """
+    gltf = target.gltf
+    keys = ('bufferViews', 'accessors', 'images', 'samplers', 'textures', 'materials', 'meshes')
+    offsets = {key: len(gltf.get(key, [])) for key in keys}
+    copied = {key: copy.deepcopy(source.gltf.get(key, [])) for key in keys}
+
+    for view in copied['bufferViews']:
+        view['buffer'] = 0
+    for accessor in copied['accessors']:
+        if 'bufferView' in accessor:
+            accessor['bufferView'] += offsets['bufferViews']
+        sparse = accessor.get('sparse')
+        if sparse:
+            sparse['indices']['bufferView'] += offsets['bufferViews']
+            sparse['values']['bufferView'] += offsets['bufferViews']
+    for image in copied['images']:
+        if 'bufferView' in image:
+            image['bufferView'] += offsets['bufferViews']
+    for texture in copied['textures']:
+        for holder in (texture, *texture.get('extensions', {}).values()):
+            if 'source' in holder:
+                holder['source'] += offsets['images']
+        if 'sampler' in texture:
+            texture['sampler'] += offsets['samplers']
+    for material in copied['materials']:
+        _offset_texture_refs(material, offsets['textures'])
+    for mesh in copied['meshes']:
+        for primitive in mesh['primitives']:
+            for attributes in (primitive['attributes'], *primitive.get('targets', [])):
+                for name in attributes:
+                    attributes[name] += offsets['accessors']
+            if 'indices' in primitive:
+                primitive['indices'] += offsets['accessors']
+            if 'material' in primitive:
+                primitive['material'] += offsets['materials']
+
+    for key in keys:
+        if copied[key]:
+            gltf.setdefault(key, []).extend(copied[key])
+    target.views.extend(source.views)
+    for name in source.gltf.get('extensionsUsed', []):
+        target.use_extension(name, required=name in source.gltf.get('extensionsRequired', []))
+    return offsets
+
+
+# Simplification ----------------------------------------------------------------
+
+def _cluster(glb, primitive, cell):
+    """
+    Merge the primitive's vertices per grid cell (position averaged, other
+    attributes taken from the cell's first vertex) and drop the triangles
+    that collapse. Returns the new ``(attributes, indices)``, or None if
+    nothing is left.
+    """
+    attributes = primitive['attributes']
+    positions, _ = glb.read_accessor(attributes['POSITION'])
+    vertex_count = len(positions) // 3
+    if 'indices' in primitive:
+        indices, _ = glb.read_accessor(primitive['indices'])
+    else:
+        indices = range(vertex_count)
+
+    inverse = 1.0 / cell
+    floor = math.floor
+    cells = {}
+    remap = array('I', bytes(4 * vertex_count))
+    first = array('I')
+    sums = array('d')
+    counts = array('I')
+    for v in range(vertex_count):
+        x, y, z = positions[3 * v:3 * v + 3]
+        key = (floor(x * inverse), floor(y * inverse), floor(z * inverse))
+        c = cells.get(key)
+        if c is None:
+            c = cells[key] = len(first)
+            first.append(v)
+            sums.extend((0.0, 0.0, 0.0))
+            counts.append(0)
+        sums[3 * c] += x
+        sums[3 * c + 1] += y
+        sums[3 * c + 2] += z
+        counts[c] += 1
+        remap[v] = c
+
+    triangles = array('I')
+    seen = set()
+    for i in range(0, len(indices) - 2, 3):
+        a, b, c = remap[indices[i]], remap[indices[i + 1]], remap[indices[i + 2]]
+        if a == b or b == c or a == c:
+            continue
+        # Rotate the smallest index first so duplicates compare equal while
+        # the winding (and so the facing) is kept
+        if a < b and a < c:
+            triangle = (a, b, c)
+        elif b < c:
+            triangle = (b, c, a)
+        else:
+            triangle = (c, a, b)
+        if triangle not in seen:
+            seen.add(triangle)
+            triangles.extend(triangle)
+    if not triangles:
+        return None
+
+    # Renumber the surviving clusters in first-use order
+    order = {}
+    for c in triangles:
+        if c not in order:
+            order[c] = len(order)
+    new_indices = [order[c] for c in triangles]
+
+    new_attributes = {}
+    for name, index in attributes.items():
+        accessor = glb.gltf['accessors'][index]
+        if name == 'POSITION':
+            values = []
+            for c in order:
+                n = counts[c]
+                values.extend((sums[3 * c] / n, sums[3 * c + 1] / n, sums[3 * c + 2] / n))
+        else:
+            source, components = glb.read_accessor(index)
+            values = array(source.typecode)
+            for c in order:
+                v = first[c]
+                values.extend(source[components * v:components * (v + 1)])
+        new_attributes[name] = glb.add_accessor(
+            values, accessor['componentType'], accessor['type'],
+            normalized=accessor.get('normalized', False), bounds=name == 'POSITION',
+        )
+
+    index_type = UNSIGNED_SHORT if len(order) < 0xFFFF else UNSIGNED_INT
+    return new_attributes, glb.add_accessor(
+        new_indices, index_type, 'SCALAR', target=ELEMENT_ARRAY_BUFFER
+    )
+
+
+def simplify(glb, resolution):
+    """
+    Vertex-clustering decimation on a grid of ``resolution`` cells along the
+    longest side of the whole model, measured in world space so that meshes
+    authored at different scales are reduced alike.
+    """
+    gltf = glb.gltf
+    meshes = gltf.get('meshes', [])
+    instances = mesh_instances(gltf)
+
+    lo = [math.inf] * 3
+    hi = [-math.inf] * 3
+    for mesh_index, mesh in enumerate(meshes):
+        for primitive in mesh['primitives']:
+            if 'POSITION' not in primitive['attributes']:
+                continue
+            local_lo, local_hi = _position_bounds(glb, primitive['attributes']['POSITION'])
+            for matrix in instances.get(mesh_index, [IDENTITY]):
+                for corner in _corners(local_lo, local_hi):
+                    point = transform_point(matrix, corner)
+                    lo = [min(a, b) for a, b in zip(lo, point)]
+                    hi = [max(a, b) for a, b in zip(hi, point)]
+    extent = max((b - a for a, b in zip(lo, hi)), default=0)
+    if not extent > 0:
+        return
+    cell = extent / resolution
+
+    results = {}
+    for mesh_index, mesh in enumerate(meshes):
+        scale = max(max_scale(m) for m in instances.get(mesh_index, [IDENTITY])) or 1.0
+        local_cell = cell / scale
+        primitives = []
+        for primitive in mesh['primitives']:
+            if (primitive.get('mode', TRIANGLES) != TRIANGLES or primitive.get('targets')
+                    or 'POSITION' not in primitive['attributes']):
+                primitives.append(primitive)
+                continue
+            key = (json.dumps(primitive['attributes'], sort_keys=True),
+                   primitive.get('indices'), local_cell)
+            if key not in results:
+                results[key] = _cluster(glb, primitive, local_cell)
+            if results[key] is not None:
+                attributes, indices = results[key]
+                primitives.append(dict(primitive, attributes=dict(attributes), indices=indices))
+        mesh['primitives'] = primitives
+    _drop_empty_meshes(gltf)
+
+
+def _drop_empty_meshes(gltf):
+    meshes = gltf.get('meshes', [])
+    kept = [i for i, mesh in enumerate(meshes) if mesh['primitives']]
+    if len(kept) == len(meshes):
+        return
+    mapping = {old: new for new, old in enumerate(kept)}
+    for node in gltf.get('nodes', []):
+        if 'mesh' in node:
+            if node['mesh'] in mapping:
+                node['mesh'] = mapping[node['mesh']]
+            else:
+                del node['mesh']
+                node.pop('weights', None)
+    gltf['meshes'] = [meshes[i] for i in kept]
+    if not gltf['meshes']:
+        del gltf['meshes']
+
+
+# Quantization ------------------------------------------------------------------
+
+def _quantize_positions(glb, index, origin, step):
+    values, _ = glb.read_accessor(index)
+    inverse = 1.0 / step
+    quantized = array('H', bytes(2 * len(values)))
+    for c in range(3):
+        o = origin[c]
+        quantized[c::3] = array('H', (
+            min(int((v - o) * inverse + 0.5), 0xFFFF) for v in values[c::3]
+        ))
+    return glb.add_accessor(quantized, UNSIGNED_SHORT, 'VEC3', stride=8, bounds=True)
+
+
+def _quantize_normals(glb, index):
+    values, _ = glb.read_accessor(index)
+    quantized = array('b', (
+        max(-127, min(127, int(v * 127 + (0.5 if v >= 0 else -0.5)))) for v in values
+    ))
+    return glb.add_accessor(quantized, BYTE, 'VEC3', normalized=True, stride=4)
+
+
+def quantize(glb):
+    """
+    KHR_mesh_quantization: store positions as 16-bit integers relative to
+    the mesh's bounding box and normals as normalized bytes.
+
+    Each quantized mesh moves to a new child node of every node using it,
+    whose translation/scale maps the integers back to the original
+    coordinates. The scale is uniform so normals need no correction.
+    Skinned, morphed and GPU-instanced meshes are left alone.
+    """
+    gltf = glb.gltf
+    accessors = gltf.get('accessors', [])
+    nodes = gltf.get('nodes', [])
+
+    skip = set()
+    for node in nodes:
+        if 'mesh' in node and ('skin' in node or 'weights' in node
+                               or 'EXT_mesh_gpu_instancing' in node.get('extensions', {})):
+            skip.add(node['mesh'])
+
+    dequantize = {}
+    cache = {}
+    for mesh_index, mesh in enumerate(gltf.get('meshes', [])):
+        primitives = mesh['primitives']
+        positions = [p['attributes'].get('POSITION') for p in primitives]
+        if (mesh_index in skip or None in positions or any(p.get('targets') for p in primitives)
+                or any(accessors[i]['componentType'] != FLOAT for i in positions)):
+            continue
+
+        lo = [math.inf] * 3
+        hi = [-math.inf] * 3
+        for index in positions:
+            a, b = _bounds(glb.read_accessor(index)[0])
+            lo = [min(x, y) for x, y in zip(lo, a)]
+            hi = [max(x, y) for x, y in zip(hi, b)]
+        step = max(b - a for a, b in zip(lo, hi)) / 0xFFFF or 1.0
+
+        for primitive in primitives:
+            attributes = primitive['attributes']
+            key = ('POSITION', attributes['POSITION'], tuple(lo), step)
+            if key not in cache:
+                cache[key] = _quantize_positions(glb, attributes['POSITION'], lo, step)
+            attributes['POSITION'] = cache[key]
+
+            normal = attributes.get('NORMAL')
+            if normal is not None and accessors[normal]['componentType'] == FLOAT:
+                key = ('NORMAL', normal)
+                if key not in cache:
+                    cache[key] = _quantize_normals(glb, normal)
+                attributes['NORMAL'] = cache[key]
+        dequantize[mesh_index] = {'translation': lo, 'scale': [step] * 3}
+
+    if not dequantize:
+        return
+    for node in list(nodes):
+        if node.get('mesh') in dequantize:
+            mesh_index = node.pop('mesh')
+            nodes.append(dict(dequantize[mesh_index], mesh=mesh_index))
+            node.setdefault('children', []).append(len(nodes) - 1)
+    glb.use_extension('KHR_mesh_quantization', required=True)
+
+
+def optimize(data, resolution=None):
+    """Deduplicated, quantized (and with ``resolution``, decimated) GLB bytes."""
+    glb = GLB.from_bytes(data)
+    if resolution:
+        simplify(glb, resolution)
+    dedupe(glb)
+    quantize(glb)
+    compact(glb)
+    return glb.to_bytes()
+
+
+# Metadata ----------------------------------------------------------------------
+
+def image_dimensions(data):
+    """``(width, height)`` of a PNG or JPEG from its leading bytes, else (None, None)."""
+    if data.startswith(PNG_SIGNATURE) and len(data) >= 24:
+        return struct.unpack_from('>II', data, 16)
+    if data.startswith(b'\xff\xd8'):
+        i = 2
+        while i + 9 <= len(data):
+            if data[i] != 0xFF:
+                i += 1
+                continue
+            marker = data[i + 1]
+            if marker in JPEG_SOF_MARKERS:
+                height, width = struct.unpack_from('>HH', data, i + 5)
+                return width, height
+            if marker == 0xFF or 0xD0 <= marker <= 0xD9:
+                # fill byte or parameterless marker
+                i += 1 if marker == 0xFF else 2
+                continue
+            i += 2 + struct.unpack_from('>H', data, i + 2)[0]
+    return None, None
+
+
+def _read_document(f):
+    """``(gltf, binary chunk data offset)`` read from the start of a GLB file."""
+    header = f.read(20)
+    if len(header) < 20:
+        raise GLBError('file is too short to be a GLB')
+    magic, version, _ = struct.unpack_from('<4sII', header, 0)
+    if magic != GLB_MAGIC or version != 2:
+        raise GLBError('not a glTF 2.0 binary file')
+    json_length, chunk_type = struct.unpack_from('<II', header, 12)
+    if chunk_type != CHUNK_JSON:
+        raise GLBError('GLB does not start with a JSON chunk')
+    return json.loads(f.read(json_length)), 20 + json_length + 8
+
+
+def _primitive_triangles(gltf, primitive):
+    accessors = gltf['accessors']
+    if 'indices' in primitive:
+        count = accessors[primitive['indices']]['count']
+    elif 'POSITION' in primitive['attributes']:
+        count = accessors[primitive['attributes']['POSITION']]['count']
+    else:
+        return 0
+    mode = primitive.get('mode', TRIANGLES)
+    if mode == TRIANGLES:
+        return count // 3
+    if mode in (5, 6):  # TRIANGLE_STRIP, TRIANGLE_FAN
+        return max(count - 2, 0)
+    return 0
+
+
+def read_metadata(path):
+    """
+    Bounding box, scene statistics and texture sizes of a GLB, read from its
+    JSON chunk and the first bytes of each embedded image only.
+
+    ``vertex_count`` counts stored vertices; ``triangle_count`` counts
+    rendered triangles, i.e. once per node using a mesh.
+    """
+    with open(path, 'rb') as f:
+        gltf, binary_offset = _read_document(f)
+        textures = []
+        for index, image in enumerate(gltf.get('images', [])):
+            texture = {
+                'image': index,
+                'name': image.get('name'),
+                'mime_type': image.get('mimeType'),
+                'byte_length': None,
+                'width': None,
+                'height': None,
+            }
+            if 'bufferView' in image:
+                view = gltf['bufferViews'][image['bufferView']]
+                texture['byte_length'] = view['byteLength']
+                f.seek(binary_offset + view.get('byteOffset', 0))
+                texture['width'], texture['height'] = image_dimensions(
+                    f.read(min(view['byteLength'], IMAGE_HEADER_BYTES))
+                )
+            textures.append(texture)
+
+    meshes = gltf.get('meshes', [])
+    accessors = gltf.get('accessors', [])
+    lo, hi = scene_bounds(gltf)
+    triangle_count = sum(
+        _primitive_triangles(gltf, primitive) * len(matrices)
+        for mesh_index, matrices in mesh_instances(gltf).items()
+        for primitive in meshes[mesh_index]['primitives']
+    )
+
+    positions = {
+        primitive['attributes']['POSITION']
+        for mesh in meshes for primitive in mesh['primitives']
+        if 'POSITION' in primitive['attributes']
+    }
+    return {
+        'generator': gltf.get('asset', {}).get('generator', ''),
+        'bounding_box': {'min': lo, 'max': hi} if lo[0] <= hi[0] else None,
+        'node_count': len(gltf.get('nodes', [])),
+        'mesh_count': len(meshes),
+        'primitive_count': sum(len(mesh['primitives']) for mesh in meshes),
+        'vertex_count': sum(accessors[index]['count'] for index in positions),
+        'triangle_count': triangle_count,
+        'material_count': len(gltf.get('materials', [])),
+        'textures': textures,
+        'extensions': gltf.get('extensionsUsed', []),
+    }
@@ -0,0 +1,132 @@
+"""
+Full-text search over the farm layout PDFs.
+
+``refresh_layout_search`` extracts the text of every layout (core.pdf) and
+stores its tokens in the LayoutToken inverted index, one row per token and
+page. Only files whose size or mtime changed since they were indexed are
+read again, and documents whose file is gone are dropped, so running it after
+every upload or deploy is cheap. ``search_layouts`` then answers from the
+index with a single query.
+
+Tokens are runs of letters and digits joined by ``-`` or ``_``, upper-cased,
+so tags such as ``FIX-03E9A2`` stay whole; a query term ending in ``*``
+matches as a prefix.
+"""
+
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Q
+
+from .file_index import layout_index
+from .models import LayoutDocument, LayoutToken
+from .pdf import PDFError, extract_text
+
+
+TOKEN_RE = re.compile(r'[A-Za-z0-9]+(?:[-_][A-Za-z0-9]+)*')
+MAX_TOKEN_LENGTH = 100
+MAX_QUERY_TERMS = 8
+MIN_PREFIX_LENGTH = 2
+
+
+def tokenize(text):
+    return [t.upper() for t in TOKEN_RE.findall(text) if len(t) <= MAX_TOKEN_LENGTH]
+
+
+def _index_document(document, path):
+    try:
+        pages = extract_text(path)
+        document.error = ''
+    except (OSError, PDFError) as e:
+        pages = []
+        document.error = str(e)[:200]
+    document.page_count = len(pages)
+    tokens = [
+        LayoutToken(document=document, token=token, page=number, count=count)
+        for number, text in enumerate(pages, start=1)
+        for token, count in Counter(tokenize(text)).items()
+    ]
+    with transaction.atomic():
+        document.save()
+        document.tokens.all().delete()
+        LayoutToken.objects.bulk_create(tokens, batch_size=1000)
+    return len(tokens)
+
+
+def refresh_layout_search(force=False, index=layout_index):
+    """
+    Bring the index in line with the layout files. Returns a dict of the
+    farm ids ``indexed`` (new or changed), ``removed`` and ``unchanged``.
+    """
+    index.refresh(force=True)
+    documents = {d.farm_id: d for d in LayoutDocument.objects.all()}
+    result = {'indexed': [], 'removed': [], 'unchanged': []}
+
+    for farm_id in index.names():
+        stat = index.stat(farm_id)
+        document = documents.pop(farm_id, None)
+        if (document is not None and not force
+                and document.file_size == stat.st_size
+                and document.file_mtime_ns == stat.st_mtime_ns):
+            result['unchanged'].append(farm_id)
+            continue
+        if document is None:
+            document = LayoutDocument(farm_id=farm_id)
+        document.file_size = stat.st_size
+        document.file_mtime_ns = stat.st_mtime_ns
+        _index_document(document, index.path(farm_id))
+        result['indexed'].append(farm_id)
+
+    if documents:
+        LayoutDocument.objects.filter(pk__in=[d.pk for d in documents.values()]).delete()
+        result['removed'] = sorted(documents)
+    return result
+
+
+def parse_query(q):
+    """The query's terms as ``(token, is_prefix)``, at most MAX_QUERY_TERMS."""
+    terms = []
+    for word in q.split()[:MAX_QUERY_TERMS]:
+        tokens = tokenize(word)
+        if not tokens:
+            continue
+        terms.extend((token, False) for token in tokens[:-1])
+        prefix = word.endswith('*') and len(tokens[-1]) >= MIN_PREFIX_LENGTH
+        terms.append((tokens[-1], prefix))
+    return list(dict.fromkeys(terms))
+
+
+def search_layouts(q):
+    """
+    Layouts containing every term of ``q``, most matches first: a list of
+    ``{'farm_id', 'pages', 'matches'}`` where ``matches`` counts occurrences.
+    One query fetches the postings of all terms; they are intersected here.
+    """
+    terms = parse_query(q)
+    if not terms:
+        return []
+    condition = Q()
+    for token, prefix in terms:
+        condition |= Q(token__startswith=token) if prefix else Q(token=token)
+    postings = LayoutToken.objects.filter(condition).values_list(
+        'document__farm_id', 'token', 'page', 'count'
+    )
+
+    found = {}
+    for farm_id, token, page, count in postings:
+        entry = found.setdefault(farm_id, {'terms': set(), 'pages': set(), 'matches': 0})
+        entry['terms'].update(
+            term for term in terms
+            if (token.startswith(term[0]) if term[1] else token == term[0])
+        )
+        entry['pages'].add(page)
+        entry['matches'] += count
+
+    results = [
+        {'farm_id': farm_id, 'pages': sorted(entry['pages']), 'matches': entry['matches']}
+        for farm_id, entry in found.items()
+        if len(entry['terms']) == len(terms)
+    ]
+    results.sort(key=lambda r: (-r['matches'], r['farm_id']))
+    return results
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Django management command to measure the hot-path indexes of core.models
+Usage: python manage.py benchmark_indexes [--farms 20] [--assets-per-farm 250]
+                                          [--events-per-asset 6] [--repeat 10]
+
+Fills the database with a synthetic dataset of the given size, records the
+SQL of the endpoint code paths (farm assets, asset details, model bundle) and
+of the company lookups, then times each query and prints its EXPLAIN plan
+without the ``Meta.indexes`` of Farm, Asset and AssetEvents ("before") and
+with them ("after").
+
+Everything runs in one transaction that is rolled back at the end, but the
+indexes are dropped and recreated inside it, which locks the tables for the
+duration: do not run it against a live production database.
+"""
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from core.fast_serializers import serialize_asset_details, serialize_farm_assets
+from core.models import Asset, AssetEvents, AssetType, Company, EventType, Farm
+
+INDEXED_MODELS = (Farm, Asset, AssetEvents)
+STATUSES = ('active', 'inactive', 'maintenance', 'decommissioned')
+EVENT_STATUSES = ('completed', 'scheduled', 'in progress')
+PREFIX = 'BENCH'
+
+
+class Command(BaseCommand):
+    help = 'Time and EXPLAIN the endpoint queries with and without the hot-path indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--farms', type=int, default=20, help='Synthetic farms (one company per 5)')
+        parser.add_argument('--assets-per-farm', type=int, default=250)
+        parser.add_argument('--events-per-asset', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=10, help='Timed runs per query')
+
+    def handle(self, *args, **options):
+        if options['farms'] < 1 or options['assets_per_farm'] < 1:
+            raise CommandError('Need at least one farm and one asset per farm')
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+        self.stdout.write('Synthetic data and index changes rolled back')
+
+    def run(self, options):
+        farm = self.populate(options['farms'], options['assets_per_farm'], options['events_per_asset'])
+        queries = self.endpoint_queries(farm)
+        indexes = [(model, index) for model in INDEXED_MODELS for index in model._meta.indexes]
+
+        self.set_indexes(indexes, present=False)
+        before = self.measure(queries, options['repeat'])
+        self.set_indexes(indexes, present=True)
+        after = self.measure(queries, options['repeat'])
+
+        for (label, _), (before_ms, before_plan), (after_ms, after_plan) in zip(queries, before, after):
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(f'  before {before_ms:8.2f} ms')
+            self.stdout.write('    ' + before_plan.replace('\n', '\n    '))
+            self.stdout.write(f'  after  {after_ms:8.2f} ms   '
+                              + self.style.SUCCESS(f'{before_ms / max(after_ms, 1e-6):5.1f}x'))
+            self.stdout.write('    ' + after_plan.replace('\n', '\n    '))
+
+    def populate(self, farm_count, assets_per_farm, events_per_asset):
+        """Bulk-insert the synthetic dataset; returns the farm the queries target."""
+        asset_type = AssetType.objects.create(name='Fixed Roof Tank', code='FRT')
+        event_type = EventType.objects.create(name='Inspection')
+        company_ids = [f'{PREFIX}-C{n:04d}' for n in range((farm_count + 4) // 5)]
+        Company.objects.bulk_create([Company(company_id=c, name=c) for c in company_ids])
+        farms = Farm.objects.bulk_create([
+            Farm(farm_id=f'{PREFIX}-F{n:05d}', company_id=company_ids[n // 5],
+                 name=f'Farm {n}', status='active')
+            for n in range(farm_count)
+        ])
+
+        start = time.perf_counter()
+        for farm in farms:
+            assets = Asset.objects.bulk_create([
+                Asset(asset_id=f'{farm.farm_id}-A{n:05d}', company_id=farm.company_id, farm=farm,
+                      name=f'TANK-{n}', asset_type=asset_type, status=STATUSES[n % len(STATUSES)])
+                for n in range(assets_per_farm)
+            ], batch_size=1000)
+            AssetEvents.objects.bulk_create([
+                AssetEvents(event_id=f'{asset.asset_id}-E{n}', asset=asset, title='Inspection',
+                            event_type=event_type, event_status=EVENT_STATUSES[n % len(EVENT_STATUSES)],
+                            start_date=farm.created_at.replace(day=1, month=n % 12 + 1))
+                for asset in assets for n in range(events_per_asset)
+            ], batch_size=1000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.stdout.write(
+            f'{farm_count} farms, {farm_count * assets_per_farm} assets, '
+            f'{farm_count * assets_per_farm * events_per_asset} events '
+            f'({time.perf_counter() - start:.1f} s)'
+        )
+        return farms[len(farms) // 2]
+
+    def endpoint_queries(self, farm):
+        """``[(label, sql)]`` of what the endpoints and company lookups execute."""
+        assets = Asset.objects.filter(farm=farm)
+        asset_ids = list(assets.values_list('asset_id', flat=True)[:50])
+        paths = [
+            ('Farm assets', lambda: serialize_farm_assets(assets)),
+            ('Asset details', lambda: serialize_asset_details(Asset.objects.filter(asset_id__in=asset_ids))),
+            ('Model bundle asset types', lambda: list(
+                Asset.objects.filter(farm_id=farm.farm_id).values_list('asset_type__name', flat=True).distinct()
+            )),
+            ('Active assets of a farm', lambda: list(
+                assets.filter(status='active').values_list('asset_id', flat=True)
+            )),
+            ('Farms of a company', lambda: list(
+                Farm.objects.filter(company_id=farm.company_id).values_list('farm_id', flat=True)
+            )),
+            ('Active assets of a company', lambda: Asset.objects.filter(
+                company_id=farm.company_id, status='active').count()),
+            ('Latest events of an asset', lambda: list(
+                AssetEvents.objects.filter(asset_id=asset_ids[0]).order_by('-start_date')[:10]
+            )),
+        ]
+        queries = []
+        for label, func in paths:
+            with CaptureQueriesContext(connection) as ctx:
+                func()
+            for n, query in enumerate(ctx.captured_queries, start=1):
+                suffix = f' ({n}/{len(ctx)})' if len(ctx) > 1 else ''
+                queries.append((label + suffix, query['sql']))
+        return queries
+
+    def index_sql(self, model, index, present):
+        """
+        CREATE or DROP INDEX statement of a plain field index. Written out
+        rather than taken from a schema editor, which cannot be entered inside
+        the transaction on SQLite.
+        """
+        quote = connection.ops.quote_name
+        if not present:
+            return f'DROP INDEX {quote(index.name)}'
+        columns = ', '.join(
+            quote(model._meta.get_field(field.lstrip('-')).column)
+            + (' DESC' if field.startswith('-') else '')
+            for field in index.fields
+        )
+        return f'CREATE INDEX {quote(index.name)} ON {quote(model._meta.db_table)} ({columns})'
+
+    def set_indexes(self, indexes, present):
+        with connection.cursor() as cursor:
+            for model, index in indexes:
+                cursor.execute(self.index_sql(model, index, present))
+            cursor.execute('ANALYZE')
+
+    def measure(self, queries, repeat):
+        """``[(best ms, plan)]`` for each query."""
+        prefix = connection.ops.explain_query_prefix()
+        results = []
+        with connection.cursor() as cursor:
+            for _, sql in queries:
+                best = float('inf')
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    cursor.execute(sql)
+                    cursor.fetchall()
+                    best = min(best, time.perf_counter() - start)
+                cursor.execute(f'{prefix} {sql}')
+                plan = '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+                results.append((best * 1000, plan))
+        return results
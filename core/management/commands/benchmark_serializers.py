@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Django management command to compare the DRF serializers with the fast path
+Usage: python manage.py benchmark_serializers [--farm-id SYS-...] [--repeat 20]
+"""
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from core.fast_serializers import serialize_asset_details, serialize_farm_assets
+from core.models import Farm, Asset
+from core.serializers import AssetDetailSerializer, FarmAssetSerializer
+
+
+class Command(BaseCommand):
+    help = 'Benchmark DRF serializers against core.fast_serializers on real data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--farm-id',
+            type=str,
+            help='Farm to serialize (defaults to the farm with the most assets)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Number of timed runs per serializer'
+        )
+
+    def handle(self, *args, **options):
+        farm = self.get_farm(options['farm_id'])
+        repeat = options['repeat']
+        assets = Asset.objects.filter(farm=farm)
+        asset_count = assets.count()
+
+        self.stdout.write(f'Farm {farm.farm_id} ({asset_count} assets), {repeat} runs each')
+
+        drf = self.best_of(repeat, lambda: FarmAssetSerializer(
+            assets.prefetch_related('events__event_type'), many=True,
+        ).data)
+        fast = self.best_of(repeat, lambda: serialize_farm_assets(assets))
+        self.report('Farm assets', drf, fast)
+
+        drf = self.best_of(repeat, lambda: [
+            AssetDetailSerializer(asset).data for asset in assets.with_detail_relations()
+        ])
+        fast = self.best_of(repeat, lambda: serialize_asset_details(assets))
+        self.report('Asset details', drf, fast)
+
+    def get_farm(self, farm_id):
+        if farm_id:
+            try:
+                return Farm.objects.get(farm_id=farm_id)
+            except Farm.DoesNotExist:
+                raise CommandError(f'Farm not found: {farm_id}')
+
+        farm = Farm.objects.annotate(asset_count=Count('assets')).order_by('-asset_count').first()
+        if farm is None:
+            raise CommandError('No farms to benchmark')
+        return farm
+
+    def best_of(self, repeat, func):
+        """Fastest wall-clock time over ``repeat`` runs, queries included."""
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def report(self, label, drf, fast):
+        self.stdout.write(
+            f'{label:<14} DRF {drf * 1000:8.2f} ms   fast {fast * 1000:8.2f} ms   '
+            + self.style.SUCCESS(f'{drf / fast:5.1f}x')
+        )
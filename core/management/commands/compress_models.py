@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Django management command to pre-compress the 3D model files
+Usage: python manage.py compress_models [--force]
+
+Writes a .glb.gz (and .glb.br when the Brotli package is installed) next to
+every farm and asset type model and every level of detail built by
+optimize_models, and removes siblings whose model is gone.
+The model endpoints serve the best variant the client accepts.
+"""
+
+import gzip
+import os
+from django.core.management.base import BaseCommand
+from core.file_serving import ENCODING_SUFFIXES
+from core.model_registry import MODEL_KINDS, OPTIMIZED_MODELS_DIR, compressed_path, registry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def _gzip(data):
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+class Command(BaseCommand):
+    help = 'Write gzip/brotli copies of every 3D model file and keep them in sync'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recompress models whose compressed copies look up to date'
+        )
+
+    def handle(self, *args, **options):
+        compressors = {'gzip': _gzip}
+        if brotli is not None:
+            compressors['br'] = _brotli
+        else:
+            self.stdout.write(self.style.WARNING('Brotli is not installed; writing gzip only'))
+
+        directories = list(MODEL_KINDS.values()) + [
+            os.path.join(OPTIMIZED_MODELS_DIR, kind) for kind in MODEL_KINDS
+        ]
+        written = removed = 0
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                path = os.path.join(directory, filename)
+                if filename.endswith('.glb'):
+                    written += self.compress(path, compressors, options['force'])
+                elif self.is_orphan(path):
+                    os.remove(path)
+                    removed += 1
+                    self.stdout.write(f'Removed orphan: {filename}')
+
+        registry.refresh(force=True)
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {written} compressed files, removed {removed} orphans')
+        )
+
+    @staticmethod
+    def is_orphan(path):
+        for suffix in ENCODING_SUFFIXES.values():
+            if path.endswith('.glb' + suffix):
+                return not os.path.exists(path[:-len(suffix)])
+        return False
+
+    def compress(self, path, compressors, force):
+        stat = os.stat(path)
+        data = None
+        written = 0
+        for encoding, compress in compressors.items():
+            target = compressed_path(path, encoding)
+            try:
+                up_to_date = os.stat(target).st_mtime_ns == stat.st_mtime_ns
+            except FileNotFoundError:
+                up_to_date = False
+            if up_to_date and not force:
+                continue
+
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            compressed = compress(data)
+            name = os.path.basename(path)
+            if len(compressed) >= len(data):
+                # Not worth serving; make sure no stale copy lingers either
+                if os.path.exists(target):
+                    os.remove(target)
+                self.stdout.write(f'{name} [{encoding}]: does not compress, skipped')
+                continue
+
+            tmp = target + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(compressed)
+            # The registry only trusts a copy whose mtime matches its source
+            os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(tmp, target)
+            written += 1
+            self.stdout.write(
+                f'{name} [{encoding}]: {len(data):,} -> {len(compressed):,} bytes '
+                f'({100 * len(compressed) / len(data):.1f}%)'
+            )
+        return written
@@ -4,6 +4,7 @@ from datetime import datetime
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from core.models import Company, Location, Farm, AssetType, Material, Content, Asset
+from core.reference_cache import asset_types, contents, locations, materials
 
 
 class Command(BaseCommand):
@@ -114,7 +115,7 @@ class Command(BaseCommand):
                     
                     # Create or update asset
                     asset_data = {
-                        'company_id': company.company_id if company else row.get('company_id', ''),
+                        'company': company,
                         'location': location,
                         'farm': farm,
                         'name': row.get('name', '').strip(),
@@ -183,7 +184,10 @@ class Command(BaseCommand):
             location_id = int(location_id)
         except ValueError:
             return None
-            
+
+        cached = locations.get(location_id)
+        if cached is not None:
+            return cached
         location, created = Location.objects.get_or_create(
             location_id=location_id,
             defaults={
@@ -206,7 +210,7 @@ class Command(BaseCommand):
         farm, created = Farm.objects.get_or_create(
             farm_id=farm_id,
             defaults={
-                'company_id': company.company_id if company else row.get('company_id', ''),
+                'company': company,
                 'location': location,
                 'name': f'Farm {farm_id}',
                 'description': f'Auto-created farm for {farm_id}',
@@ -226,7 +230,10 @@ class Command(BaseCommand):
             asset_type_id = int(asset_type_id)
         except ValueError:
             return None
-            
+
+        cached = asset_types.get(asset_type_id)
+        if cached is not None:
+            return cached
         asset_type, created = AssetType.objects.get_or_create(
             id=asset_type_id,
             defaults={
@@ -247,7 +254,10 @@ class Command(BaseCommand):
             material_id = int(material_id)
         except ValueError:
             return None
-            
+
+        cached = materials.get(material_id)
+        if cached is not None:
+            return cached
         material, created = Material.objects.get_or_create(
             id=material_id,
             defaults={
@@ -268,7 +278,10 @@ class Command(BaseCommand):
             content_id = int(content_id)
         except ValueError:
             return None
-            
+
+        cached = contents.get(content_id)
+        if cached is not None:
+            return cached
         content, created = Content.objects.get_or_create(
             id=content_id,
             defaults={
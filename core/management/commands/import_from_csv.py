@@ -13,6 +13,7 @@ from core.models import (
     Company, Location, AssetType, Material, Content, 
     Farm, Asset, EventType, AssetEvents
 )
+from core.reference_cache import asset_types, contents, event_types, locations, materials
 
 
 class Command(BaseCommand):
@@ -240,12 +241,7 @@ class Command(BaseCommand):
             count = 0
             
             for row in reader:
-                location = None
-                if row['location_id']:
-                    try:
-                        location = Location.objects.get(location_id=int(row['location_id']))
-                    except Location.DoesNotExist:
-                        pass
+                location = locations.get(int(row['location_id'])) if row['location_id'] else None
                         
                 Farm.objects.update_or_create(
                     farm_id=row['farm_id'],
@@ -275,12 +271,7 @@ class Command(BaseCommand):
             
             for row in reader:
                 # Get related objects
-                location = None
-                if row['location_id']:
-                    try:
-                        location = Location.objects.get(location_id=int(row['location_id']))
-                    except Location.DoesNotExist:
-                        pass
+                location = locations.get(int(row['location_id'])) if row['location_id'] else None
                         
                 farm = None
                 if row['farm_id']:
@@ -289,26 +280,11 @@ class Command(BaseCommand):
                     except Farm.DoesNotExist:
                         pass
                         
-                asset_type = None
-                if row['asset_type_id']:
-                    try:
-                        asset_type = AssetType.objects.get(id=int(row['asset_type_id']))
-                    except AssetType.DoesNotExist:
-                        pass
+                asset_type = asset_types.get(int(row['asset_type_id'])) if row['asset_type_id'] else None
                         
-                material = None
-                if row['material_id']:
-                    try:
-                        material = Material.objects.get(id=int(row['material_id']))
-                    except Material.DoesNotExist:
-                        pass
+                material = materials.get(int(row['material_id'])) if row['material_id'] else None
                         
-                content = None
-                if row['content_id']:
-                    try:
-                        content = Content.objects.get(id=int(row['content_id']))
-                    except Content.DoesNotExist:
-                        pass
+                content = contents.get(int(row['content_id'])) if row['content_id'] else None
                         
                 Asset.objects.update_or_create(
                     asset_id=row['asset_id'],
@@ -359,12 +335,7 @@ class Command(BaseCommand):
                     except Asset.DoesNotExist:
                         continue
                         
-                event_type = None
-                if row['event_type_id']:
-                    try:
-                        event_type = EventType.objects.get(id=int(row['event_type_id']))
-                    except EventType.DoesNotExist:
-                        pass
+                event_type = event_types.get(int(row['event_type_id'])) if row['event_type_id'] else None
                         
                 AssetEvents.objects.update_or_create(
                     event_id=row['event_id'],
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Django management command to build the text index of the farm layout PDFs
+Usage: python manage.py index_layouts [--force]
+
+Extracts the text of every layout in static/uploads/farm_layouts into the
+LayoutToken index behind /api/layouts/search. Files unchanged since they were
+last indexed are skipped and layouts that were deleted are dropped.
+"""
+
+from django.core.management.base import BaseCommand
+from core.layout_search import refresh_layout_search
+from core.models import LayoutDocument
+
+
+class Command(BaseCommand):
+    help = 'Index the text of the farm layout PDFs for /api/layouts/search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Reindex every layout, changed or not'
+        )
+
+    def handle(self, *args, **options):
+        result = refresh_layout_search(force=options['force'])
+        documents = LayoutDocument.objects.filter(farm_id__in=result['indexed'])
+        for document in documents.order_by('farm_id'):
+            if document.error:
+                self.stdout.write(self.style.ERROR(f'{document.farm_id}: {document.error}'))
+            else:
+                tokens = document.tokens.count()
+                self.stdout.write(f'{document.farm_id}: {document.page_count} pages, {tokens} tokens')
+        for farm_id in result['removed']:
+            self.stdout.write(f'{farm_id}: removed')
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(result['indexed'])} layouts, "
+            f"{len(result['unchanged'])} unchanged, {len(result['removed'])} removed"
+        ))
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Django management command to linearize the farm layout PDFs
+Usage: python manage.py linearize_layouts [--check] [--farm FARM_ID]
+
+Reports every layout PDF that is not linearized (or whose linearization was
+broken by a later incremental update) and rewrites it linearized, with
+compressed object streams, so viewers can show page one from the first range
+requests. Needs pikepdf or the qpdf command for rewriting.
+"""
+
+import os
+from django.core.management.base import BaseCommand, CommandError
+from core.file_index import FARM_LAYOUTS_DIR, layout_index
+from core.pdf import LINEARIZED, linearization, linearize, linearizer
+
+
+class Command(BaseCommand):
+    help = 'Report and rewrite farm layout PDFs that are not linearized'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report; exit with an error if any layout is not linearized'
+        )
+        parser.add_argument(
+            '--farm',
+            action='append',
+            dest='farms',
+            help='Only this farm (may be repeated)'
+        )
+
+    def handle(self, *args, **options):
+        farm_ids = options['farms'] or layout_index.names()
+        pending = []
+        for farm_id in farm_ids:
+            path = os.path.join(FARM_LAYOUTS_DIR, f'{farm_id}.pdf')
+            if not os.path.isfile(path):
+                self.stdout.write(self.style.WARNING(f'{farm_id}: no layout'))
+                continue
+            state = linearization(path)
+            if state != LINEARIZED:
+                pending.append(path)
+                self.stdout.write(f'{farm_id}: {state}')
+
+        self.stdout.write(f'{len(pending)} of {len(farm_ids)} layouts need linearizing')
+        if options['check']:
+            if pending:
+                raise CommandError(f'{len(pending)} layouts are not linearized')
+            return
+        if not pending:
+            return
+        if linearizer() is None:
+            raise CommandError('Install pikepdf or qpdf to rewrite the layouts')
+
+        rewritten = 0
+        for path in pending:
+            name = os.path.basename(path)
+            tmp = path + '.tmp'
+            try:
+                linearize(path, tmp)
+            except RuntimeError as e:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                self.stdout.write(self.style.ERROR(f'{name}: {e}'))
+                continue
+            if linearization(tmp) != LINEARIZED:
+                os.remove(tmp)
+                self.stdout.write(self.style.ERROR(f'{name}: output is not linearized, kept original'))
+                continue
+            before = os.path.getsize(path)
+            after = os.path.getsize(tmp)
+            os.replace(tmp, path)
+            rewritten += 1
+            self.stdout.write(f'{name}: {before:,} -> {after:,} bytes')
+
+        layout_index.refresh(force=True)
+        self.stdout.write(self.style.SUCCESS(f'Linearized {rewritten} layouts'))
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Django management command to build optimized levels of detail for 3D models
+Usage: python manage.py optimize_models [--kind category] [--name FixedRoofTank] [--levels high,low] [--force]
+
+Each model is deduplicated and quantized (KHR_mesh_quantization), and the
+reduced levels are also decimated; see core.glb. Output goes to
+static/uploads/optimized/<kind>/<name>.<lod>.glb.
+"""
+
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from core.glb import LOD_RESOLUTIONS, GLBError, optimize
+from core.model_registry import MODEL_KINDS, OPTIMIZED_MODELS_DIR
+
+
+class Command(BaseCommand):
+    help = 'Write deduplicated, quantized and decimated levels of detail for every 3D model'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--kind',
+            choices=sorted(MODEL_KINDS),
+            help='Only optimize farm models or asset type (category) models'
+        )
+        parser.add_argument(
+            '--name',
+            type=str,
+            help='Only optimize the model with this name (farm ID or asset type)'
+        )
+        parser.add_argument(
+            '--levels',
+            type=str,
+            default=','.join(LOD_RESOLUTIONS),
+            help='Comma-separated levels of detail to build'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild levels that look up to date'
+        )
+
+    def handle(self, *args, **options):
+        levels = [level.strip() for level in options['levels'].split(',') if level.strip()]
+        unknown = set(levels) - set(LOD_RESOLUTIONS)
+        if unknown:
+            raise CommandError(f'Unknown levels: {", ".join(sorted(unknown))}')
+
+        kinds = [options['kind']] if options['kind'] else list(MODEL_KINDS)
+        total_in = total_out = 0
+        for kind in kinds:
+            directory = MODEL_KINDS[kind]
+            if not os.path.isdir(directory):
+                continue
+            output_dir = os.path.join(OPTIMIZED_MODELS_DIR, kind)
+            os.makedirs(output_dir, exist_ok=True)
+            for filename in sorted(os.listdir(directory)):
+                name = filename[:-len('.glb')]
+                if not filename.endswith('.glb') or options['name'] not in (None, name):
+                    continue
+                source_size, output_size = self.optimize_model(
+                    os.path.join(directory, filename), output_dir, name, levels, options['force']
+                )
+                total_in += source_size
+                total_out += output_size
+
+        if total_in:
+            self.stdout.write(self.style.SUCCESS(
+                f'Built {total_out:,} bytes of models from {total_in:,} bytes of sources '
+                f'({self.saving(total_in, total_out)})'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING('Nothing to optimize'))
+
+    def optimize_model(self, path, output_dir, name, levels, force):
+        """Build each level of one model; returns (source bytes, output bytes) built."""
+        stat = os.stat(path)
+        data = None
+        source_size = output_size = 0
+        for level in levels:
+            target = os.path.join(output_dir, f'{name}.{level}.glb')
+            try:
+                up_to_date = os.stat(target).st_mtime_ns == stat.st_mtime_ns
+            except FileNotFoundError:
+                up_to_date = False
+            if up_to_date and not force:
+                continue
+
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            started = time.monotonic()
+            try:
+                optimized = optimize(data, LOD_RESOLUTIONS[level])
+            except GLBError as e:
+                self.stdout.write(self.style.ERROR(f'{name}: skipped, {e}'))
+                return source_size, output_size
+
+            tmp = target + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(optimized)
+            # Same mtime as the source marks the level as up to date
+            os.utime(tmp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(tmp, target)
+            source_size += len(data)
+            output_size += len(optimized)
+            self.stdout.write(
+                f'{name} [{level}]: {len(data):,} -> {len(optimized):,} bytes '
+                f'({self.saving(len(data), len(optimized))}, {time.monotonic() - started:.1f}s)'
+            )
+        return source_size, output_size
+
+    @staticmethod
+    def saving(before, after):
+        return f'{100 * (before - after) / before:.1f}% smaller'
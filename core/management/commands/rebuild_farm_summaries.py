@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""
+Django management command to recompute every farm summary
+Usage: python manage.py rebuild_farm_summaries
+
+FarmSummary rows are kept current by the Asset/AssetEvents signal handlers;
+run this after bulk imports, raw SQL or queryset updates, which bypass them,
+or after renaming an asset type.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.farm_summary import rebuild_farm_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute the FarmSummary row of every farm'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_farm_summaries()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} farm summaries'))
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Django management command to index the metadata of every 3D model
+Usage: python manage.py refresh_model_info
+
+Fills the ModelInfo table up front so /api/model-info never has to read a
+model file on a request; unchanged files are skipped.
+"""
+
+from django.core.management.base import BaseCommand
+from core.glb import GLBError
+from core.model_info import refresh_model_info
+from core.model_registry import registry
+
+
+class Command(BaseCommand):
+    help = 'Refresh the cached GLB metadata of every farm and asset type model'
+
+    def handle(self, *args, **options):
+        registry.refresh(force=True)
+        count = 0
+        for model in registry.models():
+            try:
+                rows = refresh_model_info(model)
+            except GLBError as e:
+                self.stdout.write(self.style.ERROR(f'{model.kind}/{model.name}: {e}'))
+                continue
+            count += len(rows)
+            info = rows['']
+            self.stdout.write(
+                f'{model.kind}/{model.name}: {info.triangle_count:,} triangles, '
+                f'{info.file_size:,} bytes, {len(rows) - 1} levels of detail'
+            )
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} model files'))
@@ -1,96 +1,80 @@
 #!/usr/bin/env python3
 """
 Django management command to set up 3D model files for production
-Usage: python manage.py setup_model_files
+Usage: python manage.py setup_model_files [--source-dir DIR --kind KIND] [--gc]
+
+Adds the farm models, asset type models and farm layouts under static/uploads
+(or the .glb/.pdf files of --source-dir) to the content-addressed store in
+core.blob_store. Content that is already stored is not written again, so
+re-running the command only costs hashing the files.
+
+The model and layout endpoints still serve static/uploads, so this is not part
+of build.sh: run it when the store is wanted, not on every deploy.
 """
 
 import os
-import shutil
-from django.core.management.base import BaseCommand
-from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.blob_store import collect_garbage, store_file, store_root
+from core.file_index import FARM_LAYOUTS_DIR
+from core.model_registry import MODEL_KINDS
+
+SOURCES = dict(MODEL_KINDS, layout=FARM_LAYOUTS_DIR)
+EXTENSIONS = {'farm': '.glb', 'category': '.glb', 'layout': '.pdf'}
 
 
 class Command(BaseCommand):
-    help = 'Set up 3D model files for production environment'
+    help = 'Add the 3D model files and farm layouts to the content-addressed store'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--source-dir',
             type=str,
-            default='/home/iamcerebrocerberus/Dev/Workspace/DigiCoast/tank-asset/static/uploads/model_categories',
-            help='Source directory containing model files'
+            help='Store the files of this directory instead of the static/uploads ones'
+        )
+        parser.add_argument(
+            '--kind',
+            choices=sorted(SOURCES),
+            default='category',
+            help='Kind of the files in --source-dir (default: category)'
+        )
+        parser.add_argument(
+            '--gc',
+            action='store_true',
+            help='Afterwards remove stored content that no file name refers to'
         )
 
     def handle(self, *args, **options):
-        source_dir = options['source_dir']
-        
-        # Create target directories
-        static_target = os.path.join(settings.BASE_DIR, 'static', 'uploads', 'model_categories')
-        media_target = os.path.join(settings.BASE_DIR, 'media', 'model_categories')
-        
-        os.makedirs(static_target, exist_ok=True)
-        os.makedirs(media_target, exist_ok=True)
-        
-        self.stdout.write(f'Source directory: {source_dir}')
-        self.stdout.write(f'Static target: {static_target}')
-        self.stdout.write(f'Media target: {media_target}')
-        
-        if not os.path.exists(source_dir):
-            self.stdout.write(
-                self.style.ERROR(f'Source directory not found: {source_dir}')
-            )
-            return
-        
-        # Copy .glb files
-        copied_files = []
-        for filename in os.listdir(source_dir):
-            if filename.endswith('.glb'):
-                source_file = os.path.join(source_dir, filename)
-                
-                # Copy to media directory (for file field uploads)
-                media_dest = os.path.join(media_target, filename)
-                if not os.path.exists(media_dest):
-                    shutil.copy2(source_file, media_dest)
-                
-                # Static files are already in place
-                
-                copied_files.append(filename)
-                self.stdout.write(f'Copied: {filename}')
-        
-        if copied_files:
-            self.stdout.write(
-                self.style.SUCCESS(f'Successfully copied {len(copied_files)} model files')
-            )
-            
-            # Show instructions
-            self.stdout.write('\n' + '='*60)
-            self.stdout.write('PRODUCTION SETUP INSTRUCTIONS:')
-            self.stdout.write('='*60)
-            self.stdout.write('')
-            self.stdout.write('1. DATA MIGRATION:')
-            self.stdout.write('   - Upload production_data_export.zip to production server')
-            self.stdout.write('   - Use Django admin Data Management to import the ZIP file')
-            self.stdout.write('')
-            self.stdout.write('2. MODEL FILES:')
-            self.stdout.write('   - Copy these files to production:')
-            for filename in copied_files:
-                self.stdout.write(f'     • {filename}')
-            self.stdout.write('')
-            self.stdout.write('   - Place them in both:')
-            self.stdout.write('     • /path/to/production/static/uploads/model_categories/')
-            self.stdout.write('     • /path/to/production/media/model_categories/')
-            self.stdout.write('')
-            self.stdout.write('3. VERIFY ENDPOINTS:')
-            self.stdout.write('   - GET /api/asset-model/Compressor')
-            self.stdout.write('   - GET /api/asset-model/FixedRoofTank')
-            self.stdout.write('   - GET /api/asset-model/HeatExchanger')
-            self.stdout.write('   - GET /api/asset/SYS-1D3407DB-F-13083-A-06527')
-            self.stdout.write('')
-            self.stdout.write('4. COLLECTSTATIC:')
-            self.stdout.write('   - Run: python manage.py collectstatic')
-            self.stdout.write('')
-            
+        if options['source_dir']:
+            sources = {options['kind']: options['source_dir']}
+            if not os.path.isdir(options['source_dir']):
+                raise CommandError(f'Source directory not found: {options["source_dir"]}')
         else:
-            self.stdout.write(
-                self.style.WARNING('No .glb files found to copy')
-            )
\ No newline at end of file
+            sources = SOURCES
+
+        self.stdout.write(f'Store: {store_root()}')
+        stored = written = deduplicated_bytes = 0
+        for kind, directory in sources.items():
+            if not os.path.isdir(directory):
+                continue
+            extension = EXTENSIONS[kind]
+            for filename in sorted(os.listdir(directory)):
+                if not filename.endswith(extension):
+                    continue
+                name = filename[:-len(extension)]
+                row, created = store_file(kind, name, os.path.join(directory, filename))
+                stored += 1
+                if created:
+                    written += 1
+                    self.stdout.write(f'Stored: {kind}/{name} ({row.size:,} bytes)')
+                else:
+                    deduplicated_bytes += row.size
+                    self.stdout.write(f'Already stored: {kind}/{name}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{stored} files stored, {written} new blobs, '
+            f'{deduplicated_bytes:,} bytes not written again'
+        ))
+
+        if options['gc']:
+            count, freed = collect_garbage()
+            self.stdout.write(f'Removed {count} unreferenced blobs ({freed:,} bytes)')
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-16 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_asset_updated_at_assetevents_updated_at_farm_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelInfo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('name', models.CharField(max_length=200)),
+                ('lod', models.CharField(blank=True, default='', max_length=20)),
+                ('file_size', models.BigIntegerField()),
+                ('file_mtime_ns', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('generator', models.CharField(blank=True, default='', max_length=200)),
+                ('bbox_min', models.JSONField(blank=True, null=True)),
+                ('bbox_max', models.JSONField(blank=True, null=True)),
+                ('node_count', models.PositiveIntegerField(default=0)),
+                ('mesh_count', models.PositiveIntegerField(default=0)),
+                ('primitive_count', models.PositiveIntegerField(default=0)),
+                ('vertex_count', models.PositiveBigIntegerField(default=0)),
+                ('triangle_count', models.PositiveBigIntegerField(default=0)),
+                ('material_count', models.PositiveIntegerField(default=0)),
+                ('textures', models.JSONField(blank=True, default=list)),
+                ('extensions', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'model_info',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'name', 'lod'), name='model_info_unique_file')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.5 on 2026-10-16 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_storedfile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LayoutDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('farm_id', models.CharField(max_length=200, unique=True)),
+                ('file_size', models.BigIntegerField()),
+                ('file_mtime_ns', models.BigIntegerField()),
+                ('page_count', models.PositiveIntegerField(default=0)),
+                ('error', models.CharField(blank=True, default='', max_length=200)),
+                ('indexed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'layout_documents',
+            },
+        ),
+        migrations.CreateModel(
+            name='LayoutToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=100)),
+                ('page', models.PositiveIntegerField()),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='core.layoutdocument')),
+            ],
+            options={
+                'db_table': 'layout_tokens',
+                'indexes': [models.Index(fields=['token'], name='layout_token_idx')],
+                'constraints': [models.UniqueConstraint(fields=('document', 'token', 'page'), name='layout_token_unique_page')],
+            },
+        ),
+    ]
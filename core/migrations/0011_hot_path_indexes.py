@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-16 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_layoutdocument_layouttoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='farm',
+            index=models.Index(fields=['company_id'], name='farm_company_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['farm', 'status'], name='asset_farm_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['company_id', 'status'], name='asset_company_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assetevents',
+            index=models.Index(fields=['asset', 'start_date'], name='asset_event_start_idx'),
+        ),
+    ]
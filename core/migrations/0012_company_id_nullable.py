@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-16 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_hot_path_indexes'),
+    ]
+
+    operations = [
+        # Blank IDs become NULL in 0013; the explicit db_column keeps the
+        # column name through the rename to a foreign key in 0014
+        migrations.AlterField(
+            model_name='farm',
+            name='company_id',
+            field=models.CharField(blank=True, db_column='company_id', max_length=200, null=True),
+        ),
+        migrations.AlterField(
+            model_name='asset',
+            name='company_id',
+            field=models.CharField(blank=True, db_column='company_id', max_length=200, null=True),
+        ),
+    ]
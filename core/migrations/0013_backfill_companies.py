@@ -0,0 +1,70 @@
+# Generated by Django 5.2.5 on 2026-10-16 18:40
+
+from collections import Counter
+
+from django.db import migrations, transaction
+
+
+# Rows per transaction: each batch commits on its own, so no lock is held on
+# the whole farms or assets table
+BATCH_SIZE = 1000
+PLACEHOLDER_NAME = 'Unknown company {}'
+
+
+def _pk_batches(model):
+    """Primary keys of every row of ``model``, BATCH_SIZE at a time, in pk order."""
+    last = None
+    while True:
+        rows = model.objects.order_by('pk')
+        if last is not None:
+            rows = rows.filter(pk__gt=last)
+        pks = list(rows.values_list('pk', flat=True)[:BATCH_SIZE])
+        if not pks:
+            return
+        yield pks
+        last = pks[-1]
+
+
+def backfill_companies(apps, schema_editor):
+    """
+    Make every farm and asset company_id point at a Company row: blank IDs
+    become NULL, and IDs with no company get a placeholder company, listed
+    at the end for someone to merge or fill in.
+    """
+    Company = apps.get_model('core', 'Company')
+    known = set(Company.objects.values_list('company_id', flat=True))
+    orphans = Counter()
+
+    for model in (apps.get_model('core', 'Farm'), apps.get_model('core', 'Asset')):
+        for pks in _pk_batches(model):
+            with transaction.atomic():
+                rows = model.objects.filter(pk__in=pks)
+                rows.filter(company_id='').update(company_id=None)
+                missing = Counter(
+                    company_id for company_id in rows.values_list('company_id', flat=True)
+                    if company_id is not None and company_id not in known
+                )
+                if missing:
+                    Company.objects.bulk_create([
+                        Company(company_id=company_id, name=PLACEHOLDER_NAME.format(company_id)[:100])
+                        for company_id in missing
+                    ], ignore_conflicts=True)
+                    known.update(missing)
+                    orphans.update(missing)
+
+    if orphans:
+        print(f'\n  Created {len(orphans)} placeholder companies for orphaned company IDs:')
+        for company_id, count in sorted(orphans.items()):
+            print(f'    {company_id}: {count} farms/assets')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0012_company_id_nullable'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_companies, migrations.RunPython.noop),
+    ]
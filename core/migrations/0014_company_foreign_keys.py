@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-16 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_backfill_companies'),
+    ]
+
+    operations = [
+        # Replaced by the foreign key's own index
+        migrations.RemoveIndex(
+            model_name='farm',
+            name='farm_company_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='asset',
+            name='asset_company_status_idx',
+        ),
+        migrations.RenameField(
+            model_name='farm',
+            old_name='company_id',
+            new_name='company',
+        ),
+        migrations.RenameField(
+            model_name='asset',
+            old_name='company_id',
+            new_name='company',
+        ),
+        migrations.AlterField(
+            model_name='farm',
+            name='company',
+            field=models.ForeignKey(blank=True, db_column='company_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='farms', to='core.company'),
+        ),
+        migrations.AlterField(
+            model_name='asset',
+            name='company',
+            field=models.ForeignKey(blank=True, db_column='company_id', db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assets', to='core.company'),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(fields=['company', 'status'], name='asset_company_status_idx'),
+        ),
+    ]
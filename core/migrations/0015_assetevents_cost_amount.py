@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-16 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_company_foreign_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assetevents',
+            name='cost_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.5 on 2026-10-16 19:20
+
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, transaction
+
+
+# Events per transaction, so the backfill never locks the whole table
+BATCH_SIZE = 1000
+# Unparseable costs listed in the report
+MAX_REPORTED = 20
+
+# The parser as of this migration (core.costs.parse_cost may change later)
+COST_QUANTUM = Decimal('0.01')
+MAX_COST = Decimal(10) ** 12
+NUMBER_RE = re.compile(r'\d[\d.,\s\']*')
+
+
+def _normalize_separators(number):
+    number = re.sub(r"[\s']", '', number).rstrip('.,')
+    if ',' in number and '.' in number:
+        if number.rfind(',') > number.rfind('.'):
+            number = number.replace('.', '').replace(',', '.')
+        else:
+            number = number.replace(',', '')
+    elif ',' in number:
+        groups = number.split(',')
+        if len(groups) == 2 and len(groups[1]) != 3:
+            number = '.'.join(groups)
+        else:
+            number = ''.join(groups)
+    elif number.count('.') > 1:
+        number = number.replace('.', '')
+    return number
+
+
+def parse_cost(value):
+    if value is None:
+        return None
+    text = str(value).strip()
+    match = NUMBER_RE.search(text)
+    if match is None:
+        return None
+    try:
+        amount = Decimal(_normalize_separators(match.group()))
+    except InvalidOperation:
+        return None
+    before = text[:match.start()]
+    if '-' in before or (text.startswith('(') and text.endswith(')')):
+        amount = -amount
+    if abs(amount) >= MAX_COST:
+        return None
+    return amount.quantize(COST_QUANTUM)
+
+
+def backfill_cost_amount(apps, schema_editor):
+    """Parse every event's free-text ``cost`` into ``cost_amount``, in batches."""
+    AssetEvents = apps.get_model('core', 'AssetEvents')
+    events = AssetEvents.objects.exclude(cost__isnull=True).exclude(cost='').order_by('pk')
+    unparsed = {}
+    parsed = 0
+    last = None
+    while True:
+        batch = events.filter(pk__gt=last) if last is not None else events
+        batch = list(batch.only('pk', 'cost')[:BATCH_SIZE])
+        if not batch:
+            break
+        last = batch[-1].pk
+        for event in batch:
+            event.cost_amount = parse_cost(event.cost)
+            if event.cost_amount is None:
+                unparsed.setdefault(event.cost, event.pk)
+            else:
+                parsed += 1
+        with transaction.atomic():
+            AssetEvents.objects.bulk_update(batch, ['cost_amount'])
+
+    print(f'\n  Parsed {parsed} event costs')
+    if unparsed:
+        print(f'  {len(unparsed)} distinct costs have no usable amount and were left empty, e.g.:')
+        for cost, event_id in list(unparsed.items())[:MAX_REPORTED]:
+            print(f'    {cost!r} (event {event_id})')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('core', '0015_assetevents_cost_amount'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_cost_amount, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-16 20:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_backfill_cost_amount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FarmSummary',
+            fields=[
+                ('farm', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='core.farm')),
+                ('asset_count', models.PositiveIntegerField(default=0)),
+                ('assets_by_status', models.JSONField(blank=True, default=dict)),
+                ('assets_by_type', models.JSONField(blank=True, default=dict)),
+                ('health_avg', models.FloatField(blank=True, null=True)),
+                ('health_min', models.IntegerField(blank=True, null=True)),
+                ('total_capacity', models.FloatField(default=0)),
+                ('total_current_volume', models.FloatField(default=0)),
+                ('open_event_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'farm_summaries',
+            },
+        ),
+    ]
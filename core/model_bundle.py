@@ -0,0 +1,123 @@
+"""
+Zip bundles of every file the viewer needs to open a farm.
+
+A bundle holds the category model of each asset type used by the farm's
+assets, the farm model and the farm layout PDF (when they exist), and a
+``manifest.json`` listing them with their SHA-256 and content-hashed URLs. It
+replaces one request per asset type with a single download.
+
+Bundles are written to MEDIA_ROOT/model_bundles under a hash of their content
+set -- the files' names and hashes -- so a bundle is built once and reused
+until a model is replaced or the farm starts or stops using an asset type.
+Each level of detail has its own bundle.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import zipfile
+
+from django.conf import settings
+
+from .farm_scene import category_model_name
+from .file_index import farm_layout_url, layout_index
+from .model_registry import file_sha256, registry as model_registry
+
+
+BUNDLE_DIRECTORY = 'model_bundles'
+# Zip entries get a fixed timestamp so that equal content gives an equal file
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+def bundle_directory():
+    return os.path.join(settings.MEDIA_ROOT, BUNDLE_DIRECTORY)
+
+
+def layout_stamp(farm_id):
+    """``size-mtime`` of the farm layout PDF, '' if there is none."""
+    stat = layout_index.stat(farm_id)
+    return f'{stat.st_size}-{stat.st_mtime_ns}' if stat else ''
+
+
+def bundle_entries(farm_id, asset_type_names, lod=None):
+    """
+    ``[(archive path, file path, manifest entry)]`` of the files in the
+    bundle of ``farm_id``; models at ``lod`` where built.
+    """
+    entries = []
+    names = sorted({category_model_name(name) for name in asset_type_names if name})
+    for kind, name in [('farm', farm_id)] + [('category', name) for name in names]:
+        model = model_registry.get(kind, name)
+        if model is None:
+            continue
+        variant = model.lods.get(lod, model)
+        entries.append((f'models/{kind}/{name}.glb', variant.path, {
+            'kind': kind, 'name': name, 'lod': variant.lod or 'original',
+            'sha256': variant.sha256, 'size': variant.stat.st_size, 'url': variant.url,
+        }))
+
+    layout = layout_index.path(farm_id)
+    if layout is not None:
+        # Hashed only when a bundle is written; the stamp identifies it until then
+        entries.append((f'layouts/{farm_id}.pdf', layout, {
+            'kind': 'layout', 'name': farm_id, 'stamp': layout_stamp(farm_id),
+            'size': layout_index.stat(farm_id).st_size,
+            'url': farm_layout_url(farm_id),
+        }))
+    return entries
+
+
+def _write_bundle(path, farm_id, entries):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with zipfile.ZipFile(tmp, 'w', allowZip64=True) as bundle:
+        files = []
+        for arcname, source, entry in entries:
+            entry = dict(entry, path=arcname)
+            if 'stamp' in entry:
+                del entry['stamp']
+                entry['sha256'] = file_sha256(source)
+            files.append(entry)
+        manifest = {'farm_id': farm_id, 'files': files}
+        info = zipfile.ZipInfo('manifest.json', ZIP_DATE_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        bundle.writestr(info, json.dumps(manifest, indent=2))
+        for arcname, source, _ in entries:
+            info = zipfile.ZipInfo(arcname, ZIP_DATE_TIME)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with open(source, 'rb') as src, bundle.open(info, 'w', force_zip64=True) as dst:
+                shutil.copyfileobj(src, dst, COPY_BLOCK_SIZE)
+    os.replace(tmp, path)
+
+
+def model_bundle_path(farm_id, asset_type_names, lod=None):
+    """
+    Path of the up-to-date bundle of ``farm_id``, writing it if needed. None
+    if the farm has no model, layout or asset type model at all.
+    """
+    entries = bundle_entries(farm_id, asset_type_names, lod)
+    if not entries:
+        return None
+    sha = hashlib.sha256()
+    for arcname, _, entry in entries:
+        sha.update(f'{arcname}:{entry.get("sha256") or entry["stamp"]}\n'.encode())
+    digest = sha.hexdigest()[:16]
+
+    directory = bundle_directory()
+    prefix = f'{farm_id}.{lod or "original"}.'
+    path = os.path.join(directory, f'{prefix}{digest}.zip')
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    _write_bundle(path, farm_id, entries)
+    # Only this level of detail: other lods are separate, current bundles
+    for filename in os.listdir(directory):
+        if (filename.startswith(prefix) and filename.endswith('.zip')
+                and filename != os.path.basename(path)):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+    return path
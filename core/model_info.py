@@ -0,0 +1,82 @@
+"""
+GLB metadata for the registered 3D models, cached in the ModelInfo table.
+
+``refresh_model_info`` compares each file's size and mtime (already known to
+the model registry, so no file system access) with its row and only re-reads
+the GLB header and JSON chunk (core.glb.read_metadata) for new or changed
+files. ``manage.py refresh_model_info`` runs it for every model at deploy, so
+the endpoint normally only reads rows (``model_info_rows``).
+"""
+
+from .glb import read_metadata
+from .models import ModelInfo
+
+
+def _fill(row, variant):
+    metadata = read_metadata(variant.path)
+    bounding_box = metadata['bounding_box'] or {}
+    row.file_size = variant.stat.st_size
+    row.file_mtime_ns = variant.stat.st_mtime_ns
+    row.sha256 = variant.sha256
+    row.generator = metadata['generator'][:200]
+    row.bbox_min = bounding_box.get('min')
+    row.bbox_max = bounding_box.get('max')
+    for field in ('node_count', 'mesh_count', 'primitive_count', 'vertex_count',
+                  'triangle_count', 'material_count', 'textures', 'extensions'):
+        setattr(row, field, metadata[field])
+
+
+def _is_current(row, variant):
+    return (row is not None and row.file_mtime_ns == variant.stat.st_mtime_ns
+            and row.file_size == variant.stat.st_size)
+
+
+def refresh_model_info(model, rows=None):
+    """
+    Up-to-date ModelInfo rows for a registry ``ModelFile`` and its levels of
+    detail, keyed by level ('' for the original). ``rows`` are its stored
+    rows, when already fetched.
+    """
+    if rows is None:
+        rows = {row.lod: row for row in ModelInfo.objects.filter(kind=model.kind, name=model.name)}
+    current = {}
+    new = []
+    for variant in model.variants:
+        lod = variant.lod or ''
+        row = rows.get(lod)
+        if row is None:
+            row = ModelInfo(kind=model.kind, name=model.name, lod=lod)
+            _fill(row, variant)
+            new.append(row)
+        elif not _is_current(row, variant):
+            _fill(row, variant)
+            row.save()
+        current[lod] = row
+    if new:
+        # A concurrent first request may insert the same rows: keep whichever
+        # landed first (both were read from the same file)
+        ModelInfo.objects.bulk_create(new, ignore_conflicts=True)
+        current.update(
+            (row.lod, row) for row in ModelInfo.objects.filter(
+                kind=model.kind, name=model.name, lod__in=[row.lod for row in new]
+            )
+        )
+
+    gone = set(rows) - set(current)
+    if gone:
+        ModelInfo.objects.filter(kind=model.kind, name=model.name, lod__in=gone).delete()
+    return current
+
+
+def model_info_rows(model):
+    """
+    The ModelInfo rows of ``model`` as ``refresh_model_info`` returns them, in
+    one query when ``manage.py refresh_model_info`` has already stored them.
+    Only a model added or changed since then is read on the caller's thread.
+    """
+    rows = {row.lod: row for row in ModelInfo.objects.filter(kind=model.kind, name=model.name)}
+    if len(rows) == len(model.variants) and all(
+        _is_current(rows.get(variant.lod or ''), variant) for variant in model.variants
+    ):
+        return rows
+    return refresh_model_info(model, rows)
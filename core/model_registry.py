@@ -0,0 +1,209 @@
+"""
+Registry of the 3D model files under static/uploads.
+
+Every .glb in the farm model and category model directories is hashed with
+SHA-256 once (and again only when its mtime or size changes). The hash gives
+each file a content-addressed URL, ``/api/models/<kind>/<name>/<digest>.glb``,
+which is served with ``Cache-Control: immutable`` so browsers and proxies can
+keep multi-megabyte models forever and only refetch when the content -- and
+therefore the URL -- changes.
+
+The directories are rescanned at most every MODEL_REGISTRY_REFRESH_SECONDS,
+so individual requests no longer stat the file system. The app config warms
+the registry at startup, and later rescans do not block other readers. The
+scan also picks up the ``.glb.gz`` / ``.glb.br`` siblings written by
+``manage.py compress_models``; a sibling only counts while its mtime matches
+the source file's, so a model replaced without recompressing is served
+uncompressed rather than stale.
+Levels of detail written by ``manage.py optimize_models`` are registered with
+their model under the same rule.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .file_serving import ENCODING_SUFFIXES
+from .glb import LOD_RESOLUTIONS
+
+
+FARM_MODELS_DIR = os.path.join(settings.BASE_DIR, 'static', 'uploads', 'farm_models')
+MODEL_CATEGORIES_DIR = os.path.join(settings.BASE_DIR, 'static', 'uploads', 'model_categories')
+
+# Output of manage.py optimize_models: <kind>/<name>.<lod>.glb
+OPTIMIZED_MODELS_DIR = os.path.join(settings.BASE_DIR, 'static', 'uploads', 'optimized')
+
+MODEL_KINDS = {
+    'farm': FARM_MODELS_DIR,
+    'category': MODEL_CATEGORIES_DIR,
+}
+
+DEFAULT_REFRESH_SECONDS = 10
+# Hex digits of the SHA-256 used in content-hashed URLs
+DIGEST_LENGTH = 16
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class ModelFile(NamedTuple):
+    kind: str
+    name: str
+    path: str
+    stat: os.stat_result
+    sha256: str
+    # {content-coding: (path, stat)} of up-to-date pre-compressed copies
+    encodings: dict
+    # {level: ModelFile} of up-to-date levels of detail
+    lods: dict
+    # Level of detail this file is, None for the uploaded original
+    lod: str
+
+    @property
+    def filename(self) -> str:
+        return f'{self.name}.{self.lod}.glb' if self.lod else f'{self.name}.glb'
+
+    @property
+    def variants(self):
+        return (self, *self.lods.values())
+
+    @property
+    def digest(self) -> str:
+        """Short content hash used in URLs."""
+        return self.sha256[:DIGEST_LENGTH]
+
+    @property
+    def url(self) -> str:
+        return hashed_model_url(self.kind, self.name, self.sha256)
+
+
+def hashed_model_url(kind, name, sha256):
+    return f'/api/models/{kind}/{name}/{sha256[:DIGEST_LENGTH]}.glb'
+
+
+def compressed_path(path, encoding):
+    return path + ENCODING_SUFFIXES[encoding]
+
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while block := f.read(HASH_BLOCK_SIZE):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _list_directory(directory):
+    try:
+        return {entry.name: entry for entry in os.scandir(directory)}
+    except FileNotFoundError:
+        return {}
+
+
+class ModelRegistry:
+    def __init__(self, directories, optimized_directory=None, refresh_interval=None):
+        self.directories = directories
+        self.optimized_directory = optimized_directory
+        self.refresh_interval = refresh_interval
+        self._files = {}
+        self._scanned_at = None
+        self._lock = threading.Lock()
+
+    def _interval(self):
+        if self.refresh_interval is not None:
+            return self.refresh_interval
+        return getattr(settings, 'MODEL_REGISTRY_REFRESH_SECONDS', DEFAULT_REFRESH_SECONDS)
+
+    @staticmethod
+    def _model_file(kind, name, entry, entries, previous, lod=None):
+        stat = entry.stat()
+        if (previous and previous.stat.st_mtime_ns == stat.st_mtime_ns
+                and previous.stat.st_size == stat.st_size):
+            sha256 = previous.sha256
+        else:
+            sha256 = file_sha256(entry.path)
+        encodings = {}
+        for encoding, suffix in ENCODING_SUFFIXES.items():
+            sibling = entries.get(entry.name + suffix)
+            if sibling is None:
+                continue
+            sibling_stat = sibling.stat()
+            if sibling_stat.st_mtime_ns == stat.st_mtime_ns:
+                encodings[encoding] = (sibling.path, sibling_stat)
+        return ModelFile(kind, name, entry.path, stat, sha256, encodings, {}, lod)
+
+    def _scan(self):
+        files = {}
+        for kind, directory in self.directories.items():
+            entries = _list_directory(directory)
+            optimized = {}
+            if self.optimized_directory:
+                optimized = _list_directory(os.path.join(self.optimized_directory, kind))
+            for filename, entry in entries.items():
+                if not filename.endswith('.glb') or not entry.is_file():
+                    continue
+                name = filename[:-len('.glb')]
+                previous = self._files.get((kind, name))
+                model = self._model_file(kind, name, entry, entries, previous)
+                for lod in LOD_RESOLUTIONS:
+                    variant = optimized.get(f'{name}.{lod}.glb')
+                    if variant is None or variant.stat().st_mtime_ns != model.stat.st_mtime_ns:
+                        continue
+                    model.lods[lod] = self._model_file(
+                        kind, name, variant, optimized, previous and previous.lods.get(lod), lod
+                    )
+                files[(kind, name)] = model
+        self._files = files
+        self._scanned_at = time.monotonic()
+
+    def refresh(self, force=False):
+        """
+        Rescan when the last scan is older than the refresh interval. Only a
+        cold registry (or ``force``) makes the caller wait for a scan: once
+        warm, one caller rescans while the others keep reading the previous
+        files, which ``_scan`` swaps out in one assignment when done.
+        """
+        if (not force and self._scanned_at is not None
+                and time.monotonic() - self._scanned_at < self._interval()):
+            return
+        if force or self._scanned_at is None:
+            with self._lock:
+                if force or self._scanned_at is None:
+                    self._scan()
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._scanned_at >= self._interval():
+                self._scan()
+        finally:
+            self._lock.release()
+
+    def get(self, kind, name):
+        """The registered ModelFile, or None if there is no such model."""
+        self.refresh()
+        return self._files.get((kind, name))
+
+    def models(self):
+        """Every registered ModelFile, ordered by kind and name."""
+        self.refresh()
+        return [model for _, model in sorted(self._files.items())]
+
+    def manifest(self):
+        """``{kind: {name: {url, sha256, size, lods}}}`` for every registered model."""
+        self.refresh()
+        manifest = {kind: {} for kind in self.directories}
+        for (kind, name), model in sorted(self._files.items()):
+            manifest[kind][name] = dict(_manifest_entry(model), lods={
+                lod: _manifest_entry(variant) for lod, variant in model.lods.items()
+            })
+        return manifest
+
+
+def _manifest_entry(model):
+    return {'url': model.url, 'sha256': model.sha256, 'size': model.stat.st_size}
+
+
+registry = ModelRegistry(MODEL_KINDS, OPTIMIZED_MODELS_DIR)
@@ -134,7 +134,11 @@ class Farm(models.Model):
         db_table = "farms"
 
     farm_id = models.CharField(max_length=200, primary_key=True, editable=False)
-    company_id = models.CharField(max_length=200)  # keep as CharField; can be FK later
+    # The column keeps its name, so ``farm.company_id`` is still the raw ID
+    company = models.ForeignKey(
+        Company, on_delete=models.SET_NULL, null=True, blank=True,
+        db_column="company_id", related_name="farms",
+    )
     location = models.ForeignKey(
         Location, on_delete=models.SET_NULL, null=True, related_name="farms"
     )
@@ -142,6 +146,7 @@ class Farm(models.Model):
     description = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=50)  # active, inactive, under construction
     created_at = models.DateTimeField(default=now)
+    updated_at = models.DateTimeField(auto_now=True)
     operational_since = models.DateField(blank=True, null=True)
     
 
@@ -149,7 +154,7 @@ class Farm(models.Model):
         # Mimic SQLAlchemy before_insert: <company_id>-F-<5char>
         if not self.farm_id:
             unique_part = str(uuid.uuid4()).split("-")[0][:5].upper()
-            self.farm_id = f"{self.company_id}-F-{unique_part}"
+            self.farm_id = f"{self.company_id or 'X'}-F-{unique_part}"
         super().save(*args, **kwargs)
 
     def to_dict(self):  # kept for parity with Flask; DRF serializers will be used
@@ -168,12 +173,31 @@ class Farm(models.Model):
         return f"{self.name} ({self.farm_id})"
 
 
+class AssetQuerySet(models.QuerySet):
+    def with_detail_relations(self):
+        """Everything AssetDetailSerializer touches: one query for the assets
+        (joined with their farm) plus one for their events. Types, locations,
+        materials and contents come from core.reference_cache."""
+        return self.select_related('farm').prefetch_related('events')
+
+
 class Asset(models.Model):
     class Meta:
         db_table = "assets"
+        # Hot paths: a farm's assets, a company's assets, each narrowed by status
+        indexes = [
+            models.Index(fields=["farm", "status"], name="asset_farm_status_idx"),
+            models.Index(fields=["company", "status"], name="asset_company_status_idx"),
+        ]
+
+    objects = AssetQuerySet.as_manager()
 
     asset_id = models.CharField(max_length=200, primary_key=True, editable=False)
-    company_id = models.CharField(max_length=200)  # keep as CharField; can be FK later
+    # Indexed by asset_company_status_idx
+    company = models.ForeignKey(
+        Company, on_delete=models.SET_NULL, null=True, blank=True, db_index=False,
+        db_column="company_id", related_name="assets",
+    )
     location = models.ForeignKey(
         Location, on_delete=models.SET_NULL, null=True, related_name="assets"
     )
@@ -195,6 +219,7 @@ class Asset(models.Model):
 
     status = models.CharField(max_length=50)
     created_at = models.DateTimeField(default=now)
+    updated_at = models.DateTimeField(auto_now=True)
 
     latitude = models.FloatField(blank=True, null=True)
     longitude = models.FloatField(blank=True, null=True)
@@ -231,6 +256,10 @@ class Asset(models.Model):
 class AssetEvents(models.Model):
     class Meta:
         db_table = "asset_events"
+        # An asset's events by date
+        indexes = [
+            models.Index(fields=["asset", "start_date"], name="asset_event_start_idx"),
+        ]
 
     event_id = models.CharField(max_length=200, primary_key=True)
     asset = models.ForeignKey(
@@ -252,7 +281,147 @@ class AssetEvents(models.Model):
     description = models.TextField(blank=True, null=True)
     performed_by = models.CharField(max_length=100, blank=True, null=True)
     created_at = models.DateTimeField(default=now)
+    updated_at = models.DateTimeField(auto_now=True)
     cost = models.CharField(max_length=50, blank=True, null=True)
+    # ``cost`` parsed by core.costs.parse_cost on save, for aggregation in SQL
+    cost_amount = models.DecimalField(max_digits=14, decimal_places=2, blank=True, null=True)
 
     def __str__(self) -> str:
         return f"{self.title} ({self.event_id})"
+
+
+# --- Derived data -------------------------------------------------------------
+
+class ModelInfo(models.Model):
+    """Metadata of a 3D model file, re-read when the file changes (core.model_info)."""
+
+    class Meta:
+        db_table = "model_info"
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "name", "lod"], name="model_info_unique_file"),
+        ]
+
+    kind = models.CharField(max_length=20)
+    name = models.CharField(max_length=200)
+    # Level of detail, empty for the uploaded original
+    lod = models.CharField(max_length=20, blank=True, default="")
+    file_size = models.BigIntegerField()
+    file_mtime_ns = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+    generator = models.CharField(max_length=200, blank=True, default="")
+    bbox_min = models.JSONField(blank=True, null=True)
+    bbox_max = models.JSONField(blank=True, null=True)
+    node_count = models.PositiveIntegerField(default=0)
+    mesh_count = models.PositiveIntegerField(default=0)
+    primitive_count = models.PositiveIntegerField(default=0)
+    vertex_count = models.PositiveBigIntegerField(default=0)
+    triangle_count = models.PositiveBigIntegerField(default=0)
+    material_count = models.PositiveIntegerField(default=0)
+    textures = models.JSONField(default=list, blank=True)
+    extensions = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        label = f"{self.kind}/{self.name}"
+        return f"{label} [{self.lod}]" if self.lod else label
+
+
+# --- Content-addressed files ----------------------------------------------------
+
+class StoredFile(models.Model):
+    """
+    A logical file name mapped to a blob of the content-addressed store
+    (core.blob_store). Any number of names can share one blob, so copies and
+    renames only touch this table.
+    """
+
+    class Meta:
+        db_table = "stored_files"
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "name"], name="stored_file_unique_name"),
+        ]
+        indexes = [models.Index(fields=["sha256"], name="stored_file_sha256_idx")]
+
+    # "farm", "category" (see core.model_registry.MODEL_KINDS) or "layout"
+    kind = models.CharField(max_length=20)
+    name = models.CharField(max_length=200)
+    sha256 = models.CharField(max_length=64)
+    size = models.BigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    created_at = models.DateTimeField(default=now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.kind}/{self.name} ({self.sha256[:12]})"
+
+
+# --- Layout text index ----------------------------------------------------------
+
+class LayoutDocument(models.Model):
+    """A farm layout PDF whose text is in the LayoutToken index (core.layout_search)."""
+
+    class Meta:
+        db_table = "layout_documents"
+
+    farm_id = models.CharField(max_length=200, unique=True)
+    file_size = models.BigIntegerField()
+    file_mtime_ns = models.BigIntegerField()
+    page_count = models.PositiveIntegerField(default=0)
+    # Why the text could not be read, if it could not
+    error = models.CharField(max_length=200, blank=True, default="")
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return self.farm_id
+
+
+class LayoutToken(models.Model):
+    """Inverted index entry: ``token`` occurs ``count`` times on ``page`` of ``document``."""
+
+    class Meta:
+        db_table = "layout_tokens"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["document", "token", "page"], name="layout_token_unique_page"
+            ),
+        ]
+        indexes = [models.Index(fields=["token"], name="layout_token_idx")]
+
+    document = models.ForeignKey(
+        LayoutDocument, on_delete=models.CASCADE, related_name="tokens"
+    )
+    # Upper-cased, e.g. "FIX-03E9A2"
+    token = models.CharField(max_length=100)
+    page = models.PositiveIntegerField()
+    count = models.PositiveIntegerField(default=1)
+
+    def __str__(self) -> str:
+        return f"{self.token} @ {self.document_id}:{self.page}"
+
+
+# --- Farm summaries -------------------------------------------------------------
+
+class FarmSummary(models.Model):
+    """Dashboard figures of one farm, kept current by core.farm_summary."""
+
+    class Meta:
+        db_table = "farm_summaries"
+
+    farm = models.OneToOneField(
+        Farm, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    asset_count = models.PositiveIntegerField(default=0)
+    # {"active": 12, "maintenance": 2}; statuses are lower-cased
+    assets_by_status = models.JSONField(default=dict, blank=True)
+    # {"Fixed Roof Tank": 9, "Untyped": 1}
+    assets_by_type = models.JSONField(default=dict, blank=True)
+    health_avg = models.FloatField(blank=True, null=True)
+    health_min = models.IntegerField(blank=True, null=True)
+    total_capacity = models.FloatField(default=0)
+    total_current_volume = models.FloatField(default=0)
+    # Events whose status is not "completed"
+    open_event_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Summary of {self.farm_id}"
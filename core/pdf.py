@@ -0,0 +1,463 @@
+"""
+Farm layout PDF helpers.
+
+``linearization`` tells whether a PDF is linearized ("fast web view"): its
+first object is a linearization dictionary whose ``/L`` is the file length. A
+viewer fetching such a file with range requests can render page one before
+the rest has arrived. An incremental update appended after linearizing makes
+``/L`` stale and the hints useless, so that is reported separately.
+
+``linearize`` rewrites a PDF linearized with compressed object streams, using
+pikepdf when it is installed and the ``qpdf`` command otherwise.
+
+``extract_text`` is a small pure-Python text extractor for the layout index
+(core.layout_search): it reads shown text (through ToUnicode maps where fonts
+have them) and link targets page by page. Scanned or rasterized content has
+no text to extract.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import zlib
+
+try:
+    import pikepdf
+except ImportError:
+    pikepdf = None
+
+
+LINEARIZED = 'linearized'
+STALE = 'stale'
+NOT_LINEARIZED = 'not linearized'
+
+# The linearization dictionary must be the first object, within the first 1 KiB
+HEADER_BYTES = 1024
+FIRST_OBJECT_RE = re.compile(rb'\d+\s+\d+\s+obj\s*<<(.*?)>>', re.S)
+LENGTH_RE = re.compile(rb'/L\s+(\d+)')
+
+
+def linearization(path):
+    """LINEARIZED, STALE or NOT_LINEARIZED for the PDF at ``path``."""
+    with open(path, 'rb') as f:
+        header = f.read(HEADER_BYTES)
+        size = os.fstat(f.fileno()).st_size
+    match = FIRST_OBJECT_RE.search(header)
+    if match is None or b'/Linearized' not in match.group(1):
+        return NOT_LINEARIZED
+    length = LENGTH_RE.search(match.group(1))
+    if length is None or int(length.group(1)) != size:
+        return STALE
+    return LINEARIZED
+
+
+def linearizer():
+    """Name of the available linearizer ('pikepdf' or 'qpdf'), None if there is none."""
+    if pikepdf is not None:
+        return 'pikepdf'
+    if shutil.which('qpdf'):
+        return 'qpdf'
+    return None
+
+
+def linearize(source, target):
+    """
+    Write ``source`` to ``target`` linearized, with object streams. Raises
+    RuntimeError when no linearizer is available or it fails.
+    """
+    tool = linearizer()
+    if tool == 'pikepdf':
+        try:
+            with pikepdf.open(source) as pdf:
+                pdf.save(
+                    target, linearize=True,
+                    object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                    compress_streams=True,
+                )
+        except pikepdf.PdfError as e:
+            raise RuntimeError(str(e)) from e
+    elif tool == 'qpdf':
+        result = subprocess.run(
+            ['qpdf', '--linearize', '--object-streams=generate', '--compress-streams=y',
+             source, target],
+            capture_output=True, text=True,
+        )
+        # Exit status 3 means success with warnings
+        if result.returncode not in (0, 3):
+            raise RuntimeError(result.stderr.strip() or f'qpdf exited with {result.returncode}')
+    else:
+        raise RuntimeError('Neither pikepdf nor qpdf is available')
+
+
+
+# Text extraction ---------------------------------------------------------------
+# A small reader for the text of ordinary PDFs. It decodes the page content
+# streams (and the form XObjects they draw), follows the text operators and
+# maps strings through the font's ToUnicode CMap when it has one, WinAnsi
+# otherwise. Link annotation URIs are returned with the page text. Text that
+# is only part of a raster image cannot be extracted.
+
+OBJECT_RE = re.compile(rb'(\d+)\s+\d+\s+obj\b')
+REF_RE = re.compile(rb'(\d+)\s+\d+\s+R\b')
+NAME_REF_RE = re.compile(rb'/([^\s/<>\[\]()]+)\s*(\d+)\s+\d+\s+R\b')
+DIRECT_LENGTH_RE = re.compile(rb'/Length\s+(\d+)(?!\s+\d+\s+R)')
+URI_RE = re.compile(rb'/URI\s*(\((?:\\.|[^\\)])*\)|<[0-9A-Fa-f\s]*>)', re.S)
+WHITESPACE = b' \t\r\n\f\0'
+DELIMITERS = b'()<>[]{}/%'
+LITERAL_ESCAPES = {
+    ord('n'): 10, ord('r'): 13, ord('t'): 9, ord('b'): 8, ord('f'): 12,
+    ord('('): 40, ord(')'): 41, ord('\\'): 92,
+}
+# A TJ offset (thousandths of an em) wider than this is a word break
+TJ_SPACE = 200
+# Form XObjects drawing each other are followed this deep at most
+MAX_FORM_DEPTH = 8
+
+
+class PDFError(ValueError):
+    pass
+
+
+def _read_objects(data):
+    """``{number: (dictionary bytes, raw stream bytes or None)}`` of every object."""
+    objects = {}
+    pos = 0
+    while match := OBJECT_RE.search(data, pos):
+        start = match.end()
+        end = data.find(b'endobj', start)
+        if end == -1:
+            break
+        stream_at = data.find(b'stream', start, end)
+        if stream_at != -1 and data[stream_at - 3:stream_at] != b'end':
+            header = data[start:stream_at]
+            body_start = stream_at + len(b'stream')
+            body_start += 2 if data[body_start:body_start + 2] == b'\r\n' else 1
+            length = DIRECT_LENGTH_RE.search(header)
+            body_end = body_start + int(length.group(1)) if length else -1
+            if body_end < 0 or not data[body_end:body_end + 12].lstrip(WHITESPACE).startswith(b'endstream'):
+                body_end = data.find(b'endstream', body_start)
+            # Binary stream data may contain "endobj": look after the stream
+            end = data.find(b'endobj', body_end)
+            end = len(data) if end == -1 else end
+            objects[int(match.group(1))] = (header, data[body_start:body_end])
+        else:
+            objects[int(match.group(1))] = (data[start:end], None)
+        pos = end + len(b'endobj')
+
+    # Objects packed into object streams (PDF 1.5+)
+    for header, body in list(objects.values()):
+        if body is None or not re.search(rb'/Type\s*/ObjStm', header):
+            continue
+        content = _decode_stream(header, body)
+        first, count = _int_entry(header, b'First'), _int_entry(header, b'N')
+        if content is None or first is None or count is None:
+            continue
+        numbers = [int(n) for n in content[:first].split()[:2 * count]]
+        pairs = list(zip(numbers[::2], numbers[1::2]))
+        for i, (number, offset) in enumerate(pairs):
+            stop = pairs[i + 1][1] if i + 1 < len(pairs) else len(content) - first
+            objects.setdefault(number, (content[first + offset:first + stop], None))
+    return objects
+
+
+def _int_entry(dictionary, key):
+    match = re.search(rb'/' + key + rb'\s+(\d+)', dictionary)
+    return int(match.group(1)) if match else None
+
+
+def _decode_stream(header, body):
+    """The decoded stream, or None if it uses a filter other than Flate/ASCIIHex."""
+    for name in re.findall(rb'/(\w+Decode|Fl|AHx)\b', header):
+        if name in (b'FlateDecode', b'Fl'):
+            try:
+                body = zlib.decompressobj().decompress(body)
+            except zlib.error:
+                return None
+        elif name in (b'ASCIIHexDecode', b'AHx'):
+            digits = bytes(b for b in body.split(b'>')[0] if b not in WHITESPACE)
+            body = bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode('latin-1'))
+        else:
+            return None
+    return body
+
+
+def _tokens(data):
+    """Lexer for content streams and CMaps: yields ``(kind, value)``."""
+    i = 0
+    size = len(data)
+    while i < size:
+        c = data[i]
+        if c in WHITESPACE:
+            i += 1
+        elif c == 37:  # %
+            while i < size and data[i] not in b'\r\n':
+                i += 1
+        elif c == 40:  # (
+            depth, i, out = 1, i + 1, bytearray()
+            while i < size:
+                c = data[i]
+                i += 1
+                if c == 92 and i < size:  # backslash
+                    c = data[i]
+                    i += 1
+                    if c in LITERAL_ESCAPES:
+                        out.append(LITERAL_ESCAPES[c])
+                    elif 48 <= c <= 55:
+                        digits = bytes([c])
+                        while len(digits) < 3 and i < size and 48 <= data[i] <= 55:
+                            digits += data[i:i + 1]
+                            i += 1
+                        out.append(int(digits, 8) & 0xFF)
+                    elif c not in b'\r\n':
+                        out.append(c)
+                    continue
+                if c == 40:
+                    depth += 1
+                elif c == 41:
+                    depth -= 1
+                    if not depth:
+                        break
+                out.append(c)
+            yield 'string', bytes(out)
+        elif data[i:i + 2] in (b'<<', b'>>'):
+            yield data[i:i + 2].decode(), None
+            i += 2
+        elif c == 60:  # <
+            end = data.find(b'>', i)
+            end = size if end == -1 else end
+            digits = bytes(b for b in data[i + 1:end] if b not in WHITESPACE)
+            try:
+                yield 'string', bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode('latin-1'))
+            except ValueError:
+                pass
+            i = end + 1
+        elif c in b'[]{}':
+            yield chr(c), None
+            i += 1
+        else:
+            j = i + 1
+            while j < size and data[j] not in WHITESPACE and data[j] not in DELIMITERS:
+                j += 1
+            word = data[i:j]
+            i = j
+            if c == 47:  # /
+                yield 'name', word[1:].decode('latin-1')
+                continue
+            try:
+                yield 'number', float(word)
+            except ValueError:
+                yield 'operator', word.decode('latin-1')
+
+
+def _operations(data):
+    """``(operator, operands)`` of a content stream or CMap; arrays become lists."""
+    operands = []
+    stack = []
+    for kind, value in _tokens(data):
+        if kind in ('[', '<<'):
+            stack.append(operands)
+            operands = []
+        elif kind in (']', '>>'):
+            if stack:
+                inner, operands = operands, stack.pop()
+                operands.append(inner)
+        elif kind == 'operator' and not stack:
+            yield value, operands
+            operands = []
+        elif kind in ('string', 'number', 'name'):
+            operands.append(value)
+
+
+def _parse_cmap(data):
+    """``(code length, {code: text})`` of a ToUnicode CMap."""
+    width = None
+    mapping = {}
+    for operator, operands in _operations(data):
+        if operator == 'endcodespacerange' and operands and isinstance(operands[0], bytes):
+            width = len(operands[0])
+        elif operator == 'endbfchar':
+            for code, text in zip(operands[::2], operands[1::2]):
+                if isinstance(code, bytes) and isinstance(text, bytes):
+                    mapping[code] = text.decode('utf-16-be', 'replace')
+        elif operator == 'endbfrange':
+            for low, high, target in zip(operands[::3], operands[1::3], operands[2::3]):
+                if not isinstance(low, bytes) or not isinstance(high, bytes):
+                    continue
+                start = int.from_bytes(low, 'big')
+                stop = min(int.from_bytes(high, 'big'), start + 0xFFFF)
+                for offset in range(stop - start + 1):
+                    code = (start + offset).to_bytes(len(low), 'big')
+                    if isinstance(target, list):
+                        if offset < len(target) and isinstance(target[offset], bytes):
+                            mapping[code] = target[offset].decode('utf-16-be', 'replace')
+                    elif isinstance(target, bytes) and target:
+                        value = int.from_bytes(target, 'big') + offset
+                        mapping[code] = value.to_bytes(len(target), 'big').decode('utf-16-be', 'replace')
+    if width is None:
+        width = len(next(iter(mapping), b'\0'))
+    return width, mapping
+
+
+class _Document:
+    def __init__(self, data):
+        if not data.startswith(b'%PDF-'):
+            raise PDFError('Not a PDF file')
+        self.objects = _read_objects(data)
+        if not self.objects:
+            raise PDFError('No objects found')
+        if any(re.search(rb'/Encrypt\b', header) for header, _ in self.objects.values()
+               if re.search(rb'/Type\s*/XRef', header)) or re.search(rb'trailer\s*<<[^>]*?/Encrypt', data):
+            raise PDFError('Encrypted PDFs are not supported')
+        self._fonts = {}
+
+    def dictionary(self, number):
+        return self.objects.get(number, (b'', None))[0]
+
+    def entry(self, dictionary, key):
+        """The raw value of ``/key`` in ``dictionary``, following a reference."""
+        match = re.search(rb'/' + key + rb'(?![\w.-])\s*', dictionary)
+        if match is None:
+            return None
+        rest = dictionary[match.end():]
+        ref = re.match(rb'(\d+)\s+\d+\s+R\b', rest)
+        if ref:
+            return self.dictionary(int(ref.group(1)))
+        if rest.startswith(b'<<'):
+            depth = 0
+            for i in range(len(rest) - 1):
+                pair = rest[i:i + 2]
+                if pair == b'<<':
+                    depth += 1
+                elif pair == b'>>':
+                    depth -= 1
+                    if not depth:
+                        return rest[:i + 2]
+            return rest
+        if rest.startswith(b'['):
+            return rest[:rest.find(b']') + 1]
+        return rest.split(b'/', 1)[0]
+
+    def refs(self, dictionary, key):
+        """Object numbers referenced by ``/key`` (a reference or array of them)."""
+        match = re.search(rb'/' + key + rb'(?![\w.-])\s*(\[[^\]]*\]|\d+\s+\d+\s+R)', dictionary)
+        return [int(n) for n in REF_RE.findall(match.group(1))] if match else []
+
+    def stream(self, number):
+        header, body = self.objects.get(number, (b'', None))
+        return _decode_stream(header, body) if body is not None else None
+
+    def pages(self):
+        """Object numbers of the pages in document order."""
+        catalog = next((n for n, (header, _) in self.objects.items()
+                        if re.search(rb'/Type\s*/Catalog', header)), None)
+        pages = []
+        seen = set()
+
+        def walk(number):
+            if number in seen:
+                return
+            seen.add(number)
+            node = self.dictionary(number)
+            if re.search(rb'/Type\s*/Pages', node):
+                for kid in self.refs(node, b'Kids'):
+                    walk(kid)
+            elif re.search(rb'/Type\s*/Page\b', node):
+                pages.append(number)
+
+        if catalog is not None:
+            for root in self.refs(self.dictionary(catalog), b'Pages'):
+                walk(root)
+        if not pages:
+            pages = sorted(n for n, (header, _) in self.objects.items()
+                           if re.search(rb'/Type\s*/Page\b', header))
+        return pages
+
+    def resources(self, page):
+        node, depth = self.dictionary(page), 0
+        while depth < 32:
+            resources = self.entry(node, b'Resources')
+            if resources is not None:
+                return resources
+            parent = self.refs(node, b'Parent')
+            if not parent:
+                return b''
+            node, depth = self.dictionary(parent[0]), depth + 1
+        return b''
+
+    def font(self, number):
+        """``(code length, {code: text})`` of a font's ToUnicode CMap, or None."""
+        if number not in self._fonts:
+            cmap = None
+            refs = self.refs(self.dictionary(number), b'ToUnicode')
+            data = self.stream(refs[0]) if refs else None
+            if data:
+                cmap = _parse_cmap(data)
+            self._fonts[number] = cmap
+        return self._fonts[number]
+
+    def decode(self, font, string):
+        cmap = self.font(font) if font is not None else None
+        if not cmap or not cmap[1]:
+            if string.startswith(b'\xfe\xff'):
+                return string[2:].decode('utf-16-be', 'replace')
+            return string.decode('cp1252', 'replace')
+        width, mapping = cmap
+        return ''.join(
+            mapping.get(string[i:i + width], '') for i in range(0, len(string), width)
+        )
+
+    def content_text(self, data, resources, out, depth=0):
+        fonts = dict((name.decode('latin-1'), int(n)) for name, n in
+                     NAME_REF_RE.findall(self.entry(resources, b'Font') or b''))
+        xobjects = dict((name.decode('latin-1'), int(n)) for name, n in
+                        NAME_REF_RE.findall(self.entry(resources, b'XObject') or b''))
+        font = None
+        for operator, operands in _operations(data):
+            if operator == 'Tf' and operands:
+                font = fonts.get(operands[0])
+            elif operator == 'Tj' and operands and isinstance(operands[-1], bytes):
+                out.append(self.decode(font, operands[-1]))
+            elif operator in ("'", '"') and operands and isinstance(operands[-1], bytes):
+                out.append('\n' + self.decode(font, operands[-1]))
+            elif operator == 'TJ' and operands and isinstance(operands[0], list):
+                for item in operands[0]:
+                    if isinstance(item, bytes):
+                        out.append(self.decode(font, item))
+                    elif isinstance(item, float) and item < -TJ_SPACE:
+                        out.append(' ')
+            elif operator in ('Td', 'TD') and len(operands) == 2:
+                out.append('\n' if operands[1] else ' ')
+            elif operator in ('T*', 'Tm', 'ET'):
+                out.append('\n')
+            elif operator == 'Do' and operands and depth < MAX_FORM_DEPTH:
+                number = xobjects.get(operands[0])
+                header = self.dictionary(number) if number is not None else b''
+                if re.search(rb'/Subtype\s*/Form', header):
+                    form = self.stream(number)
+                    if form:
+                        self.content_text(
+                            form, self.entry(header, b'Resources') or resources, out, depth + 1
+                        )
+
+    def page_text(self, page):
+        node = self.dictionary(page)
+        out = []
+        resources = self.resources(page)
+        contents = b'\n'.join(filter(None, (self.stream(n) for n in self.refs(node, b'Contents'))))
+        self.content_text(contents, resources, out)
+
+        annotations = node + b''.join(self.dictionary(n) for n in self.refs(node, b'Annots'))
+        for raw in URI_RE.findall(annotations):
+            for kind, value in _tokens(raw):
+                if kind == 'string':
+                    out.append('\n' + value.decode('latin-1'))
+        return ''.join(out).strip()
+
+
+def extract_text(path):
+    """The text of each page of the PDF at ``path``. Raises PDFError."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    document = _Document(data)
+    return [document.page_text(page) for page in document.pages()]
@@ -0,0 +1,124 @@
+"""
+Process-local cache of the small reference tables.
+
+Asset types, materials, contents, event types and locations are a few dozen
+rows that almost never change, yet every asset payload used to join all of
+them. ``ReferenceTable`` keeps every row of one model in memory per worker,
+so serializers and importers can resolve a foreign key ID to its object
+without a query.
+
+Each table has a generation token in the shared Django cache. core.signals
+calls ``invalidate`` on every save and delete, which drops the local copy at
+once and replaces the token -- again when the transaction commits, so no
+worker keeps rows it loaded before the commit. Other workers compare the token
+at most every REFERENCE_CACHE_CHECK_SECONDS and reload the table when it
+moved. Changes that bypass model signals (queryset.update(), raw SQL) need an
+explicit ``invalidate``.
+
+Payloads built from these rows are kept current too: core.signals bumps the
+versions of the farms and assets referencing a changed row, and
+``reference_generation`` is part of the farm payload cache key and of the
+farm and asset ETags, so an explicit ``invalidate`` reaches them as well.
+
+The cached instances are shared between requests and threads: read them, never
+modify them.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AssetType, Content, EventType, Location, Material
+
+
+GENERATION_KEY = 'core:reference:{table}:generation'
+DEFAULT_CHECK_SECONDS = 1
+
+
+class ReferenceTable:
+    """Every row of ``model``, keyed by primary key."""
+
+    def __init__(self, model):
+        self.model = model
+        self._key = GENERATION_KEY.format(table=model._meta.db_table)
+        self._objects = None
+        self._generation = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _interval(self):
+        return getattr(settings, 'REFERENCE_CACHE_CHECK_SECONDS', DEFAULT_CHECK_SECONDS)
+
+    def _shared_generation(self):
+        generation = cache.get(self._key)
+        if generation is None:
+            # add() so that workers seeding at the same time agree on one token
+            cache.add(self._key, uuid.uuid4().hex, timeout=None)
+            generation = cache.get(self._key)
+        return generation
+
+    def _rows(self):
+        with self._lock:
+            now = time.monotonic()
+            if (self._objects is not None and self._checked_at is not None
+                    and now - self._checked_at < self._interval()):
+                return self._objects
+            # Read before loading: a change committed meanwhile moves the
+            # token again and is picked up on the next check
+            generation = self._shared_generation()
+            if self._objects is None or generation != self._generation:
+                self._objects = {obj.pk: obj for obj in self.model.objects.all()}
+                self._generation = generation
+            self._checked_at = now
+            return self._objects
+
+    def get(self, pk):
+        """The row with primary key ``pk``, None if there is none (or ``pk`` is None)."""
+        if pk is None:
+            return None
+        return self._rows().get(pk)
+
+    def all(self):
+        return list(self._rows().values())
+
+    def _bump(self):
+        cache.set(self._key, uuid.uuid4().hex, timeout=None)
+        with self._lock:
+            self._objects = None
+
+    def invalidate(self):
+        self._bump()
+        transaction.on_commit(self._bump)
+
+
+asset_types = ReferenceTable(AssetType)
+materials = ReferenceTable(Material)
+contents = ReferenceTable(Content)
+event_types = ReferenceTable(EventType)
+locations = ReferenceTable(Location)
+
+REFERENCE_TABLES = {
+    table.model: table for table in (asset_types, materials, contents, event_types, locations)
+}
+
+
+def reference_generation():
+    """
+    Short token that changes whenever any reference table is invalidated, for
+    validators of payloads that embed reference rows. One cache round trip.
+    """
+    tables = {table._key: table for table in REFERENCE_TABLES.values()}
+    found = cache.get_many(list(tables))
+    tokens = [found.get(key) or table._shared_generation() for key, table in tables.items()]
+    return hashlib.md5(''.join(tokens).encode()).hexdigest()[:8]
+
+
+def warm_reference_tables():
+    """Load every reference table that is not already in memory."""
+    for table in REFERENCE_TABLES.values():
+        table.all()
@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 from typing import Dict, List, Any, Optional
-from .models import Farm, Asset, Location, AssetType, Material, Content, AssetEvents, EventType, Company
+from .model_registry import hashed_model_url
+from .reference_cache import asset_types, contents, locations, materials
+from .models import Farm, Asset, Location, AssetType, Material, Content, AssetEvents, EventType, Company, ModelInfo, FarmSummary
 
 
 class LocationSerializer(serializers.ModelSerializer):
@@ -66,7 +68,40 @@ class AssetSerializer(serializers.ModelSerializer):
         ]
 
 
-class FarmAssetSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Lets callers trim a serializer's output with ``fields``/``expand`` kwargs.
+
+    ``fields`` restricts the top-level fields (all of them when None).
+    ``expand`` opts into the heavy ``Meta.expandable_fields``; when None they
+    follow ``fields`` so existing clients keep receiving the full payload.
+    Identifier fields in ``Meta.always_fields`` are never dropped.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.selected_fields(fields, expand)
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+    @classmethod
+    def unknown_fields(cls, fields=None, expand=None):
+        unknown = set(fields or ()) - set(cls.Meta.fields)
+        unknown |= set(expand or ()) - set(cls.Meta.expandable_fields)
+        return sorted(unknown)
+
+    @classmethod
+    def selected_fields(cls, fields=None, expand=None):
+        all_fields = set(cls.Meta.fields)
+        expandable = set(cls.Meta.expandable_fields)
+        selected = all_fields if fields is None else all_fields & set(fields)
+        if expand is not None:
+            selected = (selected - expandable) | (expandable & set(expand))
+        return selected | set(cls.Meta.always_fields)
+
+
+class FarmAssetSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     asset_id = serializers.CharField(read_only=True)
     type = serializers.SerializerMethodField()
     location = serializers.SerializerMethodField()
@@ -80,29 +115,33 @@ class FarmAssetSerializer(serializers.ModelSerializer):
             'asset_id', 'name', 'latitude', 'longitude', 'description', 
             'status', 'type', 'location', 'dates', 'specifications', 'events'
         ]
+        expandable_fields = ['events', 'location']
+        always_fields = ['asset_id']
     
     @extend_schema_field(Dict[str, Any])
     def get_type(self, obj: Asset) -> Optional[Dict[str, Any]]:
-        if obj.asset_type:
+        asset_type = asset_types.get(obj.asset_type_id)
+        if asset_type:
             return {
-                'id': obj.asset_type.id,
-                'name': obj.asset_type.name,
-                'description': obj.asset_type.description
+                'id': asset_type.id,
+                'name': asset_type.name,
+                'description': asset_type.description
             }
         return None
     
     @extend_schema_field(Dict[str, Any])
     def get_location(self, obj: Asset) -> Optional[Dict[str, Any]]:
-        if obj.location:
+        location = locations.get(obj.location_id)
+        if location:
             return {
-                'id': obj.location.location_id,
-                'name': obj.location.name,
-                'address': obj.location.address,
-                'city': obj.location.city,
-                'country': obj.location.country,
+                'id': location.location_id,
+                'name': location.name,
+                'address': location.address,
+                'city': location.city,
+                'country': location.country,
                 'coordinates': {
-                    'latitude': obj.location.latitude,
-                    'longitude': obj.location.longitude
+                    'latitude': location.latitude,
+                    'longitude': location.longitude
                 }
             }
         return None
@@ -119,13 +158,15 @@ class FarmAssetSerializer(serializers.ModelSerializer):
     
     @extend_schema_field(Dict[str, Any])
     def get_specifications(self, obj: Asset) -> Dict[str, Any]:
+        material = materials.get(obj.material_id)
+        content = contents.get(obj.content_id)
         return {
             'capacity': obj.capacity,
             'current_volume': obj.current_volume,
             'diameter': obj.diameter,
             'height': obj.height,
-            'material': obj.material.name if obj.material else None,
-            'content': obj.content.name if obj.content else None
+            'material': material.name if material else None,
+            'content': content.name if content else None
         }
 
 
@@ -158,11 +199,12 @@ class AssetDetailSerializer(serializers.ModelSerializer):
     
     @extend_schema_field(Dict[str, Any])
     def get_type(self, obj: Asset) -> Optional[Dict[str, Any]]:
-        if obj.asset_type:
+        asset_type = asset_types.get(obj.asset_type_id)
+        if asset_type:
             return {
-                'id': obj.asset_type.id,
-                'name': obj.asset_type.name,
-                'description': obj.asset_type.description
+                'id': asset_type.id,
+                'name': asset_type.name,
+                'description': asset_type.description
             }
         return None
     
@@ -177,16 +219,17 @@ class AssetDetailSerializer(serializers.ModelSerializer):
     
     @extend_schema_field(Dict[str, Any])
     def get_location(self, obj: Asset) -> Optional[Dict[str, Any]]:
-        if obj.location:
+        location = locations.get(obj.location_id)
+        if location:
             return {
-                'id': obj.location.location_id,
-                'name': obj.location.name,
-                'address': obj.location.address,
-                'city': obj.location.city,
-                'country': obj.location.country,
+                'id': location.location_id,
+                'name': location.name,
+                'address': location.address,
+                'city': location.city,
+                'country': location.country,
                 'coordinates': {
-                    'latitude': obj.location.latitude,
-                    'longitude': obj.location.longitude
+                    'latitude': location.latitude,
+                    'longitude': location.longitude
                 }
             }
         return None
@@ -203,13 +246,15 @@ class AssetDetailSerializer(serializers.ModelSerializer):
     
     @extend_schema_field(Dict[str, Any])
     def get_specifications(self, obj: Asset) -> Dict[str, Any]:
+        material = materials.get(obj.material_id)
+        content = contents.get(obj.content_id)
         return {
             'capacity': obj.capacity,
             'current_volume': obj.current_volume,
             'diameter': obj.diameter,
             'height': obj.height,
-            'material': obj.material.name if obj.material else None,
-            'content': obj.content.name if obj.content else None
+            'material': material.name if material else None,
+            'content': content.name if content else None
         }
     
     @extend_schema_field(List[Dict[str, Any]])
@@ -218,7 +263,7 @@ class AssetDetailSerializer(serializers.ModelSerializer):
         for event in obj.events.all():
             events.append({
                 'id': event.event_id,
-                'type_id': event.event_type.id if event.event_type else None,
+                'type_id': event.event_type_id,
                 'status': event.event_status,
                 'start_date': event.start_date,
                 'end_date': event.end_date,
@@ -231,4 +276,59 @@ class AssetDetailSerializer(serializers.ModelSerializer):
     @extend_schema_field(List[Dict[str, Any]])
     def get_related_assets(self, obj: Asset) -> List[Dict[str, Any]]:
         # For now return empty list - implement AssetRelationship model if needed
-        return []
\ No newline at end of file
+        return []
+
+
+class AssetBatchRequestSerializer(serializers.Serializer):
+    MAX_ASSETS = 200
+
+    asset_ids = serializers.ListField(
+        child=serializers.CharField(max_length=200),
+        allow_empty=False,
+        max_length=MAX_ASSETS,
+        help_text=f'Asset identifiers to resolve (at most {MAX_ASSETS})'
+    )
+
+
+class ModelInfoSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+    byte_size = serializers.IntegerField(source='file_size', read_only=True)
+    bounding_box = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ModelInfo
+        fields = [
+            'url', 'sha256', 'byte_size', 'bounding_box', 'node_count', 'mesh_count',
+            'primitive_count', 'vertex_count', 'triangle_count', 'material_count',
+            'textures', 'extensions', 'generator', 'updated_at'
+        ]
+
+    def get_url(self, obj: ModelInfo) -> str:
+        return hashed_model_url(obj.kind, obj.name, obj.sha256)
+
+    @extend_schema_field(Dict[str, List[float]])
+    def get_bounding_box(self, obj: ModelInfo) -> Optional[Dict[str, List[float]]]:
+        if obj.bbox_min is None or obj.bbox_max is None:
+            return None
+        return {
+            'min': obj.bbox_min,
+            'max': obj.bbox_max,
+            'size': [high - low for low, high in zip(obj.bbox_min, obj.bbox_max)]
+        }
+
+
+class FarmSummarySerializer(serializers.ModelSerializer):
+    farm_id = serializers.CharField(read_only=True)
+    farm_name = serializers.CharField(source='farm.name', read_only=True)
+    health = serializers.SerializerMethodField()
+
+    class Meta:
+        model = FarmSummary
+        fields = [
+            'farm_id', 'farm_name', 'asset_count', 'assets_by_status', 'assets_by_type',
+            'health', 'total_capacity', 'total_current_volume', 'open_event_count', 'updated_at'
+        ]
+
+    @extend_schema_field(Dict[str, Optional[float]])
+    def get_health(self, obj: FarmSummary) -> Dict[str, Optional[float]]:
+        return {'average': obj.health_avg, 'minimum': obj.health_min}
@@ -0,0 +1,143 @@
+"""
+Model signal handlers that keep the response caches and validators coherent.
+
+Only the farms and assets whose payload actually includes the changed row
+(directly, or through the name of a reference row) are invalidated; see
+``core.cache`` for the versioning scheme. Changes are also propagated to the
+parents' ``updated_at`` (with queryset updates, which do not re-enter these
+handlers) so that a version re-seeded from the database after a cache flush
+still reflects embedded rows and deletions.
+
+Events also get their numeric ``cost_amount`` derived from ``cost`` here, and
+changes to the reference tables drop their in-process copies
+(core.reference_cache). The farms an asset or event change touches get their
+FarmSummary recomputed once the transaction commits (core.farm_summary).
+"""
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from .cache import bump_asset_version, bump_farm_version
+from .costs import parse_cost
+from .farm_summary import schedule_farm_summaries
+from .models import Asset, AssetEvents, AssetType, Content, EventType, Farm, Location, Material
+from .reference_cache import REFERENCE_TABLES
+
+
+def touch_farms(*farm_ids):
+    farm_ids = {farm_id for farm_id in farm_ids if farm_id}
+    if farm_ids:
+        Farm.objects.filter(pk__in=farm_ids).update(updated_at=now())
+        bump_farm_version(*farm_ids)
+
+
+def touch_assets(*asset_ids):
+    asset_ids = {asset_id for asset_id in asset_ids if asset_id}
+    if asset_ids:
+        Asset.objects.filter(pk__in=asset_ids).update(updated_at=now())
+        bump_asset_version(*asset_ids)
+
+
+@receiver(pre_save, sender=Asset)
+def remember_previous_farm(sender, instance, raw=False, **kwargs):
+    # An asset moved to another farm must also disappear from the old one.
+    instance._previous_farm_id = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_farm_id = (
+        Asset.objects.filter(pk=instance.pk).values_list('farm_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Asset)
+@receiver(post_delete, sender=Asset)
+def invalidate_asset(sender, instance, **kwargs):
+    farm_ids = (instance.farm_id, getattr(instance, '_previous_farm_id', None))
+    bump_asset_version(instance.pk)
+    touch_farms(*farm_ids)
+    schedule_farm_summaries(*farm_ids)
+
+
+@receiver(pre_save, sender=AssetEvents)
+def parse_event_cost(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.cost_amount = parse_cost(instance.cost)
+
+
+@receiver(post_save, sender=AssetEvents)
+@receiver(post_delete, sender=AssetEvents)
+def invalidate_event(sender, instance, **kwargs):
+    farm_id = (
+        Asset.objects.filter(pk=instance.asset_id).values_list('farm_id', flat=True).first()
+    )
+    touch_assets(instance.asset_id)
+    touch_farms(farm_id)
+    schedule_farm_summaries(farm_id)
+
+
+@receiver(post_save, sender=Farm)
+@receiver(pre_delete, sender=Farm)
+def invalidate_farm(sender, instance, created=False, **kwargs):
+    # The farm name is embedded in every asset detail payload.
+    bump_farm_version(instance.pk)
+    touch_assets(*Asset.objects.filter(farm_id=instance.pk).values_list('asset_id', flat=True))
+    if created:
+        schedule_farm_summaries(instance.pk)
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def invalidate_location(sender, instance, **kwargs):
+    # Locations are embedded in the farm envelope and in every asset.
+    # pre_delete: by post_delete the SET_NULL has already cut the links.
+    asset_rows = list(
+        Asset.objects.filter(location_id=instance.pk).values_list('asset_id', 'farm_id')
+    )
+    touch_assets(*(asset_id for asset_id, _ in asset_rows))
+    touch_farms(
+        *Farm.objects.filter(location_id=instance.pk).values_list('farm_id', flat=True),
+        *(farm_id for _, farm_id in asset_rows),
+    )
+
+
+# Reference rows whose names are embedded in asset payloads -> the Asset field
+# referencing them
+ASSET_REFERENCE_FIELDS = {AssetType: 'asset_type', Material: 'material', Content: 'content'}
+
+
+@receiver(post_save, sender=AssetType)
+@receiver(pre_delete, sender=AssetType)
+@receiver(post_save, sender=Material)
+@receiver(pre_delete, sender=Material)
+@receiver(post_save, sender=Content)
+@receiver(pre_delete, sender=Content)
+@receiver(pre_delete, sender=EventType)
+def invalidate_reference_dependents(sender, instance, created=False, **kwargs):
+    # A renamed or deleted reference row changes every payload naming it;
+    # events only carry the ID of their type, which a delete clears.
+    # pre_delete: by post_delete the SET_NULL has already cut the links.
+    if created:
+        return
+    if sender is EventType:
+        rows = AssetEvents.objects.filter(event_type_id=instance.pk).values_list(
+            'asset_id', 'asset__farm_id'
+        ).distinct()
+    else:
+        rows = Asset.objects.filter(**{ASSET_REFERENCE_FIELDS[sender]: instance.pk}).values_list(
+            'asset_id', 'farm_id'
+        )
+    rows = list(rows)
+    touch_assets(*(asset_id for asset_id, _ in rows))
+    touch_farms(*(farm_id for _, farm_id in rows))
+
+
+@receiver([post_save, post_delete], sender=AssetType)
+@receiver([post_save, post_delete], sender=Material)
+@receiver([post_save, post_delete], sender=Content)
+@receiver([post_save, post_delete], sender=EventType)
+@receiver([post_save, post_delete], sender=Location)
+def invalidate_reference_table(sender, **kwargs):
+    # Every worker's copy; the payloads naming the row are invalidated by
+    # invalidate_reference_dependents (locations by invalidate_location)
+    REFERENCE_TABLES[sender].invalidate()
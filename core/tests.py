@@ -1,3 +1,1305 @@
-from django.test import TestCase
+import contextlib
+import datetime
+import gzip
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+import zlib
+from decimal import Decimal
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from . import urls as core_urls
+from .byte_cache import ByteLRU, file_cache
+from .cache import VERSION_KEY, get_farm_version
+from .costs import parse_cost
+from .fast_serializers import serialize_asset_details, serialize_farm_assets
+from . import blob_store, farm_scene, glb, model_bundle
+from .file_index import FileIndex, layout_index
+from .file_serving import negotiate_encoding, serve_file
+from .model_info import refresh_model_info
+from .layout_search import refresh_layout_search, search_layouts, tokenize
+from .pdf import LINEARIZED, NOT_LINEARIZED, STALE, extract_text, linearization
+from .model_registry import compressed_path, registry as model_registry
+from .models import Asset, AssetEvents, AssetType, Company, Content, EventType, Farm, FarmSummary, LayoutDocument, Location, Material, ModelInfo, StoredFile
+from .reference_cache import asset_types, warm_reference_tables
+from .serializers import AssetDetailSerializer, FarmAssetSerializer
+
+
+# Query budgets ----------------------------------------------------------------
+# Maximum number of SQL queries each core endpoint may issue on a cold cache.
+# The in-process reference tables (core.reference_cache) are warmed first:
+# workers load them once, not per request. Every named route in core.urls
+# must be listed here, so a new endpoint cannot ship without a declared
+# budget, and an N+1 fails the build instead of slipping in when someone adds
+# a field to a serializer.
+
+QUERY_BUDGETS = {
+    'api_root': 0,
+    # version seed, farm, assets, events
+    'farm_assets': 4,
+    # version seed, asset (+farm), events
+    'asset_details': 3,
+    # assets (+farm), events -- whatever the number of IDs
+    'asset_details_batch': 2,
+    'asset_type_model': 0,
+    # one grouped aggregate, whatever the grouping
+    'costs': 1,
+    'farm_model': 0,
+    # summaries (+farm)
+    'farm_summaries': 1,
+    # version seed, farm (+location), assets (+asset type)
+    'farm_scene': 3,
+    # version seed, farm, distinct asset types
+    'model_bundle': 3,
+    'farm_layout': 0,
+    # postings of all terms (+document)
+    'layout_search': 1,
+    'model_manifest': 0,
+    'hashed_model': 0,
+    # existing rows, then one insert (+ re-read) of new rows or one update per
+    # changed file (original + 3 levels)
+    'model_info': 5,
+}
+
+
+class QueryBudgetMixin:
+    """Assertions for keeping an endpoint within its declared query budget."""
+
+    def assertWithinQueryBudget(self, url_name, url, method='get', budget=None, **request_kwargs):
+        if budget is None:
+            budget = QUERY_BUDGETS[url_name]
+        warm_reference_tables()
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, **request_kwargs)
+        if len(ctx) > budget:
+            queries = '\n'.join(f'  {i}. {q["sql"]}' for i, q in enumerate(ctx, 1))
+            self.fail(
+                f'{url_name} issued {len(ctx)} queries, budget is {budget}:\n{queries}'
+            )
+        return response
+
+
+def create_sample_farm(farm_id='TEST-F-00001', asset_count=3, events_per_asset=2):
+    location = Location.objects.create(name='Test Site', city='Houston', country='USA')
+    asset_type = AssetType.objects.create(name='Fixed Roof Tank', code='FRT')
+    material = Material.objects.create(name='Carbon Steel')
+    content = Content.objects.create(name='Crude Oil')
+    event_type = EventType.objects.create(name='Inspection')
+    Company.objects.get_or_create(company_id='TEST', defaults={'name': 'Test Company'})
+    farm = Farm.objects.create(
+        farm_id=farm_id, company_id='TEST', location=location,
+        name='Test Farm', status='active',
+    )
+    for i in range(asset_count):
+        asset = Asset.objects.create(
+            asset_id=f'{farm_id}-A-{i:05d}', company_id='TEST', farm=farm,
+            location=location, name=f'TANK-{i}', asset_type=asset_type,
+            status='active', material=material, content=content,
+        )
+        for j in range(events_per_asset):
+            AssetEvents.objects.create(
+                event_id=f'{asset.asset_id}-E-{j}', asset=asset, title='Inspection',
+                event_type=event_type, event_status='completed',
+            )
+    return farm
+
+
+class FarmAssetsCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.farm = create_sample_farm('TEST-F-00001', asset_count=2, events_per_asset=1)
+        self.other = create_sample_farm('TEST-F-00002', asset_count=1, events_per_asset=1)
+
+    def get(self, farm):
+        response = self.client.get(reverse('farm_assets', args=[farm.farm_id]))
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def assertInvalidates(self, change):
+        before = self.get(self.farm)
+        self.get(self.other)
+        versions = get_farm_version(self.farm.farm_id), get_farm_version(self.other.farm_id)
+        self.assertEqual(self.get(self.farm), before)
+        change()
+        self.assertNotEqual(self.get(self.farm), before)
+        self.assertNotEqual(get_farm_version(self.farm.farm_id), versions[0])
+        self.assertEqual(get_farm_version(self.other.farm_id), versions[1])
+
+    def test_changes_invalidate_only_the_affected_farm(self):
+        asset = self.farm.assets.order_by('pk').first()
+        event = asset.events.get()
+
+        def rename(instance, **values):
+            def change():
+                for name, value in values.items():
+                    setattr(instance, name, value)
+                instance.save()
+            return change
+
+        self.assertInvalidates(rename(asset, name='RENAMED'))
+        self.assertInvalidates(rename(event, title='Repair'))
+        self.assertInvalidates(rename(self.farm, name='Renamed Farm'))
+        self.assertInvalidates(rename(self.farm.location, city='Austin'))
+        self.assertInvalidates(rename(asset.asset_type, name='Floating Roof Tank'))
+        self.assertInvalidates(event.event_type.delete)
+        self.assertInvalidates(event.delete)
+        self.assertInvalidates(asset.delete)
+
+    def test_conditional_requests(self):
+        asset = self.farm.assets.order_by('pk').first()
+        for url in (reverse('farm_assets', args=[self.farm.farm_id]),
+                    reverse('asset_details', args=[asset.asset_id])):
+            response = self.client.get(url)
+            etag = response['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(
+                self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304
+            )
+            # Reference tables invalidated without a model signal (raw SQL)
+            asset_types.invalidate()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+            etag = self.client.get(url)['ETag']
+            asset.name = f'{asset.name}-2'
+            asset.save()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+# Budgets count ORM queries only: a DatabaseCache (settings_production without
+# Redis) would add its own cache reads and writes to every request
+@override_settings(CACHES={'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-budgets',
+}})
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+    def test_every_endpoint_declares_a_budget(self):
+        names = {pattern.name for pattern in core_urls.urlpatterns}
+        missing = names - set(QUERY_BUDGETS)
+        self.assertFalse(missing, f'Endpoints without a query budget: {sorted(missing)}')
+
+    def test_api_root(self):
+        response = self.assertWithinQueryBudget('api_root', reverse('api_root'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_farm_assets(self):
+        farm = create_sample_farm(asset_count=5, events_per_asset=4)
+        response = self.assertWithinQueryBudget(
+            'farm_assets', reverse('farm_assets', args=[farm.farm_id])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['assets_count'], 5)
+
+    def test_farm_assets_sparse_fieldset_skips_joins(self):
+        farm = create_sample_farm(asset_count=5, events_per_asset=4)
+        url = reverse('farm_assets', args=[farm.farm_id])
+        # version seed, farm (+location), assets without joins or prefetches
+        response = self.assertWithinQueryBudget(
+            'farm_assets', url, budget=3, data={'fields': 'name,status', 'expand': ''}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['assets'][0]), {'asset_id', 'name', 'status'})
+
+    def test_farm_assets_rejects_unknown_fields(self):
+        farm = create_sample_farm(asset_count=1)
+        response = self.client.get(
+            reverse('farm_assets', args=[farm.farm_id]), {'expand': 'events,owner'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_ids_store_no_version(self):
+        self.assertEqual(self.client.get(reverse('farm_assets', args=['NO-SUCH-FARM'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('asset_details', args=['NO-SUCH-ASSET'])).status_code, 404)
+        self.assertIsNone(cache.get(VERSION_KEY.format(kind='farm', ident='NO-SUCH-FARM')))
+        self.assertIsNone(cache.get(VERSION_KEY.format(kind='asset', ident='NO-SUCH-ASSET')))
+
+    def test_farm_assets_stream_matches_regular_payload(self):
+        farm = create_sample_farm(asset_count=5, events_per_asset=3)
+        url = reverse('farm_assets', args=[farm.farm_id])
+        expected = json.loads(self.client.get(url, HTTP_ACCEPT='application/json').content)
+        response = self.client.get(url, {'stream': 'true'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), expected)
+
+    def test_asset_details(self):
+        farm = create_sample_farm(asset_count=1, events_per_asset=10)
+        asset = farm.assets.get()
+        response = self.assertWithinQueryBudget(
+            'asset_details', reverse('asset_details', args=[asset.asset_id])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['events']), 10)
+        self.assertEqual(response.data['farm']['name'], 'Test Farm')
+
+    def test_asset_details_batch(self):
+        farm = create_sample_farm(asset_count=8, events_per_asset=3)
+        asset_ids = list(farm.assets.values_list('asset_id', flat=True)) + ['MISSING']
+        response = self.assertWithinQueryBudget(
+            'asset_details_batch', reverse('asset_details_batch'), method='post',
+            data={'asset_ids': asset_ids}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['assets']), asset_ids)
+        self.assertEqual(response.data['assets']['MISSING'], {'error': 'Asset not found'})
+        self.assertEqual(response.data['not_found'], ['MISSING'])
+        self.assertEqual(len(response.data['assets'][asset_ids[0]]['events']), 3)
+
+    def test_asset_type_model(self):
+        response = self.assertWithinQueryBudget(
+            'asset_type_model', reverse('asset_type_model', args=['Compressor'])
+        )
+        response.close()
+
+    def test_farm_model(self):
+        self.assertWithinQueryBudget('farm_model', reverse('farm_model', args=['NO-SUCH-FARM']))
+
+    def test_farm_scene(self):
+        farm = create_sample_farm(asset_count=3, events_per_asset=0)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            response = self.assertWithinQueryBudget(
+                'farm_scene', reverse('farm_scene', args=[farm.farm_id])
+            )
+            response.close()
+        self.assertEqual(response.status_code, 200)
+
+    def test_model_bundle(self):
+        farm = create_sample_farm(asset_count=3, events_per_asset=0)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        with override_settings(MEDIA_ROOT=media_root):
+            response = self.assertWithinQueryBudget(
+                'model_bundle', reverse('model_bundle', args=[farm.farm_id])
+            )
+            response.close()
+        self.assertEqual(response.status_code, 200)
+
+    def test_farm_layout(self):
+        response = self.assertWithinQueryBudget(
+            'farm_layout', reverse('farm_layout', args=['SYS-1F057E08-F-93E85'])
+        )
+        response.close()
+        self.assertEqual(response.status_code, 200)
+
+    def test_layout_search(self):
+        document = LayoutDocument.objects.create(farm_id='F1', file_size=1, file_mtime_ns=1, page_count=2)
+        for page in (1, 2):
+            document.tokens.create(token='FIX-03E9A2', page=page, count=1)
+            document.tokens.create(token='COMPRESSOR', page=page, count=2)
+        response = self.assertWithinQueryBudget(
+            'layout_search', reverse('layout_search') + '?q=fix-03e9a2+compressor'
+        )
+        self.assertEqual(response.data['results'][0]['matches'], 6)
+
+    def test_costs(self):
+        create_sample_farm(asset_count=3, events_per_asset=2)
+        AssetEvents.objects.update(cost_amount=Decimal('10.00'))
+        response = self.assertWithinQueryBudget(
+            'costs', reverse('costs'), data={'group_by': 'company,asset_type,event_type,month'}
+        )
+        self.assertEqual(response.data['total'], '60.00')
+
+    def test_farm_summaries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_sample_farm(asset_count=5, events_per_asset=2)
+        response = self.assertWithinQueryBudget('farm_summaries', reverse('farm_summaries'))
+        self.assertEqual(response.data['farms'][0]['asset_count'], 5)
+
+    def test_model_manifest(self):
+        response = self.assertWithinQueryBudget('model_manifest', reverse('model_manifest'))
+        self.assertIn('Compressor', response.data['category'])
+
+    def test_model_info(self):
+        url = reverse('model_info', args=['category', 'Compressor'])
+        response = self.assertWithinQueryBudget('model_info', url)
+        self.assertEqual(response.status_code, 200)
+        # Unchanged files are not re-read or re-written
+        self.assertWithinQueryBudget('model_info', url, budget=1)
+
+    def test_hashed_model(self):
+        model = model_registry.get('category', 'Compressor')
+        response = self.assertWithinQueryBudget('hashed_model', model.url)
+        response.close()
+
+
+class IndexBenchmarkTests(TestCase):
+    def test_benchmark_rolls_back(self):
+        out = io.StringIO()
+        call_command(
+            'benchmark_indexes', farms=2, assets_per_farm=3, events_per_asset=2, repeat=1, stdout=out,
+        )
+        self.assertIn('Farm assets', out.getvalue())
+        self.assertEqual(out.getvalue().count('after '), out.getvalue().count('before '))
+        self.assertFalse(Farm.objects.exists())
+        index_names = {
+            name for name, info in connection.introspection.get_constraints(
+                connection.cursor(), Asset._meta.db_table
+            ).items() if info['index']
+        }
+        self.assertIn('asset_farm_status_idx', index_names)
+
+
+class CompanyBackfillTests(TestCase):
+    def test_orphaned_ids_get_placeholder_companies(self):
+        backfill = importlib.import_module('core.migrations.0013_backfill_companies')
+        farm = create_sample_farm(asset_count=2, events_per_asset=0)
+        # Rows written before company_id was a foreign key
+        Farm.objects.filter(pk=farm.pk).update(company_id='GONE')
+        Asset.objects.filter(farm=farm).update(company_id='')
+
+        with io.StringIO() as out, contextlib.redirect_stdout(out):
+            backfill.backfill_companies(apps, None)
+            report = out.getvalue()
+
+        self.assertIn('GONE: 1 farms/assets', report)
+        farm.refresh_from_db()
+        self.assertEqual(farm.company.name, 'Unknown company GONE')
+        self.assertFalse(Asset.objects.filter(farm=farm, company__isnull=False).exists())
+        self.assertEqual(Company.objects.get(pk='TEST').farms.count(), 0)
+
+
+class CostTests(TestCase):
+    def test_parse_cost(self):
+        cases = {
+            '$1,200.00': Decimal('1200.00'), 'GHS 950': Decimal('950.00'),
+            '1.200,50': Decimal('1200.50'), '12,5': Decimal('12.50'), '(300)': Decimal('-300.00'),
+            '1,200,000': Decimal('1200000.00'), '': None, 'N/A': None, None: None,
+        }
+        for text, amount in cases.items():
+            self.assertEqual(parse_cost(text), amount, text)
+
+    def test_costs_grouped_in_sql(self):
+        farm = create_sample_farm(asset_count=2, events_per_asset=2)
+        events = list(AssetEvents.objects.filter(asset__farm=farm).order_by('pk'))
+        for event, (cost, month) in zip(events, [('$100', 1), ('1,000.50', 1), ('n/a', 2), ('25', 2)]):
+            event.cost = cost
+            event.start_date = datetime.datetime(2025, month, 15, tzinfo=datetime.timezone.utc)
+            event.save()
+        self.assertEqual(AssetEvents.objects.get(pk=events[1].pk).cost_amount, Decimal('1000.50'))
+
+        response = APIClient().get(reverse('costs'), {'group_by': 'farm,month'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['total'], '1125.50')
+        self.assertEqual(response.data['groups'], [
+            {'farm': farm.farm_id, 'month': '2025-01', 'total': '1100.50', 'events': 2},
+            {'farm': farm.farm_id, 'month': '2025-02', 'total': '25.00', 'events': 1},
+        ])
+
+        response = APIClient().get(reverse('costs'), {'group_by': 'event_type', 'since': '2025-02-01'})
+        self.assertEqual(response.data['groups'], [{'event_type': 'Inspection', 'total': '25.00', 'events': 1}])
+        self.assertEqual(APIClient().get(reverse('costs'), {'group_by': 'owner'}).status_code, 400)
+        self.assertEqual(APIClient().get(reverse('costs'), {'since': '2025-13-01'}).status_code, 400)
+
+
+class ReferenceCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_served_from_memory_until_changed(self):
+        asset_type = AssetType.objects.create(name='Compressor', code='CMP')
+        self.assertEqual(asset_types.get(asset_type.pk).name, 'Compressor')
+        with self.assertNumQueries(0):
+            self.assertEqual(asset_types.get(asset_type.pk).name, 'Compressor')
+            self.assertIsNone(asset_types.get(None))
+
+        asset_type.name = 'Gas Compressor'
+        asset_type.save()
+        self.assertEqual(asset_types.get(asset_type.pk).name, 'Gas Compressor')
+        asset_type.delete()
+        self.assertIsNone(asset_types.get(asset_type.pk))
+
+    def test_other_workers_follow_the_shared_generation(self):
+        asset_type = AssetType.objects.create(name='Compressor', code='CMP')
+        asset_types.get(asset_type.pk)
+        # A change made by another worker only moves the shared token
+        AssetType.objects.filter(pk=asset_type.pk).update(name='Pump')
+        cache.set(asset_types._key, 'changed elsewhere', timeout=None)
+        with self.settings(REFERENCE_CACHE_CHECK_SECONDS=0):
+            self.assertEqual(asset_types.get(asset_type.pk).name, 'Pump')
+
+    def test_explicit_invalidation_reaches_cached_payloads(self):
+        farm = create_sample_farm(asset_count=1, events_per_asset=0)
+        url = reverse('farm_assets', args=[farm.farm_id])
+        client = APIClient()
+        self.assertEqual(client.get(url).data['assets'][0]['type']['name'], 'Fixed Roof Tank')
+        AssetType.objects.update(name='Floating Roof Tank')
+        asset_types.invalidate()
+        self.assertEqual(client.get(url).data['assets'][0]['type']['name'], 'Floating Roof Tank')
+
+
+class FarmSummaryTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.farm = create_sample_farm(asset_count=3, events_per_asset=1)
+            self.assets = list(Asset.objects.filter(farm=self.farm).order_by('pk'))
+            for asset, (status, health, capacity) in zip(
+                self.assets, [('active', 80, 100.0), ('Active', 60, None), ('Maintenance', 30, 50.0)]
+            ):
+                asset.status, asset.health, asset.capacity = status, health, capacity
+                asset.save()
+            AssetEvents.objects.create(
+                event_id='OPEN-E-0', asset=self.assets[0], title='Repair', event_status='scheduled',
+            )
+
+    def summary(self, farm=None):
+        return FarmSummary.objects.get(farm=farm or self.farm)
+
+    def test_kept_current_by_asset_and_event_changes(self):
+        summary = self.summary()
+        self.assertEqual(summary.asset_count, 3)
+        self.assertEqual(summary.assets_by_status, {'active': 2, 'maintenance': 1})
+        self.assertEqual(summary.assets_by_type, {'Fixed Roof Tank': 3})
+        self.assertEqual((summary.health_avg, summary.health_min), (56.67, 30))
+        self.assertEqual(summary.total_capacity, 150.0)
+        self.assertEqual(summary.open_event_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AssetEvents.objects.get(pk='OPEN-E-0').delete()
+        self.assertEqual(self.summary().open_event_count, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Farm.objects.create(farm_id='TEST-F-00002', company_id='TEST', name='Other', status='active')
+        self.assertEqual(self.summary(other).asset_count, 0)
+        moved = self.assets[2]
+        moved.farm = other
+        with self.captureOnCommitCallbacks(execute=True):
+            moved.save()
+        self.assertEqual(self.summary().assets_by_status, {'active': 2})
+        self.assertEqual(self.summary(other).health_min, 30)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assets[0].delete()
+        self.assertEqual(self.summary().asset_count, 1)
+
+    def test_refreshed_once_per_farm_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for asset in self.assets:
+                asset.health = 10
+                asset.save()
+        # Nothing is recomputed before the commit
+        self.assertEqual(self.summary().health_min, 30)
+        with CaptureQueriesContext(connection) as ctx:
+            for callback in callbacks:
+                callback()
+        upserts = [q for q in ctx.captured_queries if 'farm_summaries' in q['sql'] and 'INSERT' in q['sql']]
+        self.assertEqual(len(upserts), 1)
+        self.assertEqual(self.summary().health_min, 10)
+
+    def test_deleted_farm_is_not_summarized_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.farm.delete()
+        self.assertFalse(FarmSummary.objects.exists())
+
+    def test_rebuild_and_endpoint(self):
+        FarmSummary.objects.all().delete()
+        call_command('rebuild_farm_summaries', stdout=io.StringIO())
+        self.assertEqual(self.summary().asset_count, 3)
+
+        response = APIClient().get(reverse('farm_summaries'), {'company_id': 'TEST'})
+        self.assertEqual(response.status_code, 200)
+        farm = response.data['farms'][0]
+        self.assertEqual(farm['farm_id'], self.farm.farm_id)
+        self.assertEqual(farm['health'], {'average': 56.67, 'minimum': 30})
+        self.assertEqual(APIClient().get(reverse('farm_summaries'), {'company_id': 'NONE'}).data['count'], 0)
+
+
+class FastSerializerParityTests(TestCase):
+    """core.fast_serializers must produce exactly what the DRF serializers do."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.farm = create_sample_farm(asset_count=4, events_per_asset=3)
+        # An asset with every optional relation missing, and an untyped event
+        bare = Asset.objects.create(
+            asset_id=f'{cls.farm.farm_id}-A-BARE', company_id='TEST', farm=cls.farm,
+            name='BARE', status='inactive', asset_type=None, location=None,
+        )
+        AssetEvents.objects.create(
+            event_id='BARE-E-0', asset=bare, title='Untyped', event_status='scheduled',
+            cost='1,200.00',
+        )
+
+    @staticmethod
+    def _normalize(assets, id_key, event_key):
+        assets = [dict(asset) for asset in assets]
+        for asset in assets:
+            if 'events' in asset:
+                asset['events'] = sorted(
+                    (dict(event) for event in asset['events']), key=lambda e: e[event_key]
+                )
+        return sorted(assets, key=lambda asset: asset[id_key])
+
+    def test_farm_assets_parity(self):
+        variants = [
+            (None, None),
+            (['name', 'status'], None),
+            (None, []),
+            (None, ['events']),
+            (['type', 'specifications', 'events'], ['location']),
+        ]
+        assets = Asset.objects.filter(farm=self.farm)
+        for fields, expand in variants:
+            with self.subTest(fields=fields, expand=expand):
+                expected = FarmAssetSerializer(
+                    assets.select_related('location', 'asset_type', 'material', 'content')
+                    .prefetch_related('events__event_type'),
+                    many=True, fields=fields, expand=expand,
+                ).data
+                self.assertEqual(
+                    self._normalize(serialize_farm_assets(assets, fields, expand), 'asset_id', 'event_id'),
+                    self._normalize(expected, 'asset_id', 'event_id'),
+                )
+
+    def test_asset_details_parity(self):
+        assets = Asset.objects.filter(farm=self.farm)
+        fast = serialize_asset_details(assets)
+        self.assertEqual(set(fast), set(assets.values_list('asset_id', flat=True)))
+        for asset in assets.with_detail_relations():
+            with self.subTest(asset_id=asset.asset_id):
+                expected = self._normalize([AssetDetailSerializer(asset).data], 'id', 'id')
+                self.assertEqual(self._normalize([fast[asset.asset_id]], 'id', 'id'), expected)
+
+
+class ModelFileServingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('asset_type_model', args=['Compressor'])
+
+    def test_range_request_returns_partial_content(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-99')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(len(b''.join(response.streaming_content)), 100)
+        self.assertTrue(response['Content-Range'].startswith('bytes 0-99/'))
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=999999999-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_stale_if_range_returns_full_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-99', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        response.close()
+
+    def test_plain_url_revalidates_with_content_hash(self):
+        model = model_registry.get('category', 'Compressor')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{model.sha256}"')
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(self.url)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertEqual(response['Content-Location'], model.url)
+        response.close()
+
+    def test_hashed_url_is_immutable(self):
+        model = model_registry.get('category', 'Compressor')
+        response = self.client.get(model.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['ETag'], f'"{model.sha256}"')
+        response.close()
+
+    def test_stale_hash_redirects_to_current_url(self):
+        model = model_registry.get('category', 'Compressor')
+        response = self.client.get(
+            reverse('hashed_model', args=['category', 'Compressor', '0' * 16])
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response['Location'], model.url)
+
+    @override_settings(FILE_OFFLOAD='nginx', FILE_OFFLOAD_PREFIX='/protected/')
+    def test_offload_to_front_server(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected/static/uploads/model_categories/Compressor.glb'
+        )
+        self.assertEqual(response.content, b'')
+
+
+class ContentEncodingTests(SimpleTestCase):
+    def negotiate(self, header, available=('br', 'gzip')):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header)
+        return negotiate_encoding(request, dict.fromkeys(available))
+
+    def test_prefers_brotli_on_equal_q(self):
+        self.assertEqual(self.negotiate('gzip, deflate, br'), 'br')
+
+    def test_respects_q_values(self):
+        self.assertEqual(self.negotiate('br;q=0.5, gzip'), 'gzip')
+        self.assertIsNone(self.negotiate('br;q=0, gzip;q=0'))
+
+    def test_wildcard_and_missing_variants(self):
+        self.assertEqual(self.negotiate('*', available=('gzip',)), 'gzip')
+        self.assertIsNone(self.negotiate('br', available=('gzip',)))
+        self.assertIsNone(self.negotiate(''))
+
+
+class CompressedModelServingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('asset_type_model', args=['Compressor'])
+        model = model_registry.get('category', 'Compressor')
+        self.gz_path = compressed_path(model.path, 'gzip')
+        with open(model.path, 'rb') as f:
+            self.original = f.read()
+        with open(self.gz_path, 'wb') as f:
+            f.write(gzip.compress(self.original))
+        os.utime(self.gz_path, ns=(model.stat.st_atime_ns, model.stat.st_mtime_ns))
+        model_registry.refresh(force=True)
+
+    def tearDown(self):
+        os.remove(self.gz_path)
+        model_registry.refresh(force=True)
+
+    def test_serves_gzip_variant(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertTrue(response['ETag'].endswith('-gzip"'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.original)
+
+    def test_identity_when_not_accepted(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(b''.join(response.streaming_content), self.original)
+
+    def test_encoded_etag_revalidates(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        etag = response['ETag']
+        response.close()
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+def make_grid_glb(size=20, meshes=2):
+    """A GLB of ``meshes`` identical size x size grids, each on its own node."""
+    document = glb.GLB({'asset': {'version': '2.0'}, 'nodes': [], 'meshes': []}, [])
+    positions, normals, indices = [], [], []
+    for y in range(size + 1):
+        for x in range(size + 1):
+            positions.extend((x / size, y / size, 0.0))
+            normals.extend((0.0, 0.0, 1.0))
+    for y in range(size):
+        for x in range(size):
+            a = y * (size + 1) + x
+            indices.extend((a, a + 1, a + size + 1, a + 1, a + size + 2, a + size + 1))
+    for i in range(meshes):
+        primitive = {
+            'attributes': {
+                'POSITION': document.add_accessor(positions, glb.FLOAT, 'VEC3', bounds=True),
+                'NORMAL': document.add_accessor(normals, glb.FLOAT, 'VEC3'),
+            },
+            'indices': document.add_accessor(
+                indices, glb.UNSIGNED_SHORT, 'SCALAR', target=glb.ELEMENT_ARRAY_BUFFER
+            ),
+        }
+        document.gltf['meshes'].append({'primitives': [primitive]})
+        document.gltf['nodes'].append({'mesh': i, 'translation': [2.0 * i, 0, 0]})
+    return document.to_bytes()
+
+
+class GLBOptimizationTests(SimpleTestCase):
+    def test_round_trip(self):
+        data = make_grid_glb()
+        self.assertEqual(glb.GLB.from_bytes(data).to_bytes(), data)
+
+    def test_dedupe_merges_identical_data(self):
+        document = glb.GLB.from_bytes(make_grid_glb(meshes=3))
+        glb.dedupe(document)
+        self.assertEqual(len(document.gltf['accessors']), 3)
+        self.assertEqual(len(document.gltf['bufferViews']), 3)
+
+    def test_quantized_positions_dequantize_to_original(self):
+        data = make_grid_glb(meshes=1)
+        original, _ = glb.GLB.from_bytes(data).read_accessor(0)
+        document = glb.GLB.from_bytes(glb.optimize(data))
+        self.assertIn('KHR_mesh_quantization', document.gltf['extensionsRequired'])
+
+        node = next(node for node in document.gltf['nodes'] if 'mesh' in node)
+        primitive = document.gltf['meshes'][node['mesh']]['primitives'][0]
+        accessor = document.gltf['accessors'][primitive['attributes']['POSITION']]
+        self.assertEqual(accessor['componentType'], glb.UNSIGNED_SHORT)
+        quantized, _ = document.read_accessor(primitive['attributes']['POSITION'])
+        offset, step = node['translation'], node['scale'][0]
+        for i, value in enumerate(original):
+            self.assertAlmostEqual(offset[i % 3] + quantized[i] * step, value, delta=step)
+
+    def test_simplify_drops_triangles(self):
+        data = make_grid_glb(size=40, meshes=1)
+        counts = []
+        for resolution in (None, 16):
+            document = glb.GLB.from_bytes(glb.optimize(data, resolution))
+            primitive = document.gltf['meshes'][0]['primitives'][0]
+            counts.append(document.gltf['accessors'][primitive['indices']]['count'])
+        self.assertEqual(counts[0], 40 * 40 * 6)
+        self.assertLess(counts[1], counts[0] / 4)
+
+    def test_real_model_shrinks(self):
+        model = model_registry.get('category', 'Compressor')
+        with open(model.path, 'rb') as f:
+            data = f.read()
+        previous = len(data)
+        for level, resolution in glb.LOD_RESOLUTIONS.items():
+            with self.subTest(level=level):
+                optimized = glb.optimize(data, resolution)
+                glb.GLB.from_bytes(optimized)
+                self.assertLess(len(optimized), previous)
+                previous = len(optimized)
+
+
+class LevelOfDetailTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('asset_type_model', args=['Compressor'])
+        model = model_registry.get('category', 'Compressor')
+        with open(model.path, 'rb') as f:
+            self.original_size = len(f.read())
+            f.seek(0)
+            low = glb.optimize(f.read(), glb.LOD_RESOLUTIONS['low'])
+        # Levels of detail go to a scratch directory, not static/uploads/optimized
+        self.optimized = tempfile.TemporaryDirectory()
+        self.previous_optimized = model_registry.optimized_directory
+        model_registry.optimized_directory = self.optimized.name
+        os.makedirs(os.path.join(self.optimized.name, 'category'))
+        self.low_path = os.path.join(self.optimized.name, 'category', 'Compressor.low.glb')
+        with open(self.low_path, 'wb') as f:
+            f.write(low)
+        os.utime(self.low_path, ns=(model.stat.st_atime_ns, model.stat.st_mtime_ns))
+        self.low_size = len(low)
+        model_registry.refresh(force=True)
+
+    def tearDown(self):
+        model_registry.optimized_directory = self.previous_optimized
+        self.optimized.cleanup()
+        model_registry.refresh(force=True)
+
+    def get(self, **params):
+        response = self.client.get(self.url, params)
+        if response.status_code == 200:
+            response.close()
+        return response
+
+    def test_lod_parameter(self):
+        response = self.get(lod='low')
+        self.assertEqual(response['X-Model-LOD'], 'low')
+        self.assertEqual(int(response['Content-Length']), self.low_size)
+
+    def test_missing_level_falls_back_to_original(self):
+        self.assertEqual(self.get(lod='medium')['X-Model-LOD'], 'original')
+
+    def test_max_bytes(self):
+        self.assertEqual(self.get(max_bytes=self.original_size)['X-Model-LOD'], 'original')
+        self.assertEqual(self.get(max_bytes=self.original_size - 1)['X-Model-LOD'], 'low')
+        # Nothing fits: the smallest variant
+        self.assertEqual(self.get(max_bytes=0)['X-Model-LOD'], 'low')
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.get(lod='ultra').status_code, 400)
+        self.assertEqual(self.get(max_bytes='lots').status_code, 400)
+
+    def test_levels_have_their_own_hashed_urls(self):
+        model = model_registry.get('category', 'Compressor')
+        self.assertEqual(
+            self.client.get(reverse('model_manifest')).data['category']['Compressor']['lods']['low']['url'],
+            model.lods['low'].url,
+        )
+        response = self.client.get(model.lods['low'].url)
+        self.assertEqual(response['X-Model-LOD'], 'low')
+        response.close()
+
+
+class ModelInfoTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('model_info', args=['category', 'FixedRoofTank'])
+
+    def test_metadata(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        model = model_registry.get('category', 'FixedRoofTank')
+        self.assertEqual(response.data['byte_size'], model.stat.st_size)
+        self.assertEqual(response.data['url'], model.url)
+        self.assertEqual(response.data['mesh_count'], 1)
+        self.assertGreater(response.data['triangle_count'], 0)
+        self.assertEqual(len(response.data['bounding_box']['size']), 3)
+        texture = response.data['textures'][0]
+        self.assertEqual((texture['mime_type'], texture['width']), ('image/png', 2048))
+
+    def test_changed_file_is_reread(self):
+        self.client.get(self.url)
+        ModelInfo.objects.filter(name='FixedRoofTank').update(file_mtime_ns=0, mesh_count=99)
+        self.assertEqual(self.client.get(self.url).data['mesh_count'], 1)
+
+    def test_concurrent_first_refresh(self):
+        model = model_registry.get('category', 'FixedRoofTank')
+        stored = refresh_model_info(model)
+        # Another worker inserted the rows after this one found none
+        rows = refresh_model_info(model, rows={})
+        self.assertEqual({lod: row.pk for lod, row in rows.items()},
+                         {lod: row.pk for lod, row in stored.items()})
+
+    def test_unknown_model(self):
+        response = self.client.get(reverse('model_info', args=['category', 'Nope']))
+        self.assertEqual(response.status_code, 404)
+
+
+class FarmSceneTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.farm = create_sample_farm(asset_count=3, events_per_asset=0)
+        self.farm.location.latitude, self.farm.location.longitude = 29.7, -95.3
+        self.farm.location.save()
+        Asset.objects.filter(asset_id=f'{self.farm.farm_id}-A-00000').update(
+            latitude=29.701, longitude=-95.3, diameter=20.0, height=10.0,
+        )
+        pipeline = AssetType.objects.create(name='Pipeline')
+        Asset.objects.filter(asset_id=f'{self.farm.farm_id}-A-00002').update(asset_type=pipeline)
+        self.url = reverse('farm_scene', args=[self.farm.farm_id])
+
+    def get_scene(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, glb.GLB.from_bytes(b''.join(response.streaming_content))
+
+    def test_assets_are_instances_of_their_type_model(self):
+        response, scene = self.get_scene()
+        self.assertEqual(response['Content-Type'], 'model/gltf-binary')
+        self.assertIn('EXT_mesh_gpu_instancing', scene.gltf['extensionsRequired'])
+        self.assertEqual(len(scene.gltf['meshes']), 1)
+
+        root = scene.gltf['nodes'][0]
+        group = scene.gltf['nodes'][root['children'][0]]
+        self.assertEqual(group['name'], 'FixedRoofTank')
+        # The pipeline has no model and is left out
+        self.assertEqual(group['extras']['asset_ids'], [
+            f'{self.farm.farm_id}-A-00000', f'{self.farm.farm_id}-A-00001',
+        ])
+
+        instancing = scene.gltf['nodes'][group['children'][0]]['extensions']
+        attributes = instancing['EXT_mesh_gpu_instancing']['attributes']
+        translations, _ = scene.read_accessor(attributes['TRANSLATION'])
+        scales, _ = scene.read_accessor(attributes['SCALE'])
+        self.assertEqual(len(translations), 6)
+        # 0.001 degrees north of the farm, i.e. -Z
+        self.assertAlmostEqual(translations[2], -111.3, delta=1.0)
+        category = farm_scene.CategoryModel(
+            glb.GLB.load(model_registry.get('category', 'FixedRoofTank').path)
+        )
+        self.assertAlmostEqual(scales[0] * category.diameter, 20.0, places=3)
+        self.assertAlmostEqual(scales[1] * category.height, 10.0, places=3)
+        self.assertEqual(list(scales[3:]), [1.0, 1.0, 1.0])
+
+    def test_scene_is_cached_until_assets_change(self):
+        response, _ = self.get_scene()
+        etag = response['ETag']
+        files = os.listdir(farm_scene.scene_directory())
+        self.assertEqual(len(files), 1)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.get_scene()
+        self.assertEqual(os.listdir(farm_scene.scene_directory()), files)
+
+        asset = self.farm.assets.get(asset_id=f'{self.farm.farm_id}-A-00001')
+        asset.diameter = 5.0
+        asset.save()
+        response, _ = self.get_scene()
+        self.assertNotEqual(response['ETag'], etag)
+        rebuilt = os.listdir(farm_scene.scene_directory())
+        self.assertEqual(len(rebuilt), 1)
+        self.assertNotEqual(rebuilt, files)
+
+    def test_levels_of_detail_do_not_replace_each_other(self):
+        original = farm_scene.farm_scene_path(self.farm)
+        low = farm_scene.farm_scene_path(self.farm, 'low')
+        self.assertNotEqual(original, low)
+        self.assertEqual(farm_scene.farm_scene_path(self.farm), original)
+        self.assertTrue(os.path.exists(low))
+
+    def test_removed_file_is_not_found(self):
+        path = farm_scene.farm_scene_path(self.farm)
+        os.remove(path)
+        with self.assertRaises(Http404):
+            serve_file(RequestFactory().get(self.url), path, 'model/gltf-binary', 'scene.glb')
+
+    def test_farm_without_models(self):
+        Asset.objects.filter(farm=self.farm).delete()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_lod(self):
+        response = self.client.get(self.url, {'lod': 'ultra'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_category_model_name(self):
+        self.assertEqual(farm_scene.category_model_name('Fixed Roof Tank'), 'FixedRoofTank')
+        self.assertEqual(farm_scene.category_model_name('Heat Exchanger'), 'HeatExchanger')
+
+
+class ModelBundleTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.farm = create_sample_farm(asset_count=2, events_per_asset=0)
+        self.url = reverse('model_bundle', args=[self.farm.farm_id])
+
+    def get_bundle(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_bundle_holds_the_models_the_farm_uses(self):
+        response, bundle = self.get_bundle()
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertEqual(
+            sorted(bundle.namelist()), ['manifest.json', 'models/category/FixedRoofTank.glb']
+        )
+        model = model_registry.get('category', 'FixedRoofTank')
+        with open(model.path, 'rb') as f:
+            self.assertEqual(bundle.read('models/category/FixedRoofTank.glb'), f.read())
+        manifest = json.loads(bundle.read('manifest.json'))
+        self.assertEqual(manifest['files'][0]['sha256'], model.sha256)
+        self.assertEqual(manifest['files'][0]['url'], model.url)
+
+    def test_bundle_is_rebuilt_only_when_the_content_set_changes(self):
+        response, _ = self.get_bundle()
+        etag = response['ETag']
+        files = os.listdir(model_bundle.bundle_directory())
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # A changed asset invalidates the ETag, but not the bundle itself
+        asset = self.farm.assets.first()
+        asset.height = 12.0
+        asset.save()
+        response, _ = self.get_bundle()
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(os.listdir(model_bundle.bundle_directory()), files)
+
+        Asset.objects.create(
+            asset_id=f'{self.farm.farm_id}-A-99999', company_id='TEST', farm=self.farm,
+            name='COMP-1', asset_type=AssetType.objects.create(name='Compressor'),
+            status='active',
+        )
+        _, bundle = self.get_bundle()
+        self.assertIn('models/category/Compressor.glb', bundle.namelist())
+        rebuilt = os.listdir(model_bundle.bundle_directory())
+        self.assertEqual(len(rebuilt), 1)
+        self.assertNotEqual(rebuilt, files)
+
+    def test_levels_of_detail_do_not_replace_each_other(self):
+        names = ['Fixed Roof Tank']
+        original = model_bundle.model_bundle_path(self.farm.farm_id, names)
+        low = model_bundle.model_bundle_path(self.farm.farm_id, names, 'low')
+        self.assertNotEqual(original, low)
+        self.assertEqual(model_bundle.model_bundle_path(self.farm.farm_id, names), original)
+        self.assertTrue(os.path.exists(low))
+
+    def test_unknown_farm(self):
+        response = self.client.get(reverse('model_bundle', args=['NO-SUCH-FARM']))
+        self.assertEqual(response.status_code, 404)
+
+
+class BlobStoreTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.source = os.path.join(media_root, 'source.glb')
+        with open(self.source, 'wb') as f:
+            f.write(b'glTF' + bytes(100))
+
+    def blobs(self):
+        return sorted(name for name, _ in blob_store._blobs())
+
+    def test_same_content_is_stored_once(self):
+        first, created = blob_store.store_file('category', 'FixedRoofTank', self.source)
+        self.assertTrue(created)
+        second, created = blob_store.store_file('category', 'FixedRoofTankCopy', self.source)
+        self.assertFalse(created)
+        self.assertEqual(first.sha256, second.sha256)
+        self.assertEqual(self.blobs(), [first.sha256])
+        self.assertEqual(first.content_type, 'model/gltf-binary')
+        with blob_store.open_stored_file('category', 'FixedRoofTankCopy') as f:
+            self.assertEqual(f.read(), b'glTF' + bytes(100))
+
+    def test_copy_and_rename_only_touch_names(self):
+        stored, _ = blob_store.store_file('category', 'Tank', self.source)
+        blob_store.copy_stored_file('category', 'Tank', 'farm', 'TEST-F-00001')
+        blob_store.rename_stored_file('category', 'Tank', 'category', 'FixedRoofTank')
+        self.assertEqual(
+            sorted(StoredFile.objects.values_list('kind', 'name', 'sha256')),
+            [('category', 'FixedRoofTank', stored.sha256), ('farm', 'TEST-F-00001', stored.sha256)],
+        )
+        self.assertEqual(self.blobs(), [stored.sha256])
+
+    def test_garbage_collection(self):
+        stored, _ = blob_store.store_file('category', 'Tank', self.source)
+        # Young blobs are kept: they may belong to a row not saved yet
+        self.assertEqual(blob_store.collect_garbage(), (0, 0))
+        self.assertEqual(blob_store.collect_garbage(min_age=0), (0, 0))
+        StoredFile.objects.all().delete()
+        self.assertEqual(blob_store.collect_garbage(min_age=0), (1, stored.size))
+        self.assertEqual(self.blobs(), [])
+
+
+class FileIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def touch(self, filename):
+        with open(os.path.join(self.directory, filename), 'wb') as f:
+            f.write(b'%PDF-1.4')
+
+    def test_tracks_directory_changes(self):
+        index = FileIndex(self.directory, '.pdf', refresh_interval=0)
+        self.touch('FARM-1.pdf')
+        self.touch('notes.txt')
+        self.assertEqual(index.names(), ['FARM-1'])
+        self.assertEqual(index.stat('FARM-1').st_size, 8)
+        self.assertEqual(index.path('FARM-1'), os.path.join(self.directory, 'FARM-1.pdf'))
+
+        self.touch('FARM-2.pdf')
+        os.remove(os.path.join(self.directory, 'FARM-1.pdf'))
+        self.assertNotIn('FARM-1', index)
+        self.assertIn('FARM-2', index)
+
+    def test_polls_at_most_every_interval(self):
+        index = FileIndex(self.directory, '.pdf', refresh_interval=3600)
+        self.assertEqual(index.names(), [])
+        self.touch('FARM-1.pdf')
+        self.assertNotIn('FARM-1', index)
+        index.refresh(force=True)
+        self.assertIn('FARM-1', index)
+
+    def test_missing_directory(self):
+        index = FileIndex(os.path.join(self.directory, 'missing'), '.pdf', refresh_interval=0)
+        self.assertIsNone(index.path('FARM-1'))
+
+
+class ByteLRUTests(SimpleTestCase):
+    def test_evicts_least_recently_used_within_budget(self):
+        lru = ByteLRU(max_bytes=10)
+        lru.put('a', b'aaaa')
+        lru.put('b', b'bbbb')
+        self.assertEqual(lru.get('a'), b'aaaa')
+        lru.put('c', b'cccc')
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), b'cccc')
+        self.assertEqual(lru.stats(), {
+            'hits': 2, 'misses': 1, 'evictions': 1, 'items': 2, 'bytes': 8, 'max_bytes': 10,
+        })
+
+    def test_oversized_items_are_not_cached(self):
+        lru = ByteLRU(max_bytes=100, max_item_bytes=4)
+        lru.put('big', b'12345')
+        self.assertIsNone(lru.get('big'))
+        self.assertEqual(lru.stats()['bytes'], 0)
+
+
+@override_settings(MODEL_FILE_CACHE_BYTES=8 * 1024 * 1024)
+class ModelFileCacheTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        file_cache().clear()
+        self.url = reverse('asset_type_model', args=['Compressor'])
+        self.model = model_registry.get('category', 'Compressor')
+
+    def test_repeated_requests_are_served_from_memory(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first['X-File-Cache'], 'miss')
+        second = self.client.get(self.url)
+        self.assertEqual(second['X-File-Cache'], 'hit')
+        with open(self.model.path, 'rb') as f:
+            self.assertEqual(second.content, f.read())
+
+        partial = self.client.get(self.url, HTTP_RANGE='bytes=0-3')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.content, b'glTF')
+        self.assertEqual(partial['X-File-Cache'], 'hit')
+
+    @override_settings(MODEL_FILE_CACHE_MAX_FILE_BYTES=1024)
+    def test_large_files_bypass_the_cache(self):
+        response = self.client.get(self.url)
+        self.assertNotIn('X-File-Cache', response)
+        response.close()
+
+
+class FarmLayoutTests(TestCase):
+    farm_id = 'SYS-1F057E08-F-93E85'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('farm_layout', args=[self.farm_id])
+
+    def test_serves_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=0-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+        response = self.client.get(self.url)
+        response.close()
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_pdf_url_points_at_the_layout_endpoint(self):
+        cache.clear()
+        farm = create_sample_farm(farm_id=self.farm_id, asset_count=1, events_per_asset=0)
+        response = self.client.get(reverse('farm_assets', args=[farm.farm_id]))
+        self.assertEqual(response.data['pdf_url'], self.url)
+
+    def test_upload_shows_up_on_the_farm_endpoint(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        previous = layout_index.directory, layout_index.refresh_interval
+        layout_index.directory, layout_index.refresh_interval = directory, 0
+        self.addCleanup(layout_index.refresh, force=True)
+        self.addCleanup(setattr, layout_index, 'refresh_interval', previous[1])
+        self.addCleanup(setattr, layout_index, 'directory', previous[0])
+        layout_index.refresh(force=True)
+
+        cache.clear()
+        farm = create_sample_farm(farm_id=self.farm_id, asset_count=1, events_per_asset=0)
+        url = reverse('farm_assets', args=[farm.farm_id])
+        response = self.client.get(url)
+        self.assertIsNone(response.data['pdf_url'])
+        etag = response['ETag']
+
+        with open(os.path.join(directory, f'{self.farm_id}.pdf'), 'wb') as f:
+            f.write(b'%PDF-1.4')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pdf_url'], self.url)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unknown_farm(self):
+        self.assertEqual(self.client.get(reverse('farm_layout', args=['NOPE'])).status_code, 404)
+
+
+class LinearizationTests(SimpleTestCase):
+    def check(self, data):
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as f:
+            f.write(data)
+            f.flush()
+            return linearization(f.name)
+
+    def test_linearization(self):
+        body = b' ' * 200 + b'%%EOF\n'
+        header = b'%PDF-1.5\n1 0 obj\n<< /Linearized 1 /L {length} /O 3 /E 100 /N 1 /T 50 >>\nendobj\n'
+        length = len(header.replace(b'{length}', b'000')) + len(body)
+        linearized = header.replace(b'{length}', str(length).encode()) + body
+        self.assertEqual(self.check(linearized), LINEARIZED)
+        self.assertEqual(self.check(linearized + b'% incremental update\n'), STALE)
+        self.assertEqual(self.check(b'%PDF-1.3\n3 0 obj\n<</Type /Page>>\nendobj\n'), NOT_LINEARIZED)
+
+
+def make_pdf(content, uri=None):
+    """A one-page PDF with a Flate-compressed content stream (and a link to ``uri``)."""
+    stream = zlib.compress(content)
+    annots = f'/Annots [<< /Subtype /Link /A << /S /URI /URI ({uri}) >> >>] ' if uri else ''
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        f'<< /Type /Page /Parent 2 0 R /Contents 4 0 R {annots}'
+        '/Resources << /Font << /F1 5 0 R >> >> >>'.encode(),
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(stream) + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    for number, body in enumerate(objects, start=1):
+        out.write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+    out.write(b'trailer\n<< /Root 1 0 R >>\n%%EOF\n')
+    return out.getvalue()
+
+
+class LayoutSearchTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.index = FileIndex(self.directory, '.pdf', refresh_interval=0)
+
+    def write(self, farm_id, data):
+        path = os.path.join(self.directory, f'{farm_id}.pdf')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_extract_text(self):
+        path = self.write('F1', make_pdf(
+            b'BT /F1 12 Tf 10 700 Td (Tank FIX-03E9A2) Tj 0 -14 Td [(Pump)-400(P\\(2\\))] TJ ET',
+            uri='https://example.com/SYS-AAAA-F-1-A-2?isAsset=true',
+        ))
+        text = extract_text(path)
+        self.assertEqual(len(text), 1)
+        self.assertIn('Tank FIX-03E9A2\nPump P(2)', text[0])
+        self.assertIn('SYS-AAAA-F-1-A-2', tokenize(text[0]))
+
+    def test_incremental_index_and_search(self):
+        self.write('F1', make_pdf(b'BT /F1 12 Tf (FIX-03E9A2 Compressor) Tj ET'))
+        self.write('F2', make_pdf(b'BT /F1 12 Tf (FIX-77 compressor compressor) Tj ET'))
+        self.write('F3', b'not a pdf')
+
+        result = refresh_layout_search(index=self.index)
+        self.assertEqual(sorted(result['indexed']), ['F1', 'F2', 'F3'])
+        self.assertTrue(LayoutDocument.objects.get(farm_id='F3').error)
+        self.assertEqual(refresh_layout_search(index=self.index)['indexed'], [])
+
+        self.assertEqual([r['farm_id'] for r in search_layouts('compressor')], ['F2', 'F1'])
+        self.assertEqual([r['farm_id'] for r in search_layouts('fix-03e9a2 compressor')], ['F1'])
+        # One match each: ties are ordered by farm
+        self.assertEqual([r['farm_id'] for r in search_layouts('FIX*')], ['F1', 'F2'])
+        self.assertEqual(search_layouts('FIX'), [])
+
+        path = self.write('F1', make_pdf(b'BT /F1 12 Tf (Separator) Tj ET'))
+        os.utime(path, ns=(1, 1))
+        os.remove(os.path.join(self.directory, 'F2.pdf'))
+        result = refresh_layout_search(index=self.index)
+        self.assertEqual(result['indexed'], ['F1'])
+        self.assertEqual(result['removed'], ['F2'])
+        self.assertEqual(search_layouts('compressor'), [])
+        self.assertEqual(search_layouts('separator')[0]['pages'], [1])
+
+    def test_search_endpoint(self):
+        farm_id = 'SYS-319483CA-F-2D52A'
+        document = LayoutDocument.objects.create(farm_id=farm_id, file_size=1, file_mtime_ns=1, page_count=1)
+        document.tokens.create(token='SYS-319483CA-F-2D52A-A-33493', page=1, count=1)
+        response = APIClient().get(reverse('layout_search'), {'q': 'sys-319483ca-f-2d52a*'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{
+            'farm_id': farm_id, 'pages': [1], 'matches': 1,
+            'pdf_url': reverse('farm_layout', args=[farm_id]),
+        }])
+        self.assertEqual(APIClient().get(reverse('layout_search')).status_code, 400)
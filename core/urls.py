@@ -8,6 +8,16 @@ urlpatterns = [
     # Core Flask-compatible endpoints
     path('farm/<str:farm_id>/assets', views.get_farm_assets, name='farm_assets'),
     path('api/asset/<str:asset_id>', views.get_asset_details, name='asset_details'),
+    path('api/assets/batch', views.get_asset_details_batch, name='asset_details_batch'),
     path('api/asset-model/<str:asset_type>', views.get_asset_type_model, name='asset_type_model'),
+    path('api/costs', views.get_costs, name='costs'),
     path('api/farm-model/<str:farm_id>', views.get_farm_model, name='farm_model'),
+    path('api/farms/summary', views.get_farm_summaries, name='farm_summaries'),
+    path('api/farm/<str:farm_id>/scene', views.get_farm_scene, name='farm_scene'),
+    path('api/farm/<str:farm_id>/model-bundle', views.get_model_bundle, name='model_bundle'),
+    path('api/farm/<str:farm_id>/layout', views.get_farm_layout, name='farm_layout'),
+    path('api/layouts/search', views.search_farm_layouts, name='layout_search'),
+    path('api/models', views.get_model_manifest, name='model_manifest'),
+    path('api/models/<str:kind>/<str:name>/<slug:digest>.glb', views.get_hashed_model, name='hashed_model'),
+    path('api/model-info/<str:kind>/<str:name>', views.get_model_info, name='model_info'),
 ]
\ No newline at end of file
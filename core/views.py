@@ -1,16 +1,244 @@
-import os
+import hashlib
+import json
+from decimal import Decimal
 from django.shortcuts import get_object_or_404
-from django.conf import settings
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.decorators import api_view
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
 from rest_framework.response import Response
+from rest_framework.utils import encoders
 from django.core.management import call_command
+from django.utils.dateparse import parse_date
 from rest_framework.reverse import reverse
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
-from .models import Farm, Asset, AssetType, Location
-from .serializers import AssetDetailSerializer, FarmAssetSerializer
+from .cache import (
+    asset_last_modified, farm_last_modified, get_asset_version, get_cached_farm_assets,
+    get_farm_version, set_cached_farm_assets,
+)
+from .costs import SPEND_GROUPS, spend_rollup
+from .file_index import farm_layout_url, layout_index
+from .file_serving import encoded_etag, file_etag, file_last_modified, negotiate_encoding, serve_file
+from .farm_scene import farm_scene_path, models_digest
+from .fast_serializers import iter_farm_assets, serialize_asset_details, serialize_farm_assets
+from .glb import LOD_RESOLUTIONS, GLBError
+from .layout_search import parse_query, search_layouts
+from .model_bundle import layout_stamp, model_bundle_path
+from .model_info import model_info_rows
+from .model_registry import MODEL_KINDS, registry as model_registry
+from .reference_cache import locations, reference_generation
+from .models import Farm, FarmSummary, Asset, AssetEvents, AssetType, Location
+from .serializers import (
+    AssetBatchRequestSerializer, AssetDetailSerializer, FarmAssetSerializer, FarmSummarySerializer,
+    ModelInfoSerializer,
+)
+
+
+# Content-hashed model URLs never change meaning, so they can be cached forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Plain model URLs must be revalidated; the content-hash ETag makes that a 304
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# ?lod= / ?max_bytes= on the model endpoints (see _model_variant)
+MODEL_VARIANT_PARAMETERS = [
+    OpenApiParameter(
+        name='lod',
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        description='Level of detail; falls back to the uploaded model if not built',
+        enum=list(LOD_RESOLUTIONS),
+        required=False
+    ),
+    OpenApiParameter(
+        name='max_bytes',
+        type=OpenApiTypes.INT,
+        location=OpenApiParameter.QUERY,
+        description='Serve the most detailed variant whose transfer size fits this budget',
+        required=False
+    ),
+]
+
+# Assets (and their events) loaded per round trip when streaming
+STREAM_CHUNK_SIZE = 200
+
+
+# Conditional GET validators ---------------------------------------------------
+# These only read a version from the cache (or the model registry), so a matching
+# If-None-Match / If-Modified-Since is answered with a 304 before the view
+# touches the ORM or serializes anything. Payloads embedding reference rows
+# also depend on their generation (core.reference_cache), and the farm payload
+# on its layout PDF (core.file_index).
+
+def _farm_assets_etag(request, farm_id):
+    etag = f'farm-{farm_id}-{get_farm_version(farm_id)}-{reference_generation()}'
+    stamp = layout_stamp(farm_id)
+    if stamp:
+        etag += '-' + stamp
+    variant = _farm_assets_variant(request)
+    if variant != 'all':
+        etag += '-' + hashlib.md5(variant.encode()).hexdigest()[:8]
+    if _wants_stream(request):
+        etag += '-stream'
+    return etag
+
+
+def _farm_assets_last_modified(request, farm_id):
+    last_modified = farm_last_modified(farm_id)
+    layout = layout_index.stat(farm_id)
+    if layout is not None:
+        last_modified = max(last_modified, file_last_modified(layout))
+    return last_modified
+
+
+def _asset_etag(request, asset_id):
+    return f'asset-{asset_id}-{get_asset_version(asset_id)}-{reference_generation()}'
+
+
+def _asset_last_modified(request, asset_id):
+    return asset_last_modified(asset_id)
+
+
+def _model_etag(request, model):
+    return encoded_etag(model.sha256, negotiate_encoding(request, model.encodings))
+
+
+def _requested_model(request, kind, name):
+    """The model (or level of detail) a request resolves to, None if it cannot."""
+    model = model_registry.get(kind, name)
+    if model is None:
+        return None
+    try:
+        return _model_variant(request, model)
+    except ValueError:
+        return None
+
+
+def _model_file_validators(kind, url_kwarg):
+    """(etag_func, last_modified_func) for the model named by ``url_kwarg``."""
+    def etag_func(request, **kwargs):
+        model = _requested_model(request, kind, kwargs[url_kwarg])
+        return _model_etag(request, model) if model else None
+
+    def last_modified_func(request, **kwargs):
+        model = _requested_model(request, kind, kwargs[url_kwarg])
+        return file_last_modified(model.stat) if model else None
+
+    return etag_func, last_modified_func
+
+
+def _hashed_model(kind, name, digest):
+    model = model_registry.get(kind, name)
+    if model is None:
+        return None
+    return next((variant for variant in model.variants if variant.digest == digest), None)
+
+
+def _hashed_model_etag(request, kind, name, digest):
+    model = _hashed_model(kind, name, digest)
+    return _model_etag(request, model) if model else None
+
+
+def _requested_lod(request):
+    lod = request.GET.get('lod')
+    if lod is not None and lod not in LOD_RESOLUTIONS:
+        raise ValueError(f'lod must be one of: {", ".join(LOD_RESOLUTIONS)}')
+    return lod
+
+
+def _requested_spend_groups(request):
+    group_by = [name for name in request.GET.get('group_by', 'farm').split(',') if name]
+    unknown = [name for name in group_by if name not in SPEND_GROUPS]
+    if unknown or not group_by or len(set(group_by)) != len(group_by):
+        raise ValueError(f'group_by must be a comma-separated subset of: {", ".join(SPEND_GROUPS)}')
+    return group_by
+
+
+def _requested_date(request, name):
+    value = request.GET.get(name)
+    if value is None:
+        return None
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+    return date
+
+
+def _farm_scene_etag(request, farm_id):
+    try:
+        lod = _requested_lod(request)
+    except ValueError:
+        return None
+    return f'scene-{farm_id}-{get_farm_version(farm_id)}-{lod or "original"}-{models_digest(lod)}'
+
+
+def _model_bundle_etag(request, farm_id):
+    try:
+        lod = _requested_lod(request)
+    except ValueError:
+        return None
+    farm_model = model_registry.get('farm', farm_id)
+    parts = [
+        'bundle', farm_id, str(get_farm_version(farm_id)), lod or 'original', models_digest(lod),
+        farm_model.lods.get(lod, farm_model).digest if farm_model else '', layout_stamp(farm_id),
+    ]
+    return '-'.join(parts)
+
+
+def _layout_etag(request, farm_id):
+    stat = layout_index.stat(farm_id)
+    return file_etag(stat) if stat else None
+
+
+def _layout_last_modified(request, farm_id):
+    stat = layout_index.stat(farm_id)
+    return file_last_modified(stat) if stat else None
+
+
+def _transfer_size(request, model):
+    encoding = negotiate_encoding(request, model.encodings)
+    return model.encodings[encoding][1].st_size if encoding else model.stat.st_size
+
+
+def _model_variant(request, model):
+    """
+    The level of detail picked by ``?lod=`` or ``?max_bytes=``, falling back
+    to the uploaded model when the level has not been built.
+    ``max_bytes`` picks the most detailed variant whose transfer fits, or the
+    smallest one if none does. Raises ValueError for invalid values.
+    """
+    lod = request.GET.get('lod')
+    max_bytes = request.GET.get('max_bytes')
+    if lod is not None:
+        if lod not in LOD_RESOLUTIONS:
+            raise ValueError(f'lod must be one of: {", ".join(LOD_RESOLUTIONS)}')
+        return model.lods.get(lod, model)
+    if max_bytes is not None:
+        try:
+            budget = int(max_bytes)
+        except ValueError:
+            budget = -1
+        if budget < 0:
+            raise ValueError('max_bytes must be a non-negative integer')
+        variants = sorted(model.variants, key=lambda variant: _transfer_size(request, variant))
+        fitting = [variant for variant in variants if _transfer_size(request, variant) <= budget]
+        return fitting[-1] if fitting else variants[0]
+    return model
+
+
+def _serve_model(request, model, cache_control):
+    # Range requests and X-Accel-Redirect/X-Sendfile offload: see core.file_serving
+    response = serve_file(
+        request, model.path, 'model/gltf-binary', model.filename, model.stat,
+        etag=model.sha256, cache_control=cache_control, encodings=model.encodings,
+    )
+    response['Content-Location'] = model.url
+    response['X-Model-LOD'] = model.lod or 'original'
+    return response
 
 
 @extend_schema(
@@ -28,10 +256,22 @@ def api_root(request, format=None):
         'farms': {
             'farm_assets': 'Use: /farm/{farm_id}/assets',
             'farm_model': 'Use: /api/farm-model/{model_id}',
+            'farm_scene': 'Use: /api/farm/{farm_id}/scene',
+            'model_bundle': 'Use: /api/farm/{farm_id}/model-bundle',
+            'farm_layout': 'Use: /api/farm/{farm_id}/layout',
+            'farm_summaries': 'Use: /api/farms/summary',
+            'layout_search': 'Use: /api/layouts/search?q={terms}',
         },
         'assets': {
             'asset_details': 'Use: /api/asset/{asset_id}',
+            'asset_details_batch': 'Use: POST /api/assets/batch {"asset_ids": [...]}',
             'asset_model': 'Use: /api/asset-model/{asset_type}',
+            'costs': 'Use: /api/costs?group_by=farm,month',
+        },
+        'models': {
+            'model_manifest': 'Use: /api/models',
+            'hashed_model': 'Use: /api/models/{kind}/{name}/{sha256_prefix}.glb',
+            'model_info': 'Use: /api/model-info/{kind}/{name}',
         },
         'sample_data': {
             'sample_farm_id': 'SYS-1D3407DB-F-13083',
@@ -51,10 +291,77 @@ def api_root(request, format=None):
     })
 
 
+def _split_param(request, name):
+    value = request.GET.get(name)
+    if value is None:
+        return None
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def _farm_assets_selection(request):
+    """``(fields, expand)`` from ``?fields=`` / ``?expand=`` (None when absent)."""
+    return _split_param(request, 'fields'), _split_param(request, 'expand')
+
+
+def _farm_assets_variant(request):
+    """Stable name of the requested fieldset, used in cache keys and ETags."""
+    selected = FarmAssetSerializer.selected_fields(*_farm_assets_selection(request))
+    if selected == set(FarmAssetSerializer.Meta.fields):
+        return 'all'
+    return ','.join(sorted(selected))
+
+
+def _wants_stream(request):
+    return request.GET.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def _farm_location(farm):
+    location = locations.get(farm.location_id)
+    return location.to_dict() if location else {}
+
+
+def _dumps(value):
+    # Same encoding choices as DRF's JSONRenderer with default settings
+    return json.dumps(
+        value, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def _stream_farm_assets(farm, assets, fields, expand):
+    """
+    Yield the farm payload as JSON, one asset at a time.
+
+    The envelope goes out first so clients can render the farm before the
+    assets arrive; ``assets_count`` closes the object since it is only known
+    at the end. Assets are read in chunks with their events fetched per
+    chunk, so memory stays bounded by STREAM_CHUNK_SIZE rather than farm size.
+    """
+    envelope = _dumps({
+        'farm_id': farm.farm_id,
+        'farm_name': farm.name,
+        'farm_description': farm.description,
+        'pdf_url': farm_layout_url(farm.farm_id),
+        'location': _farm_location(farm),
+    })
+    yield envelope[:-1] + b',"assets":['
+
+    count = 0
+    for asset in iter_farm_assets(assets, fields, expand, chunk_size=STREAM_CHUNK_SIZE):
+        if count:
+            yield b','
+        yield _dumps(asset)
+        count += 1
+
+    yield b'],"assets_count":%d}' % count
+
+
 @extend_schema(
     tags=['Farms'],
     summary='Get Farm Assets',
-    description='Retrieve all assets associated with a specific farm, including their specifications, events, and location data.',
+    description=(
+        'Retrieve all assets associated with a specific farm, including their specifications, '
+        'events, and location data. Use `fields` and `expand` to request a lighter payload.'
+    ),
     parameters=[
         OpenApiParameter(
             name='farm_id',
@@ -62,44 +369,83 @@ def api_root(request, format=None):
             location=OpenApiParameter.PATH,
             description='Unique farm identifier (e.g., SYS-1D3407DB-F-13083)',
             required=True
-        )
+        ),
+        OpenApiParameter(
+            name='fields',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description='Comma-separated asset fields to return (e.g., name,status,type). Defaults to all.',
+            required=False
+        ),
+        OpenApiParameter(
+            name='expand',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description=(
+                'Comma-separated heavy fields to include: events, location. '
+                'When given, only the listed ones are returned; when omitted, all are.'
+            ),
+            required=False
+        ),
+        OpenApiParameter(
+            name='stream',
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+            description='Stream the response asset by asset (for very large farms).',
+            required=False
+        ),
     ],
     responses={
         200: OpenApiResponse(description='Farm assets retrieved successfully'),
+        400: OpenApiResponse(description='Unknown field requested'),
         404: OpenApiResponse(description='Farm not found')
     }
 )
 @api_view(['GET'])
+@condition(etag_func=_farm_assets_etag, last_modified_func=_farm_assets_last_modified)
 def get_farm_assets(request, farm_id):
     """
     Get all assets for a specific farm
-    URL: /farm/{farm_id}/assets
+    URL: /farm/{farm_id}/assets?fields=...&expand=...&stream=true
     """
+    fields, expand = _farm_assets_selection(request)
+    unknown = FarmAssetSerializer.unknown_fields(fields, expand)
+    if unknown:
+        return Response(
+            {'error': f'Unknown fields: {", ".join(unknown)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if _wants_stream(request):
+        farm = get_object_or_404(Farm, farm_id=farm_id)
+        return StreamingHttpResponse(
+            _stream_farm_assets(farm, Asset.objects.filter(farm=farm), fields, expand),
+            content_type='application/json'
+        )
+
+    variant = _farm_assets_variant(request)
+    payload, version = get_cached_farm_assets(farm_id, variant)
+    if payload is not None:
+        # The layout PDF is not part of the farm version: look it up per request
+        return Response(dict(payload, pdf_url=farm_layout_url(farm_id)))
+
     farm = get_object_or_404(Farm, farm_id=farm_id)
     
-    # Get all assets for this farm with related data
-    assets = Asset.objects.filter(farm=farm).select_related(
-        'location', 'asset_type', 'material', 'content'
-    ).prefetch_related('events__event_type')
-    
-    # Serialize assets
-    assets_serializer = FarmAssetSerializer(assets, many=True)
+    # Serialize the farm's assets straight from rows; only the columns the
+    # requested fields need are selected (see core.fast_serializers)
+    assets = serialize_farm_assets(Asset.objects.filter(farm=farm), fields, expand)
     
-    # Check for PDF file
-    pdf_url = None
-    pdf_file_path = os.path.join(settings.BASE_DIR, 'static', 'uploads', 'farm_layouts', f'{farm.farm_id}.pdf')
-    if os.path.exists(pdf_file_path):
-        pdf_url = f"/static/uploads/farm_layouts/{farm.farm_id}.pdf"
-    
-    return Response({
+    payload = {
         'farm_id': farm.farm_id,
         'farm_name': farm.name,
         'assets_count': len(assets),
-        'assets': assets_serializer.data,
+        'assets': assets,
         'farm_description': farm.description,
-        'pdf_url': pdf_url,
-        'location': farm.location.to_dict() if farm.location else {}
-    })
+        'pdf_url': farm_layout_url(farm.farm_id),
+        'location': _farm_location(farm)
+    }
+    set_cached_farm_assets(farm.farm_id, version, payload, variant)
+    return Response(payload)
 
 
 @extend_schema(
@@ -121,12 +467,13 @@ def get_farm_assets(request, farm_id):
     }
 )
 @api_view(['GET'])
+@condition(etag_func=_asset_etag, last_modified_func=_asset_last_modified)
 def get_asset_details(request, asset_id):
     """
     Get detailed asset information by asset_id
     URL: /api/asset/{asset_id}
     """
-    asset = get_object_or_404(Asset, asset_id=asset_id)
+    asset = get_object_or_404(Asset.objects.with_detail_relations(), asset_id=asset_id)
     serializer = AssetDetailSerializer(asset)
     return Response(serializer.data)
 
@@ -137,10 +484,45 @@ def get_asset_details(request, asset_id):
 
 
 
+@extend_schema(
+    tags=['Assets'],
+    summary='Get Asset Details in Batch',
+    description=(
+        'Resolve many assets in one request. Returns asset details keyed by asset ID; '
+        'IDs that do not exist get an error entry instead of failing the request.'
+    ),
+    request=AssetBatchRequestSerializer,
+    responses={
+        200: OpenApiResponse(description='Asset details keyed by asset ID'),
+        400: OpenApiResponse(description='Invalid list of asset IDs')
+    }
+)
+@api_view(['POST'])
+def get_asset_details_batch(request):
+    """
+    Get detailed asset information for a list of asset_ids
+    URL: /api/assets/batch
+    Body: {"asset_ids": ["SYS-...-A-06527", ...]}
+    """
+    serializer = AssetBatchRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    asset_ids = list(dict.fromkeys(serializer.validated_data['asset_ids']))
+    details = serialize_asset_details(Asset.objects.filter(asset_id__in=asset_ids))
+    return Response({
+        'assets': {
+            asset_id: details.get(asset_id, {'error': 'Asset not found'})
+            for asset_id in asset_ids
+        },
+        'not_found': [asset_id for asset_id in asset_ids if asset_id not in details],
+    })
+
+
 @extend_schema(
     tags=['Farms'],
     summary='Get Farm Model File',
-    description='Retrieve 3D farm model file (.glb format) by farm ID.',
+    description='Retrieve 3D farm model file (.glb format) by farm ID, optionally at a reduced level of detail. Supports HTTP Range requests.',
     parameters=[
         OpenApiParameter(
             name='farm_id',
@@ -148,37 +530,33 @@ def get_asset_details(request, asset_id):
             location=OpenApiParameter.PATH,
             description='Farm identifier (e.g., SYS-1D3407DB-F-13083)',
             required=True
-        )
+        ),
+        *MODEL_VARIANT_PARAMETERS,
     ],
     responses={
         200: OpenApiResponse(description='3D model file (.glb format)'),
+        206: OpenApiResponse(description='Requested byte range of the model file'),
+        400: OpenApiResponse(description='Invalid lod or max_bytes'),
+        416: OpenApiResponse(description='Requested range not satisfiable'),
         404: OpenApiResponse(description='Model file not found')
     }
 )
 @api_view(['GET'])
+@condition(*_model_file_validators('farm', 'farm_id'))
 def get_farm_model(request, farm_id):
     """
     Get farm 3D model file
     URL: /api/farm-model/{farm_id}
     """
-    # Simple static file serving like Flask
-    models_directory = os.path.join(settings.BASE_DIR, 'static', 'uploads', 'farm_models')
-    filename = f"{farm_id}.glb"
-    file_path = os.path.join(models_directory, filename)
-    
-    if not os.path.exists(file_path):
+    model = model_registry.get('farm', farm_id)
+    if model is None:
         return Response({'error': 'Model not found'}, status=status.HTTP_404_NOT_FOUND)
-    
-    from django.http import FileResponse
-    from django.utils.encoding import smart_str
-    
-    response = FileResponse(
-        open(file_path, 'rb'),
-        content_type='model/gltf-binary',
-        filename=smart_str(filename)
-    )
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
-    return response
+    try:
+        model = _model_variant(request, model)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return _serve_model(request, model, REVALIDATE_CACHE_CONTROL)
 
 
 
@@ -193,7 +571,7 @@ def get_farm_model(request, farm_id):
     tags=['Assets'],
     operation_id='get_asset_type_model',
     summary='Get Asset Type Model',
-    description='Retrieve generic 3D model for an asset type (e.g., Compressor, FixedRoofTank).',
+    description='Retrieve generic 3D model for an asset type (e.g., Compressor, FixedRoofTank), optionally at a reduced level of detail. Supports HTTP Range requests.',
     parameters=[
         OpenApiParameter(
             name='asset_type',
@@ -201,36 +579,437 @@ def get_farm_model(request, farm_id):
             location=OpenApiParameter.PATH,
             description='Asset type name (e.g., "Compressor", "FixedRoofTank", "ProcessPump")',
             required=True
-        )
+        ),
+        *MODEL_VARIANT_PARAMETERS,
     ],
     responses={
         200: OpenApiResponse(description='3D model file (.glb format)'),
+        206: OpenApiResponse(description='Requested byte range of the model file'),
+        400: OpenApiResponse(description='Invalid lod or max_bytes'),
+        416: OpenApiResponse(description='Requested range not satisfiable'),
         404: OpenApiResponse(description='Asset type model not found')
     }
 )
 @api_view(['GET'])
+@condition(*_model_file_validators('category', 'asset_type'))
 def get_asset_type_model(request, asset_type):
     """
     Get generic 3D model for an asset type
     URL: /api/asset-model/{asset_type}
     """
-    # Simple static file serving like Flask
-    models_directory = os.path.join(settings.BASE_DIR, 'static', 'uploads', 'model_categories')
-    filename = f"{asset_type}.glb"
-    file_path = os.path.join(models_directory, filename)
-    
-    if not os.path.exists(file_path):
+    model = model_registry.get('category', asset_type)
+    if model is None:
         return Response({'error': 'Asset model not found'}, status=status.HTTP_404_NOT_FOUND)
-    
-    from django.http import FileResponse
-    from django.utils.encoding import smart_str
-    
-    response = FileResponse(
-        open(file_path, 'rb'),
-        content_type='model/gltf-binary',
-        filename=smart_str(filename)
+    try:
+        model = _model_variant(request, model)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return _serve_model(request, model, REVALIDATE_CACHE_CONTROL)
+
+
+@extend_schema(
+    tags=['Models'],
+    summary='Model Manifest',
+    description='Content-hashed URLs, SHA-256 and size of every farm and asset type model.',
+    responses={200: OpenApiResponse(description='Models grouped by kind ("farm", "category")')}
+)
+@api_view(['GET'])
+def get_model_manifest(request):
+    """
+    List every 3D model with its content-hashed URL
+    URL: /api/models
+    """
+    return Response(model_registry.manifest())
+
+
+@extend_schema(
+    tags=['Models'],
+    summary='Get Content-Hashed Model File',
+    description=(
+        'Serve a 3D model by content hash with `Cache-Control: immutable`. '
+        'A stale hash redirects to the current one. Supports HTTP Range requests.'
+    ),
+    parameters=[
+        OpenApiParameter(
+            name='kind', type=OpenApiTypes.STR, location=OpenApiParameter.PATH,
+            description='"farm" or "category"', required=True, enum=list(MODEL_KINDS),
+        ),
+        OpenApiParameter(
+            name='name', type=OpenApiTypes.STR, location=OpenApiParameter.PATH,
+            description='Farm ID or asset type name', required=True,
+        ),
+        OpenApiParameter(
+            name='digest', type=OpenApiTypes.STR, location=OpenApiParameter.PATH,
+            description='Leading 16 hex digits of the SHA-256 from /api/models', required=True,
+        ),
+    ],
+    responses={
+        200: OpenApiResponse(description='3D model file (.glb format)'),
+        206: OpenApiResponse(description='Requested byte range of the model file'),
+        302: OpenApiResponse(description='Hash is stale; redirect to the current URL'),
+        416: OpenApiResponse(description='Requested range not satisfiable'),
+        404: OpenApiResponse(description='Model file not found'),
+    }
+)
+@api_view(['GET'])
+@condition(etag_func=_hashed_model_etag)
+def get_hashed_model(request, kind, name, digest):
+    """
+    Get a 3D model by content hash
+    URL: /api/models/{kind}/{name}/{digest}.glb
+    """
+    model = model_registry.get(kind, name)
+    if model is None:
+        return Response({'error': 'Model not found'}, status=status.HTTP_404_NOT_FOUND)
+    variant = _hashed_model(kind, name, digest)
+    if variant is None:
+        response = HttpResponseRedirect(model.url)
+        response['Cache-Control'] = REVALIDATE_CACHE_CONTROL
+        return response
+
+    return _serve_model(request, variant, IMMUTABLE_CACHE_CONTROL)
+
+
+@extend_schema(
+    tags=['Models'],
+    summary='Get Model Info',
+    description=(
+        'Bounding box, node/mesh/primitive/vertex/triangle counts, texture sizes and byte '
+        'size of a 3D model and of each of its levels of detail, without downloading it.'
+    ),
+    parameters=[
+        OpenApiParameter(
+            name='kind', type=OpenApiTypes.STR, location=OpenApiParameter.PATH,
+            description='"farm" or "category"', required=True, enum=list(MODEL_KINDS),
+        ),
+        OpenApiParameter(
+            name='name', type=OpenApiTypes.STR, location=OpenApiParameter.PATH,
+            description='Farm ID or asset type name', required=True,
+        ),
+    ],
+    responses={
+        200: OpenApiResponse(description='Model metadata, with per-level metadata under "lods"'),
+        404: OpenApiResponse(description='Model file not found'),
+        422: OpenApiResponse(description='Model file is not a readable GLB'),
+    }
+)
+@api_view(['GET'])
+def get_model_info(request, kind, name):
+    """
+    Get metadata of a 3D model and its levels of detail
+    URL: /api/model-info/{kind}/{name}
+    """
+    model = model_registry.get(kind, name)
+    if model is None:
+        return Response({'error': 'Model not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        rows = model_info_rows(model)
+    except GLBError as e:
+        return Response(
+            {'error': f'Model file could not be read: {e}'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    data = {'kind': kind, 'name': name}
+    data.update(ModelInfoSerializer(rows['']).data)
+    data['lods'] = {
+        lod: ModelInfoSerializer(row).data for lod, row in rows.items() if lod
+    }
+    return Response(data)
+
+
+@extend_schema(
+    tags=['Farms'],
+    summary='Get Composed Farm Scene',
+    description=(
+        'A GLB of the farm built from the asset type models: each model is stored once and '
+        'every asset is an EXT_mesh_gpu_instancing instance placed at its latitude/longitude '
+        'and scaled to its diameter/height. Rebuilt only when the farm\'s assets or the '
+        'models change. Supports HTTP Range requests.'
+    ),
+    parameters=[
+        OpenApiParameter(
+            name='farm_id',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.PATH,
+            description='Farm identifier (e.g., SYS-1D3407DB-F-13083)',
+            required=True
+        ),
+        MODEL_VARIANT_PARAMETERS[0],
+    ],
+    responses={
+        200: OpenApiResponse(description='Farm scene (.glb format)'),
+        206: OpenApiResponse(description='Requested byte range of the scene'),
+        400: OpenApiResponse(description='Invalid lod'),
+        404: OpenApiResponse(description='Farm not found, or none of its assets has a model'),
+    }
+)
+@api_view(['GET'])
+@condition(etag_func=_farm_scene_etag)
+def get_farm_scene(request, farm_id):
+    """
+    Get the farm composed from instanced asset type models
+    URL: /api/farm/{farm_id}/scene
+    """
+    try:
+        lod = _requested_lod(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    farm = Farm.objects.select_related('location').filter(farm_id=farm_id).first()
+    if farm is None:
+        return Response({'error': 'Farm not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    path = farm_scene_path(farm, lod)
+    if path is None:
+        return Response(
+            {'error': 'None of the farm\'s assets has a 3D model'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return serve_file(
+        request, path, 'model/gltf-binary', f'{farm_id}.glb',
+        etag=_farm_scene_etag(request, farm_id), cache_control=REVALIDATE_CACHE_CONTROL,
+    )
+
+
+@extend_schema(
+    tags=['Farms'],
+    summary='Download Farm Model Bundle',
+    description=(
+        'A zip of every file needed to open a farm: the model of each asset type used by '
+        'its assets, the farm model and the layout PDF, with a manifest.json of their '
+        'SHA-256 and content-hashed URLs. Built once per content set. Supports HTTP Range requests.'
+    ),
+    parameters=[
+        OpenApiParameter(
+            name='farm_id',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.PATH,
+            description='Farm identifier (e.g., SYS-1D3407DB-F-13083)',
+            required=True
+        ),
+        MODEL_VARIANT_PARAMETERS[0],
+    ],
+    responses={
+        200: OpenApiResponse(description='Zip archive'),
+        206: OpenApiResponse(description='Requested byte range of the archive'),
+        400: OpenApiResponse(description='Invalid lod'),
+        404: OpenApiResponse(description='Farm not found, or it has no model files'),
+    }
+)
+@api_view(['GET'])
+@condition(etag_func=_model_bundle_etag)
+def get_model_bundle(request, farm_id):
+    """
+    Download every model file a farm needs in one archive
+    URL: /api/farm/{farm_id}/model-bundle
+    """
+    try:
+        lod = _requested_lod(request)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if not Farm.objects.filter(farm_id=farm_id).exists():
+        return Response({'error': 'Farm not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    asset_type_names = Asset.objects.filter(farm_id=farm_id).values_list(
+        'asset_type__name', flat=True
+    ).distinct()
+    path = model_bundle_path(farm_id, asset_type_names, lod)
+    if path is None:
+        return Response({'error': 'Farm has no model files'}, status=status.HTTP_404_NOT_FOUND)
+    return serve_file(
+        request, path, 'application/zip', f'{farm_id}-models.zip',
+        etag=_model_bundle_etag(request, farm_id), cache_control=REVALIDATE_CACHE_CONTROL,
+    )
+
+
+@extend_schema(
+    tags=['Farms'],
+    summary='Get Farm Layout PDF',
+    description=(
+        'Serve the layout PDF of a farm (the `pdf_url` of the farm endpoints). Supports HTTP '
+        'Range requests, so viewers can show page one of a linearized PDF early.'
+    ),
+    parameters=[
+        OpenApiParameter(
+            name='farm_id',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.PATH,
+            description='Farm identifier (e.g., SYS-1D3407DB-F-13083)',
+            required=True
+        ),
+    ],
+    responses={
+        200: OpenApiResponse(description='Layout PDF'),
+        206: OpenApiResponse(description='Requested byte range of the PDF'),
+        416: OpenApiResponse(description='Requested range not satisfiable'),
+        404: OpenApiResponse(description='Farm has no layout'),
+    }
+)
+@api_view(['GET'])
+@condition(etag_func=_layout_etag, last_modified_func=_layout_last_modified)
+def get_farm_layout(request, farm_id):
+    """
+    Get the layout PDF of a farm
+    URL: /api/farm/{farm_id}/layout
+    """
+    stat = layout_index.stat(farm_id)
+    if stat is None:
+        return Response({'error': 'Layout not found'}, status=status.HTTP_404_NOT_FOUND)
+    return serve_file(
+        request, layout_index.path(farm_id), 'application/pdf', f'{farm_id}.pdf', stat,
+        cache_control=REVALIDATE_CACHE_CONTROL,
     )
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
-    return response
 
 
+@extend_schema(
+    tags=['Farms'],
+    summary='Search Farm Layouts',
+    description=(
+        'Find the farm layouts whose text contains every term of `q`, from the index built by '
+        '`manage.py index_layouts`. Terms match whole tokens such as `FIX-03E9A2`, '
+        'case-insensitively; end a term with `*` to match it as a prefix.'
+    ),
+    parameters=[
+        OpenApiParameter(
+            name='q',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description='Search terms (e.g., SYS-319483CA-F-2D52A*)',
+            required=True
+        ),
+    ],
+    responses={
+        200: OpenApiResponse(description='Matching layouts, most matches first'),
+        400: OpenApiResponse(description='Missing search terms'),
+    }
+)
+@api_view(['GET'])
+def search_farm_layouts(request):
+    """
+    Search the text of the farm layout PDFs
+    URL: /api/layouts/search?q=...
+    """
+    q = request.query_params.get('q', '')
+    if not parse_query(q):
+        return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+    results = search_layouts(q)
+    for result in results:
+        result['pdf_url'] = farm_layout_url(result['farm_id'])
+    return Response({'query': q, 'count': len(results), 'results': results})
+
+
+@extend_schema(
+    tags=['Assets'],
+    summary='Aggregate Event Costs',
+    description=(
+        'Total the parsed cost of asset events, grouped by any combination of farm, company, '
+        'asset type, event type and month (of the start date, or of the creation date for '
+        'events without one). Grouping and summing happen in the database. Events whose cost '
+        'has no usable amount are left out.'
+    ),
+    parameters=[
+        OpenApiParameter(
+            name='group_by',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description=f'Comma-separated subset of: {", ".join(SPEND_GROUPS)} (default: farm)',
+            required=False
+        ),
+        OpenApiParameter(
+            name='farm_id',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description='Only events of this farm',
+            required=False
+        ),
+        OpenApiParameter(
+            name='company_id',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description='Only events of this company',
+            required=False
+        ),
+        OpenApiParameter(
+            name='since',
+            type=OpenApiTypes.DATE,
+            location=OpenApiParameter.QUERY,
+            description='Only events dated on or after this day',
+            required=False
+        ),
+        OpenApiParameter(
+            name='until',
+            type=OpenApiTypes.DATE,
+            location=OpenApiParameter.QUERY,
+            description='Only events dated on or before this day',
+            required=False
+        ),
+    ],
+    responses={
+        200: OpenApiResponse(description='Spend per group, with the overall total'),
+        400: OpenApiResponse(description='Invalid group_by or date'),
+    }
+)
+@api_view(['GET'])
+def get_costs(request):
+    """
+    Aggregate the cost of asset events
+    URL: /api/costs?group_by=farm,month
+    """
+    try:
+        group_by = _requested_spend_groups(request)
+        since = _requested_date(request, 'since')
+        until = _requested_date(request, 'until')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    events = AssetEvents.objects.all()
+    if request.GET.get('farm_id'):
+        events = events.filter(asset__farm_id=request.GET['farm_id'])
+    if request.GET.get('company_id'):
+        events = events.filter(asset__company_id=request.GET['company_id'])
+
+    groups = spend_rollup(group_by, events, since=since, until=until)
+    for group in groups:
+        if group.get('month') is not None:
+            group['month'] = group['month'].strftime('%Y-%m')
+        group['total'] = str(group['total'])
+    total = sum((Decimal(group['total']) for group in groups), Decimal('0.00'))
+    return Response({
+        'group_by': group_by,
+        'total': str(total),
+        'events': sum(group['events'] for group in groups),
+        'groups': groups,
+    })
+
+
+@extend_schema(
+    tags=['Farms'],
+    summary='Farm Summaries',
+    description=(
+        'Dashboard figures of every farm: asset counts by status and type, health average and '
+        'minimum, total capacity and current volume, and the number of open (not completed) '
+        'events. Read from a table kept current on every asset and event change.'
+    ),
+    parameters=[
+        OpenApiParameter(
+            name='company_id',
+            type=OpenApiTypes.STR,
+            location=OpenApiParameter.QUERY,
+            description='Only the farms of this company',
+            required=False
+        ),
+    ],
+    responses={200: FarmSummarySerializer(many=True)}
+)
+@api_view(['GET'])
+def get_farm_summaries(request):
+    """
+    Get the summary of every farm
+    URL: /api/farms/summary
+    """
+    summaries = FarmSummary.objects.select_related('farm').order_by('farm_id')
+    if request.GET.get('company_id'):
+        summaries = summaries.filter(farm__company_id=request.GET['company_id'])
+    data = FarmSummarySerializer(summaries, many=True).data
+    return Response({'count': len(data), 'farms': data})